@@ -1,52 +1,225 @@
+"""Grouped statistics of BFS runs in the results store.
+
+Runs are grouped by (cell_count, tx_range, algorithm). For every group and metric the
+analyser keeps running aggregates (count, mean, M2, min, max) and a fixed-size reservoir
+sample in the results database, together with the id of the last run it has seen. Each
+invocation only reads runs appended since then and merges them into the stored state.
+
+Percentiles are exact up to RESERVOIR_SIZE runs per group and estimated from the
+reservoir sample beyond that.
+
+Usage: python3 analyser.py [--db results.db] [--json summary.json] [--reset]
+"""
+
+import argparse
 import json
 
-data = {}
-
-with open('output.txt', 'r') as f:
-    for line in f:
-        ls = line.split(",")
-        title = ls[0].split(' ')
-        test_id = title[0] # cell count and tx range
-        sim_id = title[1] # unique simulator id
-        bfs_type = title[2] # Synchronous or Asynchronous
-        sim_res = { bfs_type : {'test_id' : test_id, 'bfs_type' : bfs_type,
-                            'time': ls[1], 'msg_count':ls[2].replace('\n', '')} }
-        if list(data.keys()).count(sim_id) == 0:
-            data[sim_id] = sim_res
-        else:
-            data[sim_id][bfs_type] = list(sim_res.values())[0]
-                  
-length = len(data.keys())
-sync_total_time = 0.0
-sync_total_msg = 0
-async_total_time = 0.0
-async_total_msg = 0
-
-test_id_ls:list = list(list(data.values())[0].values())[0]['test_id'].split('x')
-cell_count = test_id_ls[0]
-tx_range = test_id_ls[1]
-
-
-for i in data.values():
-    for j in i.values():
-        if(j["bfs_type"] == "Synchronous"):
-            sync_total_time += float(j["time"])
-            sync_total_msg += int(j["msg_count"])
-        else:
-            async_total_time += float(j["time"])
-            async_total_msg += int(j["msg_count"])
-
-print("--------------------------------------")
-print(f"Node: {cell_count}x{cell_count} | Distance: {tx_range} Test Result")
-print("\n")
-print(f"Test Count: {length}")
-print(f"Sync Msg Average: {sync_total_msg/length}")
-print(f"Sync Time Average: {sync_total_time/length}" )
-print(f"Async Msg Average: {async_total_msg/length}")
-print(f"Async Time Average: {async_total_time/length}")
-print("--------------------------------------\n")
-
-
-with open(f'{'x'.join(test_id_ls)}_results.txt', 'w') as f:
-        f.write(json.dumps(data, indent=4))
+import numpy as np
+
+import results
+
+METRICS = ('sim_time', 'msg_count', 'wall_time')
+PERCENTILES = (5, 50, 95, 99)
+RESERVOIR_SIZE = 4096
+CHUNK_SIZE = 100000
+
+# two-sided 95% critical values of Student's t distribution for 1..30 degrees of freedom
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyser_offset (
+    id      INTEGER PRIMARY KEY CHECK (id = 0),
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyser_groups (
+    cell_count INTEGER NOT NULL,
+    tx_range   REAL    NOT NULL,
+    algorithm  TEXT    NOT NULL,
+    metric     TEXT    NOT NULL,
+    n          INTEGER NOT NULL,
+    mean       REAL    NOT NULL,
+    m2         REAL    NOT NULL,
+    min        REAL    NOT NULL,
+    max        REAL    NOT NULL,
+    sample     BLOB    NOT NULL,
+    PRIMARY KEY (cell_count, tx_range, algorithm, metric)
+);
+"""
+
+
+class Aggregate:
+    """
+    Running statistics of one metric of one group.
+    """
+
+    def __init__(self, n=0, mean=0.0, m2=0.0, lo=np.inf, hi=-np.inf, sample=None):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.min = lo
+        self.max = hi
+        self.sample = np.empty(0) if sample is None else sample
+
+    def merge(self, values: np.ndarray, rng: np.random.Generator):
+        """
+        Merges a batch of new values (Chan et al. parallel variance update) and feeds them
+        to the reservoir sample (algorithm R).
+        """
+        m = len(values)
+        if not m:
+            return
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+        n = self.n + m
+        delta = mean_b - self.mean
+        self.mean += delta * m / n
+        self.m2 += m2_b + delta * delta * self.n * m / n
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        free = max(0, RESERVOIR_SIZE - len(self.sample))
+        self.sample = np.concatenate([self.sample, values[:free]])
+        rest = values[free:]
+        if len(rest):
+            # the i-th value overall replaces a random slot with probability RESERVOIR_SIZE / i
+            seen = self.n + free + np.arange(1, len(rest) + 1)
+            slots = (rng.random(len(rest)) * seen).astype(np.int64)
+            keep = slots < RESERVOIR_SIZE
+            self.sample[slots[keep]] = rest[keep]
+        self.n = n
+
+    def summary(self) -> dict:
+        """
+        Gives mean, standard deviation, 95% confidence interval of the mean and percentiles.
+        """
+        std = (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+        t = T_95[self.n - 2] if 1 < self.n <= len(T_95) + 1 else 1.96
+        half = t * std / self.n ** 0.5 if self.n > 1 else 0.0
+        percentiles = np.percentile(self.sample, PERCENTILES) if len(self.sample) else [np.nan] * len(PERCENTILES)
+        return {
+            'n': self.n,
+            'mean': self.mean,
+            'std': std,
+            'ci95': (self.mean - half, self.mean + half),
+            'min': self.min,
+            'max': self.max,
+            **{f'p{p}': float(v) for p, v in zip(PERCENTILES, percentiles)},
+        }
+
+
+class Analyser:
+    """
+    Incremental grouped statistics over a ResultStore.
+    """
+
+    def __init__(self, store: results.ResultStore):
+        self.store = store
+        self.conn = store.conn
+        self.conn.executescript(STATE_SCHEMA)
+        self.groups = {}
+        for row in self.conn.execute('SELECT cell_count, tx_range, algorithm, metric, n, mean, m2, '
+                                     'min, max, sample FROM analyser_groups'):
+            *key, metric, n, mean, m2, lo, hi, sample = row
+            self.groups.setdefault(tuple(key), {})[metric] = Aggregate(
+                n, mean, m2, lo, hi, np.frombuffer(sample, dtype=np.float64).copy())
+        row = self.conn.execute('SELECT last_id FROM analyser_offset WHERE id = 0').fetchone()
+        self.last_id = row[0] if row else 0
+
+    def reset(self):
+        """
+        Forgets the stored state, so the next update reads every run again.
+        """
+        self.conn.execute('DELETE FROM analyser_groups')
+        self.conn.execute('DELETE FROM analyser_offset')
+        self.groups = {}
+        self.last_id = 0
+
+    def update(self) -> int:
+        """
+        Merges the runs appended since the last update into the group statistics and
+        stores the new state.
+
+        Returns:
+            int: Number of new runs.
+        """
+        rng = np.random.default_rng(self.last_id)
+        cur = self.conn.execute(
+            f"SELECT id, cell_count, tx_range, algorithm, {', '.join(METRICS)} FROM runs WHERE id > ? ORDER BY id",
+            (self.last_id,))
+        total = 0
+        while True:
+            chunk = cur.fetchmany(CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            self.last_id = chunk[-1][0]
+            batches = {}
+            for _, cell_count, tx_range, algorithm, *values in chunk:
+                batches.setdefault((cell_count, tx_range, algorithm), []).append(values)
+            for key, rows in batches.items():
+                columns = np.array(rows, dtype=np.float64)  # None becomes nan
+                group = self.groups.setdefault(key, {})
+                for i, metric in enumerate(METRICS):
+                    values = columns[:, i]
+                    group.setdefault(metric, Aggregate()).merge(values[~np.isnan(values)], rng)
+        if total:
+            self._save()
+        return total
+
+    def _save(self):
+        cur = self.conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        try:
+            cur.executemany('INSERT OR REPLACE INTO analyser_groups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            [(*key, metric, a.n, a.mean, a.m2, a.min, a.max, a.sample.tobytes())
+                             for key, group in self.groups.items()
+                             for metric, a in group.items() if a.n])
+            cur.execute('INSERT OR REPLACE INTO analyser_offset (id, last_id) VALUES (0, ?)', (self.last_id,))
+            cur.execute('COMMIT')
+        except BaseException:
+            cur.execute('ROLLBACK')
+            raise
+
+    def report(self) -> list:
+        """
+        Gives the summary of every group, sorted by group key.
+        """
+        return [{'cell_count': key[0], 'tx_range': key[1], 'algorithm': key[2],
+                 **{metric: a.summary() for metric, a in group.items() if a.n}}
+                for key, group in sorted(self.groups.items())]
+
+
+def print_report(report: list):
+    print("--------------------------------------")
+    for group in report:
+        print(f"Node: {group['cell_count']}x{group['cell_count']} | Distance: {group['tx_range']:g} "
+              f"| {group['algorithm']}")
+        for metric in METRICS:
+            if metric not in group:
+                continue
+            s = group[metric]
+            print(f"  {metric:>9}: n={s['n']} mean={s['mean']:.3f} std={s['std']:.3f} "
+                  f"ci95=[{s['ci95'][0]:.3f}, {s['ci95'][1]:.3f}] "
+                  + ' '.join(f"p{p}={s[f'p{p}']:.3f}" for p in PERCENTILES))
+        print("--------------------------------------")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report grouped statistics of BFS runs.')
+    parser.add_argument('--db', default=results.DEFAULT_PATH, help='results database')
+    parser.add_argument('--json', help='also write the report to this JSON file')
+    parser.add_argument('--reset', action='store_true', help='recompute from the first run')
+    args = parser.parse_args()
 
+    analyser = Analyser(results.ResultStore(args.db))
+    if args.reset:
+        analyser.reset()
+    new = analyser.update()
+    print(f"{new} new runs")
+    report = analyser.report()
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(json.dumps(report, indent=4))
@@ -0,0 +1,60 @@
+"""Compares event throughput of the simpy and heap kernels of DawnSim.
+
+Usage: python -m benchmarks.kernels [cell_count ...]
+"""
+
+import random
+import sys
+from time import perf_counter
+
+import main
+from source import DawnSimVis
+from bfs_nodes import SyncBFSNode, AsyncBFSNode
+
+TX_RANGE = 75
+
+
+class CountingSimulator(DawnSimVis.Simulator):
+    """Headless simulator counting every delayed callback and broadcast delivery as one event.
+    Headless nodes schedule no drawing events, so only timers and deliveries are counted.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = 0
+
+    def delayed_exec(self, delay, func, *args, **kwargs):
+        self.events += 1
+        super().delayed_exec(delay, func, *args, **kwargs)
+
+    def broadcast_exec(self, deliveries, *args):
+        self.events += len(deliveries)
+        super().broadcast_exec(deliveries, *args)
+
+
+def run_once(kernel, node_class, cell_count, seed=0):
+    """Runs one headless simulation and returns (events, wall seconds).
+    """
+    random.seed(seed)
+    sim = CountingSimulator(main.DURATION, main.TIMESCALE, seed, visual=False,
+                            title=f'{cell_count}x{TX_RANGE} bench {kernel}',
+                            time_mode='virtual', kernel=kernel)
+    main.create_networks([sim], [node_class], cell_count, TX_RANGE)
+    for n in sim.nodes:
+        n.logging = False
+    start = perf_counter()
+    sim.run()
+    return sim.events, perf_counter() - start
+
+
+if __name__ == '__main__':
+    cell_counts = [int(c) for c in sys.argv[1:]] or [8, 16, 32]
+    rows = []
+    for cell_count in cell_counts:
+        for node_class in (SyncBFSNode, AsyncBFSNode):
+            for kernel in ('simpy', 'heap'):
+                events, wall = run_once(kernel, node_class, cell_count)
+                rows.append((cell_count, node_class.__name__, kernel, events, wall))
+    print(f"{'grid':>6} {'algorithm':>14} {'kernel':>6} {'events':>10} {'wall(s)':>9} {'events/s':>12}")
+    for cell_count, name, kernel, events, wall in rows:
+        print(f"{cell_count:>6} {name:>14} {kernel:>6} {events:>10} {wall:>9.3f} {events / wall:>12.0f}")
@@ -0,0 +1,197 @@
+"""Benchmark suite for simulator throughput and BFS scaling.
+
+Runs SyncBFSNode and AsyncBFSNode headless over grid sizes and tx ranges, each case in a
+fresh process so peak RSS belongs to that case alone, and reports neighbor-build time,
+run wall time, events per second, peak RSS and message counts. Results can be saved as
+a JSON baseline and compared with another one, e.g. one saved on an earlier commit.
+
+Usage: python -m benchmarks.suite [--preset quick|full] [--cells 8 16 ...] [--ranges 75 ...]
+                                  [--repeat 3] [--save new.json] [--compare old.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import main
+from benchmarks.kernels import CountingSimulator
+from bfs_nodes import SyncBFSNode, AsyncBFSNode
+
+PRESETS = {
+    'quick': [8, 16, 32],
+    'full': [8, 16, 32, 64, 128, 256],
+}
+ALGORITHMS = {'sync': SyncBFSNode, 'async': AsyncBFSNode}
+# measurements compared between baselines, and whether higher is better
+COMPARED = {'build_time': False, 'wall_time': False, 'events_per_s': True, 'peak_rss_mb': False}
+# timings shorter than this many seconds are too noisy to compare
+NOISE_FLOOR = 0.05
+
+
+def peak_rss_mb():
+    """
+    Gives the peak resident set size of the calling process in megabytes.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_case(cell_count, tx_range, algorithm, kernel, seed, duration):
+    """
+    Runs one benchmark case in the calling process and returns its measurements.
+    """
+    random.seed(seed)
+    sim = CountingSimulator(duration, main.TIMESCALE, seed, visual=False,
+                            title=f'{cell_count}x{tx_range} bench {algorithm}',
+                            time_mode='virtual', kernel=kernel)
+    start = perf_counter()
+    main.create_networks([sim], [ALGORITHMS[algorithm]], cell_count, tx_range)
+    build_time = perf_counter() - start
+    for n in sim.nodes:
+        n.logging = False
+    start = perf_counter()
+    metrics = sim.run()
+    wall_time = perf_counter() - start
+    return {
+        'cell_count': cell_count,
+        'tx_range': tx_range,
+        'algorithm': algorithm,
+        'kernel': kernel,
+        'nodes': len(sim.nodes),
+        'links': len(sim.adjacency.indices),
+        'build_time': build_time,
+        'wall_time': wall_time,
+        'events': sim.events,
+        'events_per_s': sim.events / wall_time if wall_time else 0.0,
+        'msg_count': metrics.msg_count,
+        'sent': sum(metrics.sent.values()),
+        'completion_time': metrics.completion_time,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_isolated(case):
+    """
+    Runs a case in a fresh worker process, so its peak RSS is not inflated by earlier cases.
+    """
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        return pool.submit(run_case, *case).result()
+
+
+def best_of(results):
+    """
+    Merges repeated runs of a case: minimum of times and RSS, maximum of events per second.
+    Counts are deterministic for a seed and taken from the first run.
+    """
+    best = dict(results[0])
+    for key in ('build_time', 'wall_time', 'peak_rss_mb'):
+        best[key] = min(r[key] for r in results)
+    best['events_per_s'] = max(r['events_per_s'] for r in results)
+    best['repeats'] = len(results)
+    return best
+
+
+def environment():
+    """
+    Describes where the benchmark ran, so baselines of different machines are not mixed up.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def case_key(result):
+    return result['cell_count'], result['tx_range'], result['algorithm'], result['kernel']
+
+
+def compare(old, new, threshold):
+    """
+    Prints the change of each compared measurement from the old to the new baseline.
+
+    Returns:
+        int: Number of measurements worse by more than threshold (a fraction).
+    """
+    old_cases = {case_key(r): r for r in old['results']}
+    regressions = 0
+    print(f"comparing with {old['environment'].get('commit')} of {old['environment'].get('created_at')}")
+    print(f"{'grid':>6} {'range':>6} {'algorithm':>9} " + ' '.join(f"{m:>14}" for m in COMPARED))
+    for result in new['results']:
+        base = old_cases.get(case_key(result))
+        if base is None:
+            continue
+        cells = []
+        for metric, higher_is_better in COMPARED.items():
+            timed = base['build_time'] if metric == 'build_time' else base['wall_time']
+            if not base[metric] or (metric != 'peak_rss_mb' and timed < NOISE_FLOOR):
+                cells.append(f"{'-':>14}")
+                continue
+            change = result[metric] / base[metric] - 1
+            worse = -change if higher_is_better else change
+            mark = '!' if worse > threshold else ' '
+            regressions += worse > threshold
+            cells.append(f"{change * 100:>+12.1f}%{mark}")
+        print(f"{result['cell_count']:>6} {result['tx_range']:>6g} {result['algorithm']:>9} " + ' '.join(cells))
+    return regressions
+
+
+def print_header():
+    print(f"{'grid':>6} {'range':>6} {'algorithm':>9} {'nodes':>7} {'build(s)':>9} {'wall(s)':>9} "
+          f"{'events':>10} {'events/s':>10} {'msgs':>10} {'rss(MB)':>8}")
+
+
+def print_row(r):
+    print(f"{r['cell_count']:>6} {r['tx_range']:>6g} {r['algorithm']:>9} {r['nodes']:>7} "
+          f"{r['build_time']:>9.3f} {r['wall_time']:>9.3f} {r['events']:>10} "
+          f"{r['events_per_s']:>10.0f} {r['msg_count']:>10} {r['peak_rss_mb']:>8.1f}", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark DawnSim throughput and BFS scaling.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick', help='grid sizes to run')
+    parser.add_argument('--cells', type=int, nargs='+', help='grid sizes, overriding the preset')
+    parser.add_argument('--ranges', type=float, nargs='+', default=[75, 100], help='transmission ranges')
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(ALGORITHMS), default=['sync', 'async'])
+    parser.add_argument('--kernel', choices=['simpy', 'heap'], default='heap')
+    parser.add_argument('--duration', type=float, default=main.DURATION, help='simulated seconds per run')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the best one is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results as a JSON baseline to this file')
+    parser.add_argument('--compare', help='compare the results with this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='fraction a measurement may get worse before it counts as a regression')
+    args = parser.parse_args()
+
+    results = []
+    print_header()
+    for cell_count in args.cells or PRESETS[args.preset]:
+        for tx_range in args.ranges:
+            for algorithm in args.algorithms:
+                case = (cell_count, tx_range, algorithm, args.kernel, args.seed, args.duration)
+                results.append(best_of([run_isolated(case) for _ in range(args.repeat)]))
+                print_row(results[-1])
+    report = {'environment': environment(), 'results': results}
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        sys.exit(1 if regressions else 0)
@@ -1,6 +1,8 @@
+import numpy as np
 import helper
 from source import DawnSimVis
-from models.message import Message as MSG
+from source.nodestore import StoreField
+from models.message import Message as MSG, signal
 from models.message_types import MessageTypes as MT
 
 #
@@ -42,49 +44,27 @@ class SyncBFSNode(DawnSimVis.BaseNode):
         incrementing the layer by 1.
         """
         # Send HEARTBEAT message to all nodes
-        self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.HEARTBEAT, None, self.id))
+        self.send(DawnSimVis.BROADCAST_ADDR, signal(MT.HEARTBEAT, self.id))
 
         # If the node is the ROOT node, send LAYER message to all nodes
         if self.id == ROOT:
             self.layer = 0
             self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.LAYER, self.layer + 1, self.id))
 
-    def on_receive(self, msg: MSG):
+    @DawnSimVis.handles(MT.HEARTBEAT, 'src')
+    def on_heartbeat_receive(self, j):
         """
-        This method is executed when the node receives a message.
+        Handle the received HEARTBEAT message by adding the sender to the neighbors set.
 
         Args:
-            msg (MSG): The received message packet.
+            j (int): The ID of the sender of the message.
 
         Returns:
             None
         """
-        # Count received messages
-        helper.msg_count += 1
-
-        # Handle the received message based on its type
-        if msg.type == MT.HEARTBEAT:
-            # If the message type is HEARTBEAT, add the sender to the neighbors set
-            self.neighbors.add(msg.src)
-        elif msg.type == MT.LAYER:
-            # If the message type is LAYER, execute the on_layer_receive method
-            self.on_layer_receive(msg.val, msg.src)
-        elif msg.type == MT.ACK:
-            # If the message type is ACK, execute the on_ack_receive method
-            self.on_ack_receive(msg.src)
-        elif msg.type == MT.REJECT:
-            # If the message type is REJECT, execute the on_reject_receive method
-            self.on_reject_receive(msg.src)
-        elif msg.type == MT.ROUND:
-            # If the message type is ROUND, execute the on_round_receive method
-            self.on_round_receive(msg.val, msg.src)
-        elif msg.type == MT.UPCAST:
-            # If the message type is UPCAST, execute the on_upcast_receive method
-            self.on_upcast_receive(msg.val, msg.src)
-        else:
-            # If the message type is unknown, log an error message
-            self.log(f"Unknown message type: {msg.type}")
+        self.neighbors.add(j)
 
+    @DawnSimVis.handles(MT.LAYER, 'val', 'src')
     def on_layer_receive(self, l, j):
         """
         Handle the received LAYER message.
@@ -104,13 +84,14 @@ class SyncBFSNode(DawnSimVis.BaseNode):
             if self.parent is None and self.id != ROOT:
                 self.layer = l
                 self.parent = j
-                self.send(self.parent, MSG(MT.ACK, None, self.id))
+                self.send(self.parent, signal(MT.ACK, self.id))
             else: 
-                self.send(j, MSG(MT.REJECT, None, self.id))
+                self.send(j, signal(MT.REJECT, self.id))
         except Exception as e:
             # If an error occurs, log the error message with the details of the error.
             self.log(f":: x :: Error on layer: {l} from {j} | Error: {e}")
 
+    @DawnSimVis.handles(MT.ACK, 'src')
     def on_ack_receive(self, j):
         """
         This method is executed when the node receives an ACK message.
@@ -141,6 +122,7 @@ class SyncBFSNode(DawnSimVis.BaseNode):
             # If an error occurs, log the error message with the details of the error
             self.log(f":: x :: Error on ACK from {j} | Error: {e}")
 
+    @DawnSimVis.handles(MT.REJECT, 'src')
     def on_reject_receive(self, j):
         """
         This method is executed when the node receives a REJECT message.
@@ -171,6 +153,7 @@ class SyncBFSNode(DawnSimVis.BaseNode):
             # Log any errors that occur during the execution of the method
             self.log(f":: x :: Error on REJECT from {j} | Error: {e}")
 
+    @DawnSimVis.handles(MT.ROUND, 'val', 'src')
     def on_round_receive(self, r, j):
         """
         This method is executed when the node receives a ROUND message.
@@ -202,6 +185,7 @@ class SyncBFSNode(DawnSimVis.BaseNode):
             # Log any errors that occur during the execution of the method
             self.log(f":: x :: Error on ROUND({r}) from {j} | Error: {e}")
 
+    @DawnSimVis.handles(MT.UPCAST, 'val', 'src')
     def on_upcast_receive(self, f, j):
         """
         This method is executed when the node receives an UPCAST message.
@@ -225,8 +209,7 @@ class SyncBFSNode(DawnSimVis.BaseNode):
                         self.send(self.parent, MSG(MT.UPCAST, True, self.id))
                     else:
                         # If the node is the root, indicate that the synchronous BFS algorithm has finished.
-                        helper.last_time = self.now
-                        helper.stop_sync_sim()
+                        helper.stop_sync_sim(self.sim)
                         
                 else:
                     # If not all the received upcast flags are True, perform the necessary actions.
@@ -278,55 +261,27 @@ class AsyncBFSNode(DawnSimVis.BaseNode):
         This method does not return anything.
         """
         # Send a heartbeat message to all nodes.
-        self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.HEARTBEAT, None, self.id))
+        self.send(DawnSimVis.BROADCAST_ADDR, signal(MT.HEARTBEAT, self.id))
 
         # If the node is the root, it sends a layer message to all nodes.
         if self.id == ROOT:
             self.layer = 0
             self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.LAYER, self.layer + 1, self.id))
 
-    def on_receive(self, msg: MSG):
+    @DawnSimVis.handles(MT.HEARTBEAT, 'src')
+    def on_heartbeat_receive(self, j):
         """
-        Handle incoming messages for the node.
-
-        This method handles different types of messages received by the node.
-        It performs the following actions based on the message type:
-        - HEARTBEAT: Add the source node to the list of neighbors.
-        - LAYER: Call the on_layer_receive method with the layer value and source node.
-        - ACK: Call the on_ack_receive method with the source node.
-        - REJECT: Call the on_reject_receive method with the source node.
-        - Any other type: Log an error message indicating the unknown message type.
+        Handle the received HEARTBEAT message by adding the sender to the neighbors set.
 
         Args:
-            msg (MSG): The incoming message packet.
+            j (int): The ID of the sender of the message.
 
         Returns:
             None
         """
-        # Increment the message counter
-        helper.msg_count += 1
-
-        # Handle the received message based on its type
-        if msg.type == MT.HEARTBEAT:
-            # Add the source node to the list of neighbors
-            self.neighbors.add(msg.src)
-
-        elif msg.type == MT.LAYER:
-            # Call the on_layer_receive method with the layer value and source node
-            self.on_layer_receive(msg.val, msg.src)
-
-        elif msg.type == MT.ACK:
-            # Call the on_ack_receive method with the source node
-            self.on_ack_receive(msg.src)
-
-        elif msg.type == MT.REJECT:
-            # Call the on_reject_receive method with the source node
-            self.on_reject_receive(msg.src)
-
-        else:
-            # Log an error message indicating the unknown message type
-            self.log(f"Unknown message type: {msg.type}")
+        self.neighbors.add(j)
 
+    @DawnSimVis.handles(MT.LAYER, 'val', 'src')
     def on_layer_receive(self, l, j):
         """
         Handle the received LAYER message.
@@ -344,20 +299,21 @@ class AsyncBFSNode(DawnSimVis.BaseNode):
             # Also, send a new LAYER message to all nodes.
             if l < self.layer:
                 if self.parent is not None:
-                    self.send(self.parent, MSG(MT.REJECT, None, self.id))
+                    self.send(self.parent, signal(MT.REJECT, self.id))
                 self.layer = l
                 self.parent = j
-                self.send(self.parent, MSG(MT.ACK, None, self.id))
+                self.send(self.parent, signal(MT.ACK, self.id))
                 self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.LAYER, self.layer + 1, self.id))
             # If the received layer value is greater than or equal to the current layer value,
             # send a REJECT message to the sender.
             else:
-                self.send(j, MSG(MT.REJECT, None, self.id))
+                self.send(j, signal(MT.REJECT, self.id))
 
         except Exception as e:
             # If an error occurs, log the error message with the details of the error.
             self.log(f":: X :: Error on layer {l} from {j}: Error is {e}")
 
+    @DawnSimVis.handles(MT.ACK, 'src')
     def on_ack_receive(self, j):
         """
         Handle the received ACK message.
@@ -373,6 +329,7 @@ class AsyncBFSNode(DawnSimVis.BaseNode):
         # Add the sender node to the set of child nodes
         self.childs.add(j)
 
+    @DawnSimVis.handles(MT.REJECT, 'src')
     def on_reject_receive(self, j):
         """
         Handle the received REJECT message.
@@ -387,5 +344,281 @@ class AsyncBFSNode(DawnSimVis.BaseNode):
         self.childs.discard(j)
         # Add the sender node to the set of other nodes
         self.others.add(j)
-        # Update the last time with the current time
-        helper.last_time = self.now
+
+    def finish(self):
+        """
+        Record the completion time of the run at the root node.
+
+        The nodes can not tell when the tree is final, so the algorithm is taken to be complete
+        when the last message was delivered, provided the simulation went quiet afterwards.
+        """
+        metrics = self.sim.metrics
+        if self.id == ROOT and metrics.quiescence_time is not None:
+            metrics.mark_completion(metrics.last_delivery_time)
+
+#
+# ──────────────────────────────────────────────────────────────────── III ──────────
+#   :::::: C O M P A C T   A S Y N C   B F S   N O D E : :  :   :    :     :        :
+# ───────────────────────────────────────────────────────────────────────────────────
+#
+
+class CompactAsyncBFSNode(DawnSimVis.StoredNode):
+    """
+    Asynchronous BFS node for very large headless networks.
+
+    It sends the same messages as AsyncBFSNode, but keeps its layer and parent in the node store of the
+    simulator instead of per-node sets. The neighbors of a node are its row in sim.adjacency and its
+    children are the nodes whose parent it is, so the whole BFS tree can be read at once from
+    sim.node_store['layer'] and sim.node_store['parent'].
+    """
+    __slots__ = ()
+
+    layer = StoreField(np.float64, float('inf'))  # Layer of the node. Initialized as infinity.
+    parent = StoreField(np.int32, None)  # Parent node, stored as -1 while there is none.
+
+    def run(self):
+        """
+        Initialize the node by sending a heartbeat message to all nodes.
+        If the node is the root, it also sends a layer message to all nodes.
+        """
+        self.send(DawnSimVis.BROADCAST_ADDR, signal(MT.HEARTBEAT, self.id))
+
+        if self.id == ROOT:
+            self.layer = 0
+            self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.LAYER, self.layer + 1, self.id))
+
+    @DawnSimVis.handles(MT.HEARTBEAT)
+    def on_heartbeat_receive(self, msg):
+        """
+        Ignore the received HEARTBEAT message, the neighbors are already known from sim.adjacency.
+        """
+        pass
+
+    @DawnSimVis.handles(MT.LAYER, 'val', 'src')
+    def on_layer_receive(self, l, j):
+        """
+        Handle the received LAYER message like AsyncBFSNode.on_layer_receive.
+
+        Args:
+            l (int): The layer value of the received message.
+            j (int): The ID of the sender of the message.
+
+        Returns:
+            None
+        """
+        if l < self.layer:
+            if self.parent is not None:
+                self.send(self.parent, signal(MT.REJECT, self.id))
+            self.layer = l
+            self.parent = j
+            self.send(j, signal(MT.ACK, self.id))
+            self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.LAYER, l + 1, self.id))
+        else:
+            self.send(j, signal(MT.REJECT, self.id))
+
+    @DawnSimVis.handles(MT.ACK)
+    def on_ack_receive(self, msg):
+        """
+        Ignore the received ACK message, the sender already stored this node as its parent.
+        """
+        pass
+
+    @DawnSimVis.handles(MT.REJECT)
+    def on_reject_receive(self, msg):
+        """
+        Ignore the received REJECT message, the sender did not store this node as its parent.
+        """
+        pass
+
+    def finish(self):
+        """
+        Record the time of the last delivery as the completion time of a quiescent run at the root node.
+        """
+        metrics = self.sim.metrics
+        if self.id == ROOT and metrics.quiescence_time is not None:
+            metrics.mark_completion(metrics.last_delivery_time)
+
+#
+# ──────────────────────────────────────────────────────────────────── IV ──────────
+#   :::::: E C H O   A S Y N C   B F S   N O D E : :  :   :    :     :        :
+# ──────────────────────────────────────────────────────────────────────────────────
+#
+
+class EchoAsyncBFSNode(AsyncBFSNode):
+    """
+    Asynchronous BFS node with echo termination detection.
+
+    Every node answers a LAYER message with an ACK or REJECT carrying the received layer, so the
+    sender can count the answers to its latest LAYER broadcast, and a node moving to a better
+    parent tells the old one with a LEAVE. Once all neighbors answered and all children sent an
+    ECHO, a node sends an ECHO to its parent. When the root gets the ECHO of all of its children,
+    the tree is final and the root records the completion time.
+
+    Messages may be delivered out of order, so every message carries the layer it belongs to and
+    messages of an earlier layer of the receiver are ignored.
+    """
+
+    def init(self):
+        """
+        Initialize the EchoAsyncBFSNode class.
+
+        In addition to the AsyncBFSNode variables, this method initializes:
+        - waiting: the number of neighbors which did not answer the latest LAYER broadcast yet.
+        - echoed: a set to store the nodes which sent an ECHO for the current layer.
+        - left: a set to store the nodes which sent a LEAVE before their ACK arrived.
+        - reported: a flag telling whether the ECHO for the current layer was sent.
+        """
+        super().init()
+        self.waiting = 0  # Neighbors which did not answer the latest LAYER broadcast yet.
+        self.echoed = set()  # Nodes which sent an ECHO for the current layer.
+        self.left = set()  # Nodes which sent a LEAVE before their ACK arrived.
+        self.reported = False  # Whether the ECHO for the current layer was sent.
+
+    def broadcast_layer(self):
+        """
+        Send a LAYER message to all nodes and wait for the answers of all neighbors.
+        Children of an earlier layer all move to a better layer, so they are forgotten.
+        """
+        self.waiting = self.sim.adjacency.degree(self.id)
+        self.childs = set()
+        self.echoed = set()
+        self.left = set()
+        self.reported = False
+        self.send(DawnSimVis.BROADCAST_ADDR, MSG(MT.LAYER, self.layer + 1, self.id))
+        self.check_echo()
+
+    def run(self):
+        """
+        Initialize the node by sending a heartbeat message to all nodes.
+        If the node is the root, it also sends a layer message to all nodes.
+        """
+        self.send(DawnSimVis.BROADCAST_ADDR, signal(MT.HEARTBEAT, self.id))
+
+        if self.id == ROOT:
+            self.layer = 0
+            self.broadcast_layer()
+
+    @DawnSimVis.handles(MT.LAYER, 'val', 'src')
+    def on_layer_receive(self, l, j):
+        """
+        Handle the received LAYER message. The answer carries l, so the sender can match it
+        with its latest broadcast.
+
+        Args:
+            l (int): The layer value of the received message.
+            j (int): The ID of the sender of the message.
+
+        Returns:
+            None
+        """
+        try:
+            if l < self.layer:
+                if self.parent is not None:
+                    self.send(self.parent, MSG(MT.LEAVE, self.layer, self.id))
+                self.layer = l
+                self.parent = j
+                self.send(self.parent, MSG(MT.ACK, l, self.id))
+                self.broadcast_layer()
+            else:
+                self.send(j, MSG(MT.REJECT, l, self.id))
+
+        except Exception as e:
+            self.log(f":: X :: Error on layer {l} from {j}: Error is {e}")
+
+    @DawnSimVis.handles(MT.ACK, 'val', 'src')
+    def on_ack_receive(self, l, j):
+        """
+        Handle the received ACK message.
+
+        Args:
+            l (int): The layer value the sender answered.
+            j (int): The ID of the sender of the message.
+
+        Returns:
+            None
+        """
+        if l != self.layer + 1:
+            return
+        self.waiting -= 1
+        self.others.discard(j)
+        if j in self.left:
+            self.left.discard(j)
+        else:
+            self.childs.add(j)
+        self.check_echo()
+
+    @DawnSimVis.handles(MT.REJECT, 'val', 'src')
+    def on_reject_receive(self, l, j):
+        """
+        Handle the received REJECT message.
+
+        Args:
+            l (int): The layer value the sender answered.
+            j (int): The ID of the sender of the message.
+
+        Returns:
+            None
+        """
+        if l != self.layer + 1:
+            return
+        self.waiting -= 1
+        self.others.add(j)
+        self.check_echo()
+
+    @DawnSimVis.handles(MT.LEAVE, 'val', 'src')
+    def on_leave_receive(self, l, j):
+        """
+        Handle the received LEAVE message, telling that the sender moved to a better parent.
+
+        Args:
+            l (int): The layer the sender had as a child of this node.
+            j (int): The ID of the sender of the message.
+
+        Returns:
+            None
+        """
+        if l != self.layer + 1:
+            return
+        if j in self.childs:
+            self.childs.discard(j)
+        else:
+            self.left.add(j)
+        self.echoed.discard(j)
+        self.others.add(j)
+        self.check_echo()
+
+    @DawnSimVis.handles(MT.ECHO, 'val', 'src')
+    def on_echo_receive(self, l, j):
+        """
+        Handle the received ECHO message, telling that the subtree of the sender is final.
+        It may arrive before the ACK of the sender.
+
+        Args:
+            l (int): The layer of the sender when it sent the message.
+            j (int): The ID of the sender of the message.
+
+        Returns:
+            None
+        """
+        if l == self.layer + 1:
+            self.echoed.add(j)
+            self.check_echo()
+
+    def check_echo(self):
+        """
+        Send the ECHO of the node once all neighbors answered and all children echoed.
+        At the root, record the completion time instead.
+        """
+        if self.reported or self.waiting > 0 or not self.childs <= self.echoed:
+            return
+        self.reported = True
+        if self.id == ROOT:
+            self.sim.metrics.mark_completion(self.now)
+        else:
+            self.send(self.parent, MSG(MT.ECHO, self.layer, self.id))
+
+    def finish(self):
+        """
+        Keep the completion time recorded by the root, if the tree got final.
+        """
+        pass
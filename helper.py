@@ -1,80 +1,86 @@
-import json
-import time
 from source.DawnSimVis import Simulator
 
-# currently running simulation
-running_sim: Simulator = None
 
-# last time to send or receive a message | runnig time
-last_time = None
-
-# total message count in topology
-msg_count = 0
-
-
-
-def stop_sync_sim():
+def stop_sync_sim(sim: Simulator):
     """
-    Stops the running synchronous simulation and prints the result.
+    Marks the synchronous simulation as completed and ends its run.
 
-    This function stops the currently running synchronous simulation by calling the
-    `print_result` function to print the result of the simulation, resetting the
-    `msg_count` variable to 0, and deleting the `running_sim` object.
+    This function records the current simulation time as the completion time
+    in the `metrics` of the given simulator, then stops the simulator.
     """
-    print_result()
-    
-    # Reset the message count to 0
-    msg_count = 0
-    
-    # Delete the running simulation object
-    running_sim.__del__()
+    sim.metrics.mark_completion(sim.now)
+    sim.stop('sync BFS completed')
 
-def print_result():
+def print_result(sim: Simulator, check: dict = None):
     """
     Prints the result of the simulation to the console.
 
-    The result includes the simulation ID, the simulator name, the last time the simulation ran,
-    and the total number of messages sent.
+    The result includes the simulator name, the completion time of the algorithm,
+    and the total number of messages delivered, and the verification of the BFS
+    tree if check, a result of oracle.verify, is given.
     """
-    # Print the simulation ID
+    metrics = sim.metrics
+
+    # Print a separator
     print("------------------------------------------------")
     
     # Print the simulator name
-    print(f"Simulator Name: {running_sim.title}")
+    print(f"Simulator Name: {sim.title}")
     
-    # Print the last time the simulation ran
-    print(f"Last Time: {last_time}")
+    # Print the completion time of the algorithm
+    print(f"Last Time: {metrics.completion_time}")
     
-    # Print the total number of messages sent
-    print(f"Total Messages: {msg_count}")
+    # Print the total number of messages delivered
+    print(f"Total Messages: {metrics.msg_count}")
+
+    # Print the verification of the BFS tree
+    if check is not None:
+        print(f"BFS Tree: {'correct' if check['ok'] else 'WRONG'} | Rounds: {check['rounds']} "
+              f"| Diameter: >= {check['diameter_lb']}")
     
     # Print a separator
     print("------------------------------------------------")
-    
-    # Write the result to a file
-    write_result()
 
-def write_result():
+def save_bfs_tree(sim: Simulator, path: str, labels: bool = False) -> str:
     """
-    Writes the result of the simulation to a file.
+    Saves an image of the BFS tree of the simulation after its run.
 
-    The result includes the simulation title, the last time the simulation ran,
-    and the total number of messages sent.
+    Nodes are filled with a color by their layer, from red at the root to blue at the
+    last layer, and grey if they have no layer. Every node is linked to its parent.
+    No GUI is needed, so it works for headless simulators too.
 
-    The file is located at '/Users/opias/Desktop/a_sencron_bfs_algorithm/result.txt'.
+    Args:
+        sim (Simulator): Simulator after its run.
+        path (str): Image file, PNG if it ends with .png and SVG otherwise.
+        labels (bool): Write the node ids on the nodes (SVG only).
+
+    Returns:
+        str: The path written.
     """
-    while True:
-        try:
-            # Open the file in append mode
-            with open('output.txt', 'a+') as f:
-                # Write the result to the file
-                f.write(f"{running_sim.title}, {last_time}, {msg_count}\n")
-                # Close the file
-                f.close()
-                # Exit the loop
-                break
-        except:
-            # If an exception occurs, wait for 3 seconds and try again
-            time.sleep(3)
-            continue
-    
\ No newline at end of file
+    import colorsys
+    # oracle imports bfs_nodes, which imports this module
+    from oracle import node_state, positions_and_ranges
+    from topovis import Scene
+    from topovis.SvgPlotter import Plotter
+
+    positions, _ = positions_and_ranges(sim)
+    layers, parents = node_state(sim)
+    depth = max(int(layers.max()), 1)
+
+    scene = Scene()
+    plotter = Plotter(labels=labels)
+    scene.addPlotter(plotter)
+    scene.init(*sim.terrain_size)
+    scene.linestyle("prev", color=(0, .6, 0), arrow="tail", width=1)
+    for id, (x, y) in enumerate(positions.tolist()):
+        scene.node(id, x, y)
+        scene.nodehollow(id, False)
+        layer = int(layers[id])
+        if layer < 0:
+            scene.nodecolor(id, .6, .6, .6)
+        else:
+            scene.nodecolor(id, *colorsys.hsv_to_rgb(.66 * layer / depth, .8, .9))
+    for child, parent in enumerate(parents.tolist()):
+        if parent >= 0:
+            scene.addlink(parent, child, "prev")
+    return plotter.save(path)
@@ -1,5 +1,8 @@
-import uuid, time, random, helper
+import uuid, time, random, helper, oracle, results
+from concurrent.futures import ProcessPoolExecutor
 from source import DawnSimVis
+from source.profiling import HandlerProfiler
+from source.topology import SharedTopology
 from bfs_nodes import SyncBFSNode, AsyncBFSNode
 
 # Edge length of each cell.
@@ -8,26 +11,65 @@ CELL_EDGE_LEN = 60
 DURATION = 450
 # Seconds in real time for 1 second in simulation.
 TIMESCALE = 1
+# 'bounded' keeps visual simulators in real time and runs headless ones in virtual time.
+TIME_MODE = 'bounded'
 # padding around the grid
 PADDING = 50
+# check the BFS trees against the oracle after each run
+VERIFY = True
+# profile node handlers, print a report and write <algorithm>.prof for pstats
+PROFILE = False
+# record the scene of headless simulators to <algorithm>.trace, replay with: python -m topovis.TkPlotter <file>
+TRACE = False
 
-def create_simulator(title:str, cell_count :int, visual:bool) -> DawnSimVis.Simulator:
+def create_simulator(title:str, cell_count :int, visual:bool, kernel:str = None,
+                     trace:str = None) -> DawnSimVis.Simulator:
     dx = cell_count * CELL_EDGE_LEN + PADDING
     dy = cell_count * CELL_EDGE_LEN + PADDING
-    return DawnSimVis.Simulator(DURATION, TIMESCALE, 0, (dx, dy), visual, title)
+    return DawnSimVis.Simulator(DURATION, TIMESCALE, 0, (dx, dy), visual, title, TIME_MODE, kernel, trace)
 
 
-def create_networks(sims: list[DawnSimVis.Simulator],
-                    nodes: list[DawnSimVis.BaseNode], 
-                    cell_count:int, tx_range:int):
-
+def create_positions(cell_count:int) -> list[tuple[float, float]]:
+    positions = []
     for x in range(cell_count):
         for y in range(cell_count):
             px = PADDING + x * CELL_EDGE_LEN + random.uniform(-20, 20)
             py = PADDING + y * CELL_EDGE_LEN + random.uniform(-20, 20)
+            positions.append((px, py))
+    return positions
+
+
+def create_networks(sims: list[DawnSimVis.Simulator],
+                    nodes: list[DawnSimVis.BaseNode], 
+                    cell_count:int, tx_range:int):
+
+    positions = create_positions(cell_count)
+
+    for idx, sim in enumerate(sims):
+        sim.add_nodes(nodes[idx], positions, tx_range)
+
+
+def run_on_topology(spec:tuple, node_class:type, algorithm:str, title:str, visual:bool,
+                    iteration_id:str, cell_count:int, tx_range:int) -> dict:
+    """
+    Runs one algorithm on a shared topology (see source/topology.py) and returns its result record.
+    Headless simulators call it in worker processes, the visual one in the main process.
+    """
+    trace = f'{algorithm}.trace' if TRACE and not visual else None
+    with SharedTopology.attach(spec) as topology:
+        sim = create_simulator(title, cell_count, visual, trace=trace)
+        sim.add_shared_nodes(node_class, topology)
+        if PROFILE:
+            with HandlerProfiler().attach(sim) as profiler:
+                metrics = sim.run()
+            print(profiler.report(20))
+            profiler.dump(f'{algorithm}.prof')
+        else:
+            metrics = sim.run()
+        check = oracle.verify(sim) if VERIFY else None
+    helper.print_result(sim, check)
+    return results.make_record(metrics, iteration_id, algorithm, cell_count, tx_range, check=check)
 
-            for idx, sim in enumerate(sims):
-                sim.add_node(nodes[idx], pos=(px, py), tx_range = tx_range)
 
 if __name__ == '__main__':
 
@@ -39,16 +81,21 @@ if __name__ == '__main__':
 
     tx_range = 75
 
-    sync_sim_title = f'{cell_count}x{tx_range} {id} Synchronous BFS Simulator'
-    async_sim_title = f'{cell_count}x{tx_range} {id} Asynchronous BFS Simulator'
-
-    sync_sim = create_simulator(sync_sim_title, cell_count, True)
-    async_sim = create_simulator(async_sim_title, cell_count, False)
+    # (node class, algorithm, title, visual)
+    runs = [
+        (SyncBFSNode, 'sync', f'{cell_count}x{tx_range} {id} Synchronous BFS Simulator', True),
+        (AsyncBFSNode, 'async', f'{cell_count}x{tx_range} {id} Asynchronous BFS Simulator', False),
+    ]
 
-    simsulators = [sync_sim, async_sim]
-    
-    create_networks(simsulators, [SyncBFSNode, AsyncBFSNode], cell_count, tx_range)
+    # neighbors are found once, every simulator reads them from shared memory in its own process
+    with SharedTopology.create(create_positions(cell_count), tx_range) as topology, ProcessPoolExecutor() as pool:
+        # workers are started before the Tk window exists
+        futures = {algorithm: pool.submit(run_on_topology, topology.spec, node_class, algorithm, title, visual,
+                                          id, cell_count, tx_range)
+                   for node_class, algorithm, title, visual in runs if not visual}
+        records = {algorithm: run_on_topology(topology.spec, node_class, algorithm, title, visual,
+                                              id, cell_count, tx_range)
+                   for node_class, algorithm, title, visual in runs if visual}
+        records.update((algorithm, future.result()) for algorithm, future in futures.items())
 
-    for sim in simsulators:
-        helper.running_sim = sim
-        sim.run()
\ No newline at end of file
+    results.ResultStore().insert_many([records[algorithm] for _, algorithm, _, _ in runs])
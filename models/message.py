@@ -1,10 +1,14 @@
+from functools import lru_cache
 
 from models.message_types import MessageTypes
 
 class Message(object):
+    __slots__ = ('type', 'val', 'src')
+
     def __init__(self, type: MessageTypes, val, src):
         """
-        Initialize a Package object.
+        Initialize a Package object. Messages are shared between receivers
+        and must not be modified after they are sent.
 
         Args:
             type (MessageTypes): The type of the message.
@@ -19,3 +23,37 @@ class Message(object):
 
         # Assign the source of the message
         self.src = src
+
+    @property
+    def size(self):
+        """
+        Estimate the number of bytes the message takes on air.
+
+        Returns:
+            int: A 1 byte type and a 4 byte source id, plus 1 byte for a boolean
+            value or 4 bytes for any other value.
+        """
+        if self.val is None:
+            return 5
+        if isinstance(self.val, bool):
+            return 6
+        return 9
+
+
+# Upper bound of shared payload-less messages, one per (type, src) pair in use
+SIGNAL_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=SIGNAL_CACHE_SIZE)
+def signal(type: MessageTypes, src):
+    """
+    Get the shared instance of a payload-less message such as HEARTBEAT, ACK or REJECT.
+    The least recently used instances are dropped once SIGNAL_CACHE_SIZE are cached.
+
+    Args:
+        type (MessageTypes): The type of the message.
+        src: The source of the message.
+
+    Returns:
+        Message: A message without value, created on first use.
+    """
+    return Message(type, None, src)
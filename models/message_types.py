@@ -1,12 +1,15 @@
-from enum import Enum
+from enum import IntEnum
 
 """
-    Type of messages sent between nodes.
+    Type of messages sent between nodes. Int-coded, so messages stay small and
+    dispatch tables can hash them cheaply.
 """
-class MessageTypes(Enum):
-    HEARTBEAT = 'heartbeat'
-    LAYER = 'layer'
-    ACK = 'ack'
-    REJECT = 'reject'
-    ROUND = 'round'
-    UPCAST = 'upcast'
+class MessageTypes(IntEnum):
+    HEARTBEAT = 0
+    LAYER = 1
+    ACK = 2
+    REJECT = 3
+    ROUND = 4
+    UPCAST = 5
+    ECHO = 6
+    LEAVE = 7
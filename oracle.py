@@ -0,0 +1,154 @@
+"""Reference BFS for verifying the trees built by the BFS nodes.
+
+The oracle builds the unit-disk graph from node positions and transmission ranges,
+runs a frontier-based BFS from ROOT with NumPy and compares it with the layer and
+parent of every node after a run. It also gives a double-sweep estimate of the
+diameter and the optimal number of rounds, i.e. the eccentricity of ROOT.
+
+Usage: python3 oracle.py [cell_count] [tx_range]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from bfs_nodes import ROOT
+from source.adjacency import in_range_csr
+
+
+def bfs_layers(indptr: np.ndarray, indices: np.ndarray, root: int) -> np.ndarray:
+    """
+    Gives the BFS layer of every node, expanding one frontier per step.
+
+    Args:
+        indptr (np.ndarray): Row offsets of the graph in CSR form.
+        indices (np.ndarray): Neighbor ids of the graph in CSR form.
+        root (int): Node to start from.
+
+    Returns:
+        np.ndarray: Layer of every node, -1 for nodes not reachable from root.
+    """
+    layers = np.full(len(indptr) - 1, -1, np.int64)
+    layers[root] = 0
+    frontier = np.array([root])
+    depth = 0
+    while len(frontier):
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = counts.sum()
+        if not total:
+            break
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        neighbors = indices[np.repeat(starts, counts) + np.arange(total) - run_start]
+        frontier = np.unique(neighbors[layers[neighbors] < 0])
+        depth += 1
+        layers[frontier] = depth
+    return layers
+
+
+def node_state(sim):
+    """
+    Collects the layer and parent of every node of a simulator after a run.
+
+    Args:
+        sim (Simulator): Simulator whose nodes have layer and parent attributes.
+
+    Returns:
+        tuple: Layers and parents as np.ndarray, -1 where a node has none.
+    """
+    store = sim.node_store
+    if store is not None and 'layer' in store and 'parent' in store:
+        layers = store['layer'].astype(np.float64)
+        parents = store['parent'].astype(np.int64)
+    else:
+        layers = np.array([np.nan if n.layer is None else n.layer for n in sim.nodes], np.float64)
+        parents = np.array([-1 if n.parent is None else n.parent for n in sim.nodes], np.int64)
+    layers[~np.isfinite(layers)] = -1
+    return layers.astype(np.int64), parents
+
+
+def positions_and_ranges(sim):
+    """
+    Gives the positions and transmission ranges of all nodes of a simulator.
+    """
+    store = sim.node_store
+    if store is not None:
+        return store['pos'], store['tx_range']
+    return (np.array([n.pos for n in sim.nodes], np.float64).reshape(-1, 2),
+            np.array([n.tx_range for n in sim.nodes], np.float64))
+
+
+def verify(sim, root: int = ROOT) -> dict:
+    """
+    Checks the BFS tree built by the nodes of a simulator against the reference BFS.
+
+    Args:
+        sim (Simulator): Simulator after its run.
+        root (int): Root of the BFS.
+
+    Returns:
+        dict: Per-run verification result:
+            - nodes, reachable: number of nodes and of nodes reachable from root.
+            - layer_errors: reachable nodes whose layer is not their BFS layer.
+            - parent_errors: nodes whose parent is not an in-range node one layer above them.
+            - reach_errors: nodes with a layer although they are unreachable, or without one although reachable.
+            - rounds: optimal number of rounds, the eccentricity of root.
+            - diameter_lb: double-sweep lower bound of the diameter of the component of root.
+            - ok: True if there is no error.
+            - oracle_time: seconds the verification took.
+    """
+    start = time.perf_counter()
+    positions, tx_ranges = positions_and_ranges(sim)
+    n = len(tx_ranges)
+    indptr, indices, _ = in_range_csr(positions, tx_ranges, by_distance=False)
+    expected = bfs_layers(indptr, indices, root)
+    layers, parents = node_state(sim)
+
+    reachable = expected >= 0
+    reach_errors = int(np.count_nonzero(reachable != (layers >= 0)))
+    layer_errors = int(np.count_nonzero(reachable & (layers != expected)))
+
+    # a parent is valid if the child is in its range and it is one layer above the child
+    child = np.flatnonzero(parents >= 0)
+    parent = parents[child]
+    edges = np.sort(np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr)) * n + indices)
+    keys = parent * n + child
+    found = np.searchsorted(edges, keys)
+    in_range = (found < len(edges)) & (edges[np.minimum(found, len(edges) - 1)] == keys)
+    one_above = expected[parent] == expected[child] - 1
+    orphans = reachable & (parents < 0)
+    orphans[root] = False
+    parent_errors = int(np.count_nonzero(~(in_range & one_above))) + int(np.count_nonzero(orphans))
+
+    rounds = int(expected.max())
+    far = int(np.argmax(expected))
+    diameter_lb = max(rounds, int(bfs_layers(indptr, indices, far).max()))
+    return {
+        'nodes': n,
+        'reachable': int(np.count_nonzero(reachable)),
+        'layer_errors': layer_errors,
+        'parent_errors': parent_errors,
+        'reach_errors': reach_errors,
+        'rounds': rounds,
+        'diameter_lb': diameter_lb,
+        'ok': layer_errors == 0 and parent_errors == 0 and reach_errors == 0,
+        'oracle_time': time.perf_counter() - start,
+    }
+
+
+if __name__ == '__main__':
+    import random
+    import main
+    from bfs_nodes import SyncBFSNode, AsyncBFSNode
+
+    cell_count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    tx_range = int(sys.argv[2]) if len(sys.argv) > 2 else 75
+    for node_class in (SyncBFSNode, AsyncBFSNode):
+        random.seed(0)
+        sim = main.create_simulator(node_class.__name__, cell_count, False, 'heap')
+        main.create_networks([sim], [node_class], cell_count, tx_range)
+        for node in sim.nodes:
+            node.logging = False
+        sim.run()
+        print(node_class.__name__, verify(sim))
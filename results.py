@@ -0,0 +1,198 @@
+"""SQLite results store for BFS simulation runs.
+
+The database runs in WAL mode, so readers never block the writer and many worker
+processes can append batches concurrently; SQLite's busy timeout queues writers
+instead of sleep-and-retry loops.
+
+Usage: python3 results.py import output.txt   (migrates a legacy text result file)
+"""
+
+import sqlite3
+import sys
+import time
+import uuid
+
+DEFAULT_PATH = 'results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY,
+    run_id       TEXT    NOT NULL UNIQUE,
+    iteration    TEXT    NOT NULL,
+    algorithm    TEXT    NOT NULL,
+    cell_count   INTEGER NOT NULL,
+    tx_range     REAL    NOT NULL,
+    seed         INTEGER,
+    sim_time     REAL,
+    end_time     REAL,
+    msg_count    INTEGER NOT NULL,
+    bytes_on_air INTEGER,
+    wall_time    REAL,
+    created_at   REAL    NOT NULL,
+    verified     INTEGER,
+    bfs_errors   INTEGER,
+    rounds       INTEGER,
+    diameter_lb  INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (cell_count, tx_range, algorithm);
+CREATE TABLE IF NOT EXISTS messages (
+    run      INTEGER NOT NULL REFERENCES runs (id),
+    type     TEXT    NOT NULL,
+    received INTEGER NOT NULL,
+    sent     INTEGER NOT NULL,
+    PRIMARY KEY (run, type)
+) WITHOUT ROWID;
+"""
+
+RUN_COLUMNS = ('run_id', 'iteration', 'algorithm', 'cell_count', 'tx_range', 'seed', 'sim_time',
+               'end_time', 'msg_count', 'bytes_on_air', 'wall_time', 'created_at',
+               'verified', 'bfs_errors', 'rounds', 'diameter_lb')
+
+
+def make_record(metrics, iteration: str, algorithm: str, cell_count: int, tx_range: float,
+                seed: int = None, check: dict = None) -> dict:
+    """
+    Builds a result record of one run from its metrics.
+
+    Args:
+        metrics (Metrics): Measurements returned by Simulator.run().
+        iteration (str): Id shared by the runs of one iteration.
+        algorithm (str): Algorithm name, e.g. 'sync' or 'async'.
+        cell_count (int): Number of grid cells on each side.
+        tx_range (float): Transmission range of nodes.
+        seed (int): Seed of the run, if known.
+        check (dict): Result of oracle.verify for the run, if it was verified.
+
+    Returns:
+        dict: Record accepted by ResultStore.insert_many.
+    """
+    data = metrics.as_dict()
+    if check is not None:
+        check = {
+            'verified': int(check['ok']),
+            'bfs_errors': check['layer_errors'] + check['parent_errors'] + check['reach_errors'],
+            'rounds': check['rounds'],
+            'diameter_lb': check['diameter_lb'],
+        }
+    return {
+        'run_id': uuid.uuid4().hex,
+        'iteration': iteration,
+        'algorithm': algorithm,
+        'cell_count': cell_count,
+        'tx_range': tx_range,
+        'seed': seed,
+        'sim_time': data['completion_time'],
+        'end_time': data['end_time'],
+        'msg_count': data['msg_count'],
+        'received': data['received'],
+        'sent': data['sent'],
+        'bytes_on_air': data['bytes_on_air'],
+        'wall_time': data['wall_time'],
+        **(check or {}),
+    }
+
+
+class ResultStore:
+    """
+    Append-optimised store of run results, backed by an SQLite database in WAL mode.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, timeout: float = 60.0):
+        """
+        Opens (and creates if needed) the database at path.
+
+        Args:
+            path (str): Database file.
+            timeout (float): Seconds a writer waits for the write lock before failing.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def insert_many(self, records) -> int:
+        """
+        Appends a batch of records in a single transaction.
+
+        Args:
+            records (Iterable of dict): Records as built by make_record.
+
+        Returns:
+            int: Number of records inserted.
+        """
+        now = time.time()
+        count = 0
+        cur = self.conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        try:
+            for record in records:
+                row = dict(record, created_at=record.get('created_at', now))
+                cur.execute(f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+                            [row.get(c) for c in RUN_COLUMNS])
+                run = cur.lastrowid
+                received = row.get('received') or {}
+                sent = row.get('sent') or {}
+                cur.executemany('INSERT INTO messages (run, type, received, sent) VALUES (?, ?, ?, ?)',
+                                [(run, t, received.get(t, 0), sent.get(t, 0))
+                                 for t in sorted(set(received) | set(sent))])
+                count += 1
+            cur.execute('COMMIT')
+        except BaseException:
+            cur.execute('ROLLBACK')
+            raise
+        return count
+
+    def message_counts(self, run: int) -> dict:
+        """
+        Gives received and sent message counts of a run by message type.
+
+        Args:
+            run (int): Database id of the run.
+
+        Returns:
+            dict: {type: (received, sent)}
+        """
+        return {t: (r, s) for t, r, s in self.conn.execute(
+            'SELECT type, received, sent FROM messages WHERE run = ?', (run,))}
+
+    def close(self):
+        self.conn.close()
+
+    def import_text(self, path: str) -> int:
+        """
+        Imports a legacy output.txt written by earlier versions of helper.write_result.
+        Its lines look like '16x75 1a2b3c4d Synchronous BFS Simulator, 118.0, 1582'.
+
+        Args:
+            path (str): Text file to import.
+
+        Returns:
+            int: Number of records imported.
+        """
+        algorithms = {'Synchronous': 'sync', 'Asynchronous': 'async'}
+        records = []
+        with open(path) as f:
+            for line in f:
+                title, sim_time, msg_count = [part.strip() for part in line.rsplit(',', 2)]
+                test_id, iteration, bfs_type = title.split(' ')[:3]
+                cell_count, tx_range = test_id.split('x')
+                records.append({
+                    'run_id': uuid.uuid4().hex,
+                    'iteration': iteration,
+                    'algorithm': algorithms.get(bfs_type, bfs_type),
+                    'cell_count': int(cell_count),
+                    'tx_range': float(tx_range),
+                    'sim_time': None if sim_time == 'None' else float(sim_time),
+                    'msg_count': int(msg_count),
+                })
+        return self.insert_many(records)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == 'import':
+        store = ResultStore()
+        print(f"Imported {store.import_text(sys.argv[2])} runs into {store.path}")
+    else:
+        print(__doc__)
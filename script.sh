@@ -1,21 +1,5 @@
 #!/bin/bash
 
-run_sims() {
-    /usr/local/bin/python3 /Users/opias/Desktop/a_sencron_bfs_algorithm/codes/main.py
-}
-
-
-index=1
-
-while [ $index -le 10 ]; do
-
-osascript <<EOF
-  tell application "Terminal"
-      do script "$(declare -f run_sims); run_sims"
-  end tell
-EOF
-
-  sleep 1
-
-  index=$(( $index + 1 ))
-done
+# 10 iterations of the 16x75 grid, both algorithms, one process per core.
+cd "$(dirname "$0")"
+python3 sweep.py --cells 16 --ranges 75 --algorithms sync async --iterations 10 "$@"
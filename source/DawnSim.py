@@ -3,19 +3,34 @@ Based on wsnsimpy library.
 Author: Mustafa Tosun
 """
 
-import bisect
 import inspect
 import random
+from operator import attrgetter, itemgetter
 import simpy
+import simpy.rt
 from simpy.util import start_delayed
 from source import config
-
-import helper
+from source.adjacency import Adjacency, distance, find_neighbor
+from source.kernel import HeapEnvironment
+from source.metrics import Metrics
+from source.nodestore import NodeStore
 
 BROADCAST_ADDR = config.BROADCAST_ADDR
 """double: Keeps broadcast address.
 """
 
+TIME_MODES = ('realtime', 'virtual', 'bounded')
+"""Tuple of string: Supported time modes of Simulator.
+"""
+
+KERNELS = ('simpy', 'heap')
+"""Tuple of string: Supported event kernels of Simulator.
+"""
+
+NO_TIMERS = frozenset()
+"""frozenset: Pending timers of a StoredNode without any, no set is kept for it.
+"""
+
 
 ###########################################################
 def ensure_generator(env, func, *args, **kwargs):
@@ -34,60 +49,93 @@ def ensure_generator(env, func, *args, **kwargs):
 
 
 ###########################################################
-def distance(pos1, pos2):
-    """Calculates the distance between two positions.
+def handles(type, *fields):
+    """Registers a node method as the handler of a package type. BaseNode.on_receive finds it
+    in the dispatch table of the node class.
 
        Args:
-           pos1 (Tuple(double,double)): First position.
-           pos2 (Tuple(double,double)): Second position.
+           type (object): Package type, compared with the 'type' attribute of packages.
+           *fields (string): Package attributes passed to the handler. If none are given,
+            the handler gets the package itself.
 
        Returns:
-           double: returns the distance between two positions.
+           Function: Decorator keeping the method unchanged.
     """
-    return ((pos1[0] - pos2[0]) ** 2 + (pos1[1] - pos2[1]) ** 2) ** 0.5
+    def decorator(func):
+        func._handles = getattr(func, '_handles', ()) + ((type, fields),)
+        return func
+
+    return decorator
 
 
 ###########################################################
-class BaseNode:
-    """Class to model a network node with basic operations. It's base class for more complex node classes.
+def _dispatcher(func, fields):
+    """Creates a dispatch table entry calling func with the given package fields.
+    """
+    if not fields:
+        return func
+    get = attrgetter(*fields)
+    if len(fields) == 1:
+        return lambda node, pck: func(node, get(pck))
+    return lambda node, pck: func(node, *get(pck))
+
+
+###########################################################
+def broadcast_process(sim, deliveries, *args):
+    """
+    Delivers a broadcast to all receivers from a single simpy process.
+    Deliveries is a list of (delay, callback) pairs sorted by delay.
+    Deliveries left when the simulator is stopped are dropped.
+    """
+    env = sim.env
+    elapsed = 0
+    for delay, func in deliveries:
+        if delay > elapsed:
+            yield env.timeout(delay - elapsed)
+            elapsed = delay
+        if sim.stopped:
+            return
+        func(*args)
+
+
+###########################################################
+class Node:
+    """Class with the operations of a network node. It keeps no state itself: BaseNode keeps node attributes
+    in the instance, StoredNode in the NodeStore of the simulator.
 
        Attributes:
-           pos (Tuple(double,double)): Position of node.
-           tx_range (double): Transmission range of node.
-           sim (Simulator): Simulation environment of node.
-           id (int): Global unique ID of node.
-           timers (List of Timer): Keeps timers set by node
-           is_sleeping (bool): If it is True, It means node is sleeping and can not receive messages.
-           Otherwise, node is awaken.
-           logging (bool): It is a flag for logging. If it is True, nodes outputs can be seen in terminal.
-           neighbor_distance_list (List of Tuple(double,Node)): Sorted list of nodes distances to other nodes.
-            Each Tuple keeps a distance and a node id.
-           timeout (Function): timeout function
+           dispatch (Dict): Class level table of package type to handler, see handles().
 
     """
 
+    __slots__ = ()
+    dispatch = {}
+
     ############################
-    def __init__(self, sim, id, pos, tx_range):
-        """Constructor for base Node class.
+    def __init_subclass__(cls, **kwargs):
+        """Builds the dispatch table of a node class from the methods registered with handles().
+        Handlers are resolved by name, so overriding a registered method keeps it registered.
+        """
+        super().__init_subclass__(**kwargs)
+        cls.rebuild_dispatch()
+
+    ############################
+    @classmethod
+    def rebuild_dispatch(cls):
+        """Builds the dispatch table of the class again, e.g. after its handlers were replaced.
 
            Args:
-               sim (Simulator): Simulation environment of node.
-               id (int): Global unique ID of node.
-               pos (Tuple(double,double)): Position of node.
-               tx_range (double): Transmission range of node.
 
            Returns:
-               Node: Created node object.
+
         """
-        self.pos = pos
-        self.tx_range = tx_range
-        self.sim = sim
-        self.id = id
-        self.timers = []
-        self.is_sleeping = False
-        self.logging = True
-        self.neighbor_distance_list = []
-        self.timeout = self.sim.timeout
+        registered = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                for (type, fields) in getattr(attr, '_handles', ()):
+                    registered[type] = (name, fields)
+        cls.dispatch = {type: _dispatcher(getattr(cls, name), fields)
+                        for type, (name, fields) in registered.items()}
 
     ############################
     def __repr__(self):
@@ -127,6 +175,21 @@ class BaseNode:
         """
         return self.sim.env.now
 
+    ############################
+    @property
+    def neighbor_distance_list(self):
+        """Property for in-range neighbors of node. It is built on each access, iterate
+        sim.adjacency.row() directly in hot paths.
+
+           Args:
+
+           Returns:
+               List of Tuple(double,Node): Neighbors within tx_range sorted by distance.
+        """
+        lo, hi, indices, dists, _ = self.sim.adjacency.row(self.id)
+        nodes = self.sim.nodes
+        return [(dists[k], nodes[indices[k]]) for k in range(lo, hi)]
+
     ############################
     def log(self, msg):
         """Writes outputs of node to terminal.
@@ -141,7 +204,8 @@ class BaseNode:
 
     ############################
     def send(self, dest, pck):
-        """Sends given package. If dest address is broadcast address, it sends the package to all neighbors.
+        """Sends given package. If dest address is broadcast address, it sends the package to all neighbors
+        as a single scheduled broadcast.
 
            Args:
                 pck (Dict): Package to be sent. It should contain 'dest' which is destination address.
@@ -149,22 +213,36 @@ class BaseNode:
            Returns:
 
         """
-        for (dist, node) in self.neighbor_distance_list:
-            if dist <= self.tx_range:
-                if dest == BROADCAST_ADDR or dest == node.id:
-                    if config.SIM_MESSAGGING_DELAY_TYPE == 'prop':
-                        prop_time = dist / 3000000
-                    elif config.SIM_MESSAGGING_DELAY_TYPE == 'random':
-                        prop_time = random.random()
-                    else:
-                        prop_time = config.SIM_MESSAGGING_CONSTANT_DELAY
-                    self.delayed_exec(prop_time, node.on_receive_check, pck)
+        self.sim.metrics.on_send(self, pck)
+        lo, hi, indices, _, delays = self.sim.adjacency.row(self.id)
+        nodes = self.sim.nodes
+        delay_type = config.SIM_MESSAGGING_DELAY_TYPE
+        if dest == BROADCAST_ADDR:
+            if delay_type == 'prop':
+                # rows are sorted by distance, so are the delays
+                deliveries = [(delays[k], nodes[indices[k]].on_receive_check) for k in range(lo, hi)]
+            elif delay_type == 'random':
+                deliveries = [(random.random(), nodes[indices[k]].on_receive_check) for k in range(lo, hi)]
+                deliveries.sort(key=itemgetter(0))
             else:
-                break
+                deliveries = [(config.SIM_MESSAGGING_CONSTANT_DELAY, nodes[indices[k]].on_receive_check)
+                              for k in range(lo, hi)]
+            self.sim.broadcast_exec(deliveries, pck)
+            return
+        k = find_neighbor(indices, lo, hi, dest)
+        if k is None:
+            return
+        if delay_type == 'prop':
+            prop_time = delays[k]
+        elif delay_type == 'random':
+            prop_time = random.random()
+        else:
+            prop_time = config.SIM_MESSAGGING_CONSTANT_DELAY
+        self.delayed_exec(prop_time, nodes[dest].on_receive_check, pck)
 
     ############################
     def set_timer(self, delay, callback, *args, **kwargs):
-        """Sets a timer with a given name. It appends name of timer to the active timer list.
+        """Sets a timer. It stays in the pending timer set of node until it fires or is killed.
 
            Args:
                 delay (double): Duration of timer.
@@ -175,9 +253,7 @@ class BaseNode:
                timer: A Timer object
 
         """
-        timer = Timer(self.sim.env, delay, callback, *args, **kwargs)
-        self.timers.append(timer)
-        return timer
+        return Timer(self.sim.timer_service, self, delay, callback, *args, **kwargs)
 
     ############################
     def kill_all_timers(self):
@@ -189,7 +265,7 @@ class BaseNode:
 
 
         """
-        for timer in self.timers:
+        for timer in list(self.timers):
             timer.kill()
 
     ############################
@@ -264,14 +340,19 @@ class BaseNode:
 
     ############################
     def on_receive(self, pck):
-        """It is executed when node receives a package. It should be overridden if needed.
+        """It is executed when node receives a package. It calls the handler registered for the
+        type of the package with handles(). It can be overridden if needed.
 
            Args:
                 pck (Dict): Package received
            Returns:
 
         """
-        pass
+        handler = self.dispatch.get(getattr(pck, 'type', None))
+        if handler is not None:
+            handler(self, pck)
+        elif self.dispatch:
+            self.log(f"Unknown message type: {getattr(pck, 'type', None)}")
 
     ############################
     def on_receive_check(self, pck):
@@ -284,6 +365,7 @@ class BaseNode:
 
         """
         if not self.is_sleeping:
+            self.sim.metrics.on_receive(self, pck, self.now)
             self.on_receive(pck)
 
     ############################
@@ -320,63 +402,302 @@ class BaseNode:
         pass
 
 
+###########################################################
+class BaseNode(Node):
+    """Class to model a network node with basic operations. It's base class for more complex node classes.
+
+       Attributes:
+           pos (Tuple(double,double)): Position of node.
+           tx_range (double): Transmission range of node.
+           sim (Simulator): Simulation environment of node.
+           id (int): Global unique ID of node.
+           timers (Set of Timer): Keeps node's pending timers. Timers leave it when they fire or are killed.
+           is_sleeping (bool): If it is True, It means node is sleeping and can not receive messages.
+           Otherwise, node is awaken.
+           logging (bool): It is a flag for logging. If it is True, nodes outputs can be seen in terminal.
+           timeout (Function): timeout function
+
+    """
+
+    ############################
+    def __init__(self, sim, id, pos, tx_range):
+        """Constructor for base Node class.
+
+           Args:
+               sim (Simulator): Simulation environment of node.
+               id (int): Global unique ID of node.
+               pos (Tuple(double,double)): Position of node.
+               tx_range (double): Transmission range of node.
+
+           Returns:
+               Node: Created node object.
+        """
+        self.pos = pos
+        self.tx_range = tx_range
+        self.sim = sim
+        self.id = id
+        self.timers = set()
+        self.is_sleeping = False
+        self.logging = True
+        self.timeout = self.sim.timeout
+
+    ############################
+    def _add_timer(self, timer):
+        self.timers.add(timer)
+
+    ############################
+    def _discard_timer(self, timer):
+        self.timers.discard(timer)
+
+
+###########################################################
+class StoredNode(Node):
+    """Class to model a lightweight network node whose attributes live in the NodeStore of the simulator.
+    Its instances only keep sim and id, subclasses should declare __slots__ = () and keep their own
+    state in StoreField attributes to stay that small.
+
+       Attributes:
+           sim (Simulator): Simulation environment of node.
+           id (int): Global unique ID of node, also its row in sim.node_store.
+           pos (Tuple(double,double)): Position of node, stored in column 'pos'.
+           tx_range (double): Transmission range of node, stored in column 'tx_range'.
+           is_sleeping (bool): Sleeping flag, stored in column 'sleeping'.
+           timers (Set of Timer): Node's pending timers, kept in sim.node_store.timers only while there are any.
+           logging (bool): Logging flag shared by all stored nodes, see NodeStore.logging.
+           timeout (Function): timeout function
+
+    """
+
+    __slots__ = ('sim', 'id', 'target_pos', 'speed')
+
+    ############################
+    def __init__(self, sim, id, pos=None, tx_range=None):
+        """Constructor for StoredNode class. The row of the node must exist in sim.node_store.
+
+           Args:
+               sim (Simulator): Simulation environment of node.
+               id (int): Global unique ID of node.
+               pos (Tuple(double,double)): Position of node, if it is not stored yet.
+               tx_range (double): Transmission range of node, if it is not stored yet.
+
+           Returns:
+               StoredNode: Created node object.
+        """
+        self.sim = sim
+        self.id = id
+        if pos is not None:
+            self.pos = pos
+        if tx_range is not None:
+            self.tx_range = tx_range
+
+    ############################
+    @property
+    def pos(self):
+        x, y = self.sim.node_store.columns['pos'][self.id].tolist()
+        return x, y
+
+    @pos.setter
+    def pos(self, pos):
+        self.sim.node_store.columns['pos'][self.id] = pos
+
+    ############################
+    @property
+    def tx_range(self):
+        return self.sim.node_store.columns['tx_range'][self.id].item()
+
+    @tx_range.setter
+    def tx_range(self, tx_range):
+        self.sim.node_store.columns['tx_range'][self.id] = tx_range
+
+    ############################
+    @property
+    def is_sleeping(self):
+        return self.sim.node_store.columns['sleeping'][self.id].item()
+
+    @is_sleeping.setter
+    def is_sleeping(self, is_sleeping):
+        self.sim.node_store.columns['sleeping'][self.id] = is_sleeping
+
+    ############################
+    @property
+    def timers(self):
+        return self.sim.node_store.timers.get(self.id, NO_TIMERS)
+
+    ############################
+    def _add_timer(self, timer):
+        # the set is created with the first timer, nodes without timers keep none
+        self.sim.node_store.timers.setdefault(self.id, set()).add(timer)
+
+    ############################
+    def _discard_timer(self, timer):
+        timers = self.sim.node_store.timers
+        pending = timers.get(self.id)
+        if pending is not None:
+            pending.discard(timer)
+            if not pending:
+                del timers[self.id]
+
+    ############################
+    @property
+    def logging(self):
+        return self.sim.node_store.logging
+
+    ############################
+    @property
+    def timeout(self):
+        return self.sim.timeout
+
+    ############################
+    def kill_all_timers(self):
+        """Kills node's all timers.
+
+           Args:
+
+           Returns:
+
+
+        """
+        for timer in list(self.sim.node_store.timers.get(self.id, ())):
+            timer.kill()
+        self.sim.node_store.timers.pop(self.id, None)
+
+
 ###########################################################
 class Timer(object):
     """
-    Class to model timers.
+    Class to model timers. Timers are scheduled by the TimerService of the simulator.
     """
 
-    def __init__(self, env, delay, callback, *args, **kwargs):
-        self.env = env
+    def __init__(self, service, owner, delay, callback, *args, **kwargs):
+        self.service = service
+        self.owner = owner
         self.delay = delay
-        self.action = None
         self.callback = callback
         self.args = args
         self.kwargs = kwargs
         self.canceled = False
+        self.active = False
+        self.generation = 0
         self.set()
 
-    def run(self):
-        """
-        Calls a callback after time has elapsed.
-        """
-        try:
-            yield self.env.timeout(self.delay)
-            self.callback(*self.args, **self.kwargs)
-        except simpy.Interrupt as i:
-            self.canceled = True
-
     def set(self):
         """
         Starts the timer
         """
-        if not self.action:
-            self.action = self.env.process(self.run())
+        if not self.active:
+            self.service.start(self)
 
     def kill(self):
         """
         Kills the timer
         """
-        if self.action:
-            self.action.interrupt()
-            self.action = None
+        if self.active:
+            self.service.cancel(self)
 
     def reset(self):
         """
-        Interrupts the current timer and restarts.
+        Kills the current timer and restarts.
         """
         self.kill()
         self.set()
 
 
+###########################################################
+class TimerService(object):
+    """
+    Class to schedule timers of a simulator. Setting a timer pushes one event into the kernel,
+    killing it only bumps the timer's generation so its event expires silently. Such events are
+    counted as dead, so they do not keep the simulation from going quiet. With the heap kernel,
+    dead events are purged once they outnumber the live ones.
+    """
+
+    PURGE_THRESHOLD = 1024
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.pending = 0
+        self.dead = 0
+        # the heap kernel keeps the count itself, so its run ends when only dead events are left
+        self._counter = sim.env if sim.kernel == 'heap' else self
+        self._expire_cb = self._expire
+
+    @property
+    def stale(self):
+        """
+        Number of queued events of killed timers.
+        """
+        return self._counter.dead
+
+    def start(self, timer):
+        """
+        Schedules a timer and adds it to its owner's pending timers.
+        """
+        timer.generation += 1
+        timer.active = True
+        timer.canceled = False
+        timer.owner._add_timer(timer)
+        self.pending += 1
+        env = self.sim.env
+        if self.sim.kernel == 'heap':
+            env.schedule(timer.delay, self._expire_cb, timer, timer.generation)
+        else:
+            event = env.timeout(timer.delay)
+            event.callbacks.append(lambda _, generation=timer.generation: self._expire(timer, generation))
+
+    def cancel(self, timer):
+        """
+        Cancels a pending timer.
+        """
+        timer.generation += 1
+        timer.active = False
+        timer.canceled = True
+        timer.owner._discard_timer(timer)
+        self.pending -= 1
+        counter = self._counter
+        counter.dead += 1
+        if (self.sim.kernel == 'heap' and counter.dead > self.PURGE_THRESHOLD
+                and counter.dead > self.pending):
+            expire = self._expire_cb
+            counter.dead -= self.sim.env.purge(
+                lambda callback, args: callback is expire and args[1] != args[0].generation)
+
+    def clear(self):
+        """
+        Forgets all timer events when the run is stopped: timers are killed and their events never run.
+        """
+        self.pending = 0
+        self.dead = 0
+        if self.sim.kernel == 'heap':
+            self.sim.env.dead = 0
+
+    def _expire(self, timer, generation):
+        """
+        Fires a timer unless it was killed or reset after this event was scheduled.
+        """
+        if generation != timer.generation:
+            self._counter.dead -= 1
+            return
+        timer.active = False
+        timer.owner._discard_timer(timer)
+        self.pending -= 1
+        timer.callback(*timer.args, **timer.kwargs)
+
+
 ###########################################################
 class Simulator:
     """Class to model a network.
 
        Attributes:
-           env (simpy.rt.RealtimeEnvironment): Environment object in simpy
+           env (simpy.Environment or HeapEnvironment): Event kernel. With the simpy kernel it is a
+            simpy.rt.RealtimeEnvironment when the simulation is throttled to wall-clock time.
+           kernel (string): Event kernel, 'simpy' or 'heap'.
            timescale (double): Seconds in real time for 1 second in simulation. It arranges speed of simulation
+           time_mode (string): Resolved time mode, 'realtime' or 'virtual'.
            nodes (List of Node): Nodes in network.
+           node_store (NodeStore): Attributes of StoredNode nodes, None until the first one is added.
+           adjacency (Adjacency): In-range neighbors of nodes.
+           timer_service (TimerService): Schedules timers of nodes.
+           metrics (Metrics): Measurements of the run.
            duration (double): Duration of simulation.
            random (Random): Random object to use.
            timeout (Function): Timeout Function.
@@ -384,19 +705,47 @@ class Simulator:
     """
 
     ############################
-    def __init__(self, duration, timescale=1, seed=0):
+    def __init__(self, duration, timescale=1, seed=0, time_mode=None, kernel=None):
         """Constructor for Simulator class.
 
            Args:
                until (double): Duration of simulation.
                timescale (double): Seconds in real time for 1 second in simulation. It arranges speed of simulation
                seed (double): seed for Random bbject.
+               time_mode (string): 'realtime' throttles the simulation to wall-clock time, 'virtual' runs it
+                as fast as possible and 'bounded' throttles only when a visualiser is attached.
+                Defaults to config.SIM_TIME_MODE.
+               kernel (string): 'simpy' runs callbacks as simpy processes, 'heap' keeps plain callbacks
+                in a heap (see source.kernel). Defaults to config.SIM_KERNEL.
 
            Returns:
                Simulator: Created Simulator object.
         """
-        self.env = simpy.rt.RealtimeEnvironment(factor=timescale, strict=False)
+        if time_mode is None:
+            time_mode = config.SIM_TIME_MODE
+        if time_mode not in TIME_MODES:
+            raise ValueError(f"Unknown time mode: {time_mode}")
+        if time_mode == 'bounded':
+            # a headless simulator has nothing to keep pace with
+            time_mode = 'virtual'
+        if kernel is None:
+            kernel = config.SIM_KERNEL
+        if kernel not in KERNELS:
+            raise ValueError(f"Unknown kernel: {kernel}")
+        self.time_mode = time_mode
+        self.kernel = kernel
+        if kernel == 'heap':
+            self.env = HeapEnvironment(factor=timescale if time_mode == 'realtime' else None)
+        elif time_mode == 'realtime':
+            self.env = simpy.rt.RealtimeEnvironment(factor=timescale, strict=False)
+        else:
+            self.env = simpy.Environment()
         self.nodes = []
+        self.node_store = None
+        self.adjacency = Adjacency()
+        self.timer_service = TimerService(self)
+        self.metrics = Metrics()
+        self._stop_request = None
         self.duration = duration
         self.timescale = timescale
         self.random = random.Random(seed)
@@ -414,6 +763,18 @@ class Simulator:
         """
         return self.env.now
 
+    ############################
+    @property
+    def stopped(self):
+        """Property for whether stop() ended the run.
+
+           Args:
+
+           Returns:
+               bool: True once stop() was called.
+        """
+        return self.metrics.stop_time is not None
+
     ############################
     def delayed_exec(self, delay, func, *args, **kwargs):
         """Executes a function with given parameters after a given delay.
@@ -426,8 +787,27 @@ class Simulator:
            Returns:
 
         """
-        func = ensure_generator(self.env, func, *args, **kwargs)
-        start_delayed(self.env, func, delay=delay)
+        if self.kernel == 'heap':
+            self.env.schedule(delay, func, *args, **kwargs)
+        else:
+            func = ensure_generator(self.env, func, *args, **kwargs)
+            start_delayed(self.env, func, delay=delay)
+
+    ############################
+    def broadcast_exec(self, deliveries, *args):
+        """Executes each function of a broadcast with given parameters after its delay.
+        The whole broadcast takes a single entry in the event queue.
+
+           Args:
+                deliveries (List of Tuple(double,Function)): Delays and functions to execute, sorted by delay.
+                *args (double): Function args.
+           Returns:
+
+        """
+        if self.kernel == 'heap':
+            self.env.schedule_fanout(deliveries, *args)
+        elif deliveries:
+            self.env.process(broadcast_process(self, deliveries, *args))
 
     ############################
     def add_node(self, node_class, pos, tx_range):
@@ -440,69 +820,186 @@ class Simulator:
                 nodeclass object: Created nodeclass object
         """
         id = len(self.nodes)
+        if issubclass(node_class, StoredNode):
+            self._store_for(node_class).extend([pos], tx_range)
+        elif self.node_store is not None:
+            raise ValueError("BaseNode nodes can not be added to a network of StoredNode nodes")
         node = node_class(self, id, pos, tx_range)
         self.nodes.append(node)
         self.update_neighbor_list(id)
         return node
 
+    ############################
+    def add_nodes(self, node_class, positions, tx_range):
+        """Adds many nodes in to network and builds their neighbor lists in one pass.
+
+           Args:
+                node_class (Class): Node class inherited from Node.
+                positions (List of Tuple(double,double)): Positions of nodes. For StoredNode classes it
+                 can also be an array of shape (n, 2).
+                tx_range (double or List of double): Transmission range of all nodes, or one per node.
+           Returns:
+                List of nodeclass object: Created nodeclass objects
+        """
+        first = len(self.nodes)
+        if issubclass(node_class, StoredNode):
+            store = self._store_for(node_class)
+            self.nodes.extend(node_class(self, id) for id in store.extend(positions, tx_range))
+            self.adjacency.build(self.nodes, store['pos'], store['tx_range'])
+            return self.nodes[first:]
+        if self.node_store is not None:
+            raise ValueError("BaseNode nodes can not be added to a network of StoredNode nodes")
+        if isinstance(tx_range, (int, float)):
+            tx_range = [tx_range] * len(positions)
+        for pos, r in zip(positions, tx_range):
+            self.nodes.append(node_class(self, len(self.nodes), pos, r))
+        self.adjacency.build(self.nodes)
+        return self.nodes[first:]
+
+    ############################
+    def add_shared_nodes(self, node_class, topology):
+        """Adds a node for every node of a SharedTopology and reads neighbor rows from its shared block
+        instead of building them, so simulators of one topology share a single neighbor table.
+
+           Args:
+                node_class (Class): Node class inherited from Node.
+                topology (SharedTopology): Topology created in this or another process.
+           Returns:
+                List of nodeclass object: Created nodeclass objects
+        """
+        if self.nodes:
+            raise ValueError("A shared topology can only be added to an empty network")
+        if issubclass(node_class, StoredNode):
+            store = self._store_for(node_class)
+            self.nodes.extend(node_class(self, id) for id in store.extend(topology.positions, topology.tx_ranges))
+        else:
+            for pos, r in zip(topology.positions.tolist(), topology.tx_ranges.tolist()):
+                self.nodes.append(node_class(self, len(self.nodes), tuple(pos), r))
+        self.adjacency = topology.adjacency()
+        return self.nodes[:]
+
+    ############################
+    def _store_for(self, node_class):
+        """Gives the node store, creating it for the first StoredNode, with the columns of node_class.
+        Stored and plain nodes can not be mixed, as rows of the store are node ids.
+
+           Args:
+                node_class (Class): Node class inherited from StoredNode.
+           Returns:
+                NodeStore: Store of the simulator.
+        """
+        if self.node_store is None:
+            if self.nodes:
+                raise ValueError("StoredNode nodes can not be added to a network of BaseNode nodes")
+            self.node_store = NodeStore()
+        self.node_store.register(node_class)
+        return self.node_store
+
     ############################
     def update_neighbor_list(self, id):
         '''
-        Maintain each node's neighbor list by sorted distance after affected
+        Maintain each node's in-range neighbors by sorted distance after affected
         by addition or relocation of node with ID id
 
         Args:
             id (int): Global unique id of node
         Returns:
+            Tuple(List,List): link-up and link-down (src, dst) pairs, see Adjacency.update
 
         '''
-        me = self.nodes[id]
+        return self.adjacency.update(self.nodes, id)
 
-        # (re)sort other nodes' neighbor lists by distance
-        for n in self.nodes:
-            # skip this node
-            if n is me:
-                continue
+    ############################
+    def _run_events(self):
+        """Executes events until the event queue is empty or the duration is reached. Events of killed timers
+        do nothing, so the simulation is quiet from the last other event on.
+
+           Args:
+           Returns:
+               double: Time the simulation went quiet, None if events were left at the duration or it was stopped.
+        """
+        env = self.env
+        if self.kernel == 'heap':
+            env.run(until=self.duration)
+            quiet = env.now
+        else:
+            # stepping by hand instead of env.run(until), which keeps its own stop event queued
+            timers = self.timer_service
+            quiet = env.now
+            while not self.stopped and self._stop_request is None and env.peek() < self.duration:
+                dead = timers.stale
+                env.step()
+                if timers.stale >= dead:
+                    quiet = env.now
+        if self._stop_request is not None:
+            self.stop(self._stop_request)
+        return quiet if env.peek() == float('inf') and not self.stopped else None
 
-            nlist = n.neighbor_distance_list
+    ############################
+    def stop(self, reason='stopped'):
+        """Ends the run at the current time. Timers of all nodes are killed and pending events are not run,
+        so run() returns once the current event is done. Later calls are ignored.
 
-            # remove this node from other nodes' neighbor lists
-            for i, (dist, neighbor) in enumerate(nlist):
-                if neighbor is me:
-                    del nlist[i]
-                    break
+           Args:
+               reason (string): Why the run is stopped, recorded in metrics.
+           Returns:
 
-            # then insert it while maintaining sort order by distance
-            bisect.insort(nlist, (distance(n.pos, me.pos), me))
+        """
+        if self.stopped:
+            return
+        self.metrics.mark_stop(self.now, reason)
+        for n in self.nodes:
+            n.kill_all_timers()
+        if self.kernel == 'heap':
+            self.env.stop()
+        self.timer_service.clear()
+        # with simpy, _run_events() steps no further once stopped
 
-        self.nodes[id].neighbor_distance_list = [
-            (distance(n.pos, me.pos), n)
-            for n in self.nodes if n is not me
-        ]
-        self.nodes[id].neighbor_distance_list.sort()
+    ############################
+    def request_stop(self, reason='stopped'):
+        """Asks a run going on in another thread to stop, e.g. when its window is closed. Unlike stop(), it
+        may be called from any thread: the simulation thread calls stop() itself before its next event.
 
+           Args:
+               reason (string): Why the run is stopped, recorded in metrics.
+           Returns:
+
+        """
+        self._stop_request = reason
+        if self.kernel == 'heap':
+            self.env.interrupt()
 
     ############################
     def run(self):
         """Runs the simulation. It initialize every node, then executes each nodes run function.
+        It stops at duration, or earlier as soon as no event is left or stop() is called.
         Finally calls finish functions of nodes.
            Args:
            Returns:
+               Metrics: Measurements of the run.
         """
+        self.adjacency.compact()
+
         for n in self.nodes:
             n.init()
 
         for n in self.nodes:
-            self.env.process(ensure_generator(self.env, n.run))
+            if self.kernel == 'heap':
+                self.env.schedule(0, n.run)
+            else:
+                self.env.process(ensure_generator(self.env, n.run))
 
-        self.env.run(until=self.duration)
+        self.metrics.start()
+        quiet = self._run_events()
+        if quiet is not None:
+            self.metrics.finish(quiet, quiescent=True)
+        else:
+            self.metrics.finish(self.now if self.stopped else self.duration)
 
-        helper.print_result()
-        
         for n in self.nodes:
             n.finish()
-        
-        return
+
+        return self.metrics
 
 
     def __del__(self):
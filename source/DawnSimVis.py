@@ -1,9 +1,10 @@
 """Visualisation of wsnsimpy library. Based on wsnsimpy_tk.
 """
-from source import DawnSim
+from source import DawnSim, config
 from source.DawnSim import *
 from threading import Thread
 from topovis import Scene
+from topovis.trace import TraceRecorder
 import queue
 
 from topovis.TkPlotter import Plotter
@@ -36,7 +37,8 @@ class BaseNode(DawnSim.BaseNode):
 
     ###################
     def send(self, dest, pck):
-        """Visualise sending process in addition to base send method.
+        """Visualise sending process in addition to base send method. Shapes are only drawn when they
+        are shown or recorded, so headless runs schedule no events for removing them.
 
            Args:
                 pck (Dict): Package to be sent.
@@ -45,6 +47,9 @@ class BaseNode(DawnSim.BaseNode):
            Returns:
 
         """
+        if not (self.sim.visual or self.sim.recorder is not None):
+            super().send(dest, pck)
+            return
         obj_id = self.scene.circle(
             self.pos[0], self.pos[1],
             self.tx_range,
@@ -82,11 +87,9 @@ class BaseNode(DawnSim.BaseNode):
            Returns:
 
         """
-        for (dist, node) in self.neighbor_distance_list:
-            if dist <= self.tx_range:
-                self.scene.dellink(self.id, node.id, "edge")
-            else:
-                break
+        lo, hi, indices, _, _ = self.sim.adjacency.row(self.id)
+        for k in range(lo, hi):
+            self.scene.dellink(self.id, indices[k], "edge")
         self.change_color(0.9411, 0.9411, 0.9411)
         super().sleep()
 
@@ -114,63 +117,115 @@ class _FakeScene:
         return self._fake_method
     
 class Simulator(DawnSim.Simulator):
-    def __init__(self, duration, timescale=1, seed=0, terrain_size=(650, 650), visual=True, title=None):
-        super().__init__(duration, timescale, seed)
+    def __init__(self, duration, timescale=1, seed=0, terrain_size=(650, 650), visual=True, title=None,
+                 time_mode=None, kernel=None, trace=None):
+        if time_mode is None:
+            time_mode = config.SIM_TIME_MODE
+        if time_mode == 'bounded':
+            # throttle only while someone is watching
+            time_mode = 'realtime' if visual else 'virtual'
+        super().__init__(duration, timescale, seed, time_mode, kernel)
         self.visual = visual
         self.terrain_size = terrain_size
         self.title = title
+        self.recorder = None
         
         if self.visual:
             self.scene = Scene(realtime=True)
-            self.scene.linestyle("wsnsimpy:tx", color=(0, 0, 1), dash=(5, 5))
-            self.scene.linestyle("wsnsimpy:ack", color=(0, 1, 1), dash=(5, 5))
-            self.scene.linestyle("wsnsimpy:unicast", color=(0, 0, 1), width=3, arrow='head')
-            self.scene.linestyle("wsnsimpy:collision", color=(1, 0, 0), width=3)
-            self.scene.linestyle("prev", color=(0, .8, 0), arrow="tail", width=2)
-            self.scene.linestyle("edge", color=(.7, .7, .7), width=1)
+            self._define_styles()
             if title is None:
                 title = "WsnSimPy"
             self.tkplot = Plotter(windowTitle=title, terrain_size=terrain_size)
             self.tk = self.tkplot.tk
             self.scene.addPlotter(self.tkplot)
             self.scene.init(*terrain_size)
+        elif trace is not None:
+            # record the scene of a headless run to replay it later with Plotter.replay(),
+            # commands are stamped with the simulation time, the scene clock is never advanced
+            self.scene = Scene()
+            self.recorder = TraceRecorder(trace, clock=lambda: self.now)
+            self.scene.addPlotter(self.recorder)
+            self._define_styles()
+            self.scene.init(*terrain_size)
         else:
             self.scene = _FakeScene()
 
+    def _define_styles(self):
+        self.scene.linestyle("wsnsimpy:tx", color=(0, 0, 1), dash=(5, 5))
+        self.scene.linestyle("wsnsimpy:ack", color=(0, 1, 1), dash=(5, 5))
+        self.scene.linestyle("wsnsimpy:unicast", color=(0, 0, 1), width=3, arrow='head')
+        self.scene.linestyle("wsnsimpy:collision", color=(1, 0, 0), width=3)
+        self.scene.linestyle("prev", color=(0, .8, 0), arrow="tail", width=2)
+        self.scene.linestyle("edge", color=(.7, .7, .7), width=1)
+
     def _update_time(self):
-        while True:
-            try:
-                self.scene.setTime(self.now)
-                yield self.timeout(0.1)
-            except:
-                break
+        # polled from the Tk loop, so the clock adds no events and does not keep the simulation busy
+        self.scene.setTime(self.now)
+        self.tk.after(100, self._update_time)
 
     def update_neighbor_list(self, id):
-        node1 = self.nodes[id]
-        for (dist, node2) in node1.neighbor_distance_list:
-            if dist <= node1.tx_range:
+        up, down = super().update_neighbor_list(id)
+        # edges are drawn from the rows of the added or moved node
+        for (src, dst) in down:
+            if src == id:
                 try:
-                    self.scene.dellink(id, node2.id, "edge")
+                    self.scene.dellink(src, dst, "edge")
                 except:
                     pass
-            else:
-                break
-        super().update_neighbor_list(id)
-        for (dist, node2) in node1.neighbor_distance_list:
-            if dist <= node1.tx_range:
-                self.scene.addlink(id, node2.id, "edge")
-            else:
-                break
+        for (src, dst) in up:
+            if src == id:
+                self.scene.addlink(src, dst, "edge")
+        return up, down
+
+    def add_nodes(self, node_class, positions, tx_range):
+        first = len(self.nodes)
+        nodes = super().add_nodes(node_class, positions, tx_range)
+        self._draw_links(first)
+        return nodes
+
+    def add_shared_nodes(self, node_class, topology):
+        nodes = super().add_shared_nodes(node_class, topology)
+        self._draw_links(0)
+        return nodes
+
+    def _draw_links(self, first):
+        # draws the edges of nodes from id first on
+        if not self.visual and self.recorder is None:
+            return
+        # edges are undirected, so each one is sent once although it is in the rows of both nodes
+        links = set()
+        for id in range(len(self.nodes)):
+            lo, hi, indices, _, _ = self.adjacency.row(id)
+            for k in range(lo, hi):
+                if id >= first or indices[k] >= first:
+                    links.add((min(id, indices[k]), max(id, indices[k])))
+        self.scene.addlinks([(src, dst, "edge") for (src, dst) in sorted(links)])
+
+    def _run_and_quit(self):
+        # runs on the simulation thread; Tk is only told to quit, from its own thread
+        try:
+            super().run()
+        finally:
+            self.tk.after(0, self.tk.quit)
 
     def run(self):
         if self.visual:
-            self.env.process(self._update_time())
-            thr = Thread(target=super().run)
-            thr.setDaemon(True)
+            self._update_time()
+            thr = Thread(target=self._run_and_quit, daemon=True)
             thr.start()
             self.tk.mainloop()
+            if thr.is_alive():
+                # the window was closed before the run ended, the simulation thread stops it
+                self.request_stop('window closed')
+            thr.join()
+            return self.metrics
+        elif self.recorder is not None:
+            try:
+                return super().run()
+            finally:
+                self.recorder.close()
         else:
-            super().run()
+            return super().run()
 
 
     def __del__(self):
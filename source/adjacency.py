@@ -0,0 +1,523 @@
+"""Sparse neighbor table for DawnSim networks.
+Keeps only in-range neighbors of each node in CSR (compressed sparse row) arrays.
+"""
+
+import bisect
+from array import array
+from source import config
+
+try:
+    import numpy as np
+except ImportError:  # bulk construction falls back to pure Python
+    np = None
+
+
+###########################################################
+def distance(pos1, pos2):
+    """Calculates the distance between two positions.
+
+       Args:
+           pos1 (Tuple(double,double)): First position.
+           pos2 (Tuple(double,double)): Second position.
+
+       Returns:
+           double: returns the distance between two positions.
+    """
+    return ((pos1[0] - pos2[0]) ** 2 + (pos1[1] - pos2[1]) ** 2) ** 0.5
+
+
+###########################################################
+def _empty_row():
+    """Creates an empty, mutable neighbor row.
+
+       Args:
+
+       Returns:
+           Tuple(array,array,array): neighbor ids, distances and propagation delays.
+    """
+    return array('i'), array('d'), array('d')
+
+
+###########################################################
+def find_neighbor(indices, lo, hi, id):
+    """Gives the position of a neighbor in positions lo to hi of a row.
+
+       Args:
+           indices (array or memoryview of int): Neighbor ids, as returned by Adjacency.row().
+           lo (int): First position of the row.
+           hi (int): Position after the row.
+           id (int): Neighbor to look for.
+
+       Returns:
+           int: Position of id, None if it is not in the row.
+    """
+    if type(indices) is array:
+        try:
+            return indices.index(id, lo, hi)
+        except ValueError:
+            return None
+    # memoryviews of a SharedTopology have no index(); a SharedTopology implies NumPy
+    hits = np.flatnonzero(np.frombuffer(indices, np.int32, hi - lo, lo * indices.itemsize) == id)
+    return lo + int(hits[0]) if len(hits) else None
+
+
+###########################################################
+def _in_range_pairs_numpy(positions, tx_ranges, by_distance=True):
+    """Finds every (i, j) pair with distance(i, j) <= tx_range of i using a uniform grid
+    with cell size equal to the largest tx_range.
+
+       Args:
+           positions (List of Tuple(double,double)): Positions of nodes.
+           tx_ranges (List of double): Transmission ranges of nodes.
+           by_distance (bool): If False, pairs of a source are left unordered, which is much cheaper.
+
+       Returns:
+           Tuple(ndarray,ndarray,ndarray): sources, destinations and distances, sorted by source then distance.
+    """
+    pos = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    ranges = np.asarray(tx_ranges, dtype=np.float64)
+    n = len(pos)
+    cell_size = ranges.max() if n else 0
+    if n < 2 or cell_size <= 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+
+    # cells padded by one on every side, so neighbor cells of border cells stay valid keys
+    cells = np.floor(pos / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    height = cells[:, 1].max() + 2
+    keys = cells[:, 0] * height + cells[:, 1]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    ids = np.arange(n)
+
+    srcs, dsts, dists = [], [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbor_keys = keys + dx * height + dy
+            start = np.searchsorted(sorted_keys, neighbor_keys, 'left')
+            counts = np.searchsorted(sorted_keys, neighbor_keys, 'right') - start
+            total = counts.sum()
+            if not total:
+                continue
+            src = np.repeat(ids, counts)
+            run_start = np.repeat(np.cumsum(counts) - counts, counts)
+            dst = order[np.repeat(start, counts) + np.arange(total) - run_start]
+            delta = pos[src] - pos[dst]
+            dist = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+            keep = (src != dst) & (dist <= ranges[src])
+            srcs.append(src[keep])
+            dsts.append(dst[keep])
+            dists.append(dist[keep])
+
+    if not srcs:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+    src, dst, dist = np.concatenate(srcs), np.concatenate(dsts), np.concatenate(dists)
+    if by_distance:
+        order = np.lexsort((dst, dist, src))
+    else:
+        # every pass yields ascending sources, so the stable sort only merges nine runs
+        order = np.argsort(src, kind='stable')
+    return src[order], dst[order], dist[order]
+
+
+###########################################################
+def in_range_csr(positions, tx_ranges, by_distance=True):
+    """Builds the unit-disk graph of nodes in CSR form with NumPy: row i lists every node j
+    with distance(i, j) <= tx_range of i, sorted by distance.
+
+       Args:
+           positions (array-like of shape (n, 2)): Positions of nodes.
+           tx_ranges (array-like): Transmission ranges of nodes.
+           by_distance (bool): If False, rows are left unordered, which is much cheaper.
+
+       Returns:
+           Tuple(ndarray,ndarray,ndarray): indptr of n + 1 row offsets, neighbor ids and distances.
+    """
+    n = len(tx_ranges)
+    src, dst, dist = _in_range_pairs_numpy(positions, tx_ranges, by_distance)
+    indptr = np.zeros(n + 1, np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst, dist
+
+
+###########################################################
+def _in_range_pairs_python(positions, tx_ranges):
+    """Pure Python version of _in_range_pairs_numpy.
+
+       Args:
+           positions (List of Tuple(double,double)): Positions of nodes.
+           tx_ranges (List of double): Transmission ranges of nodes.
+
+       Returns:
+           Tuple(List,List,List): sources, destinations and distances, sorted by source then distance.
+    """
+    cell_size = max(tx_ranges, default=0)
+    if cell_size <= 0:
+        return [], [], []
+    cells = {}
+    for id, (x, y) in enumerate(positions):
+        cells.setdefault((int(x // cell_size), int(y // cell_size)), []).append(id)
+    src, dst, dist = [], [], []
+    for id, pos in enumerate(positions):
+        cx, cy = int(pos[0] // cell_size), int(pos[1] // cell_size)
+        row = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other in cells.get((cx + dx, cy + dy), ()):
+                    if other != id:
+                        d = distance(pos, positions[other])
+                        if d <= tx_ranges[id]:
+                            row.append((d, other))
+        row.sort()
+        for d, other in row:
+            src.append(id)
+            dst.append(other)
+            dist.append(d)
+    return src, dst, dist
+
+
+###########################################################
+class SpatialGrid:
+    """Class to index node positions in a uniform grid of square cells.
+    With cell size equal to the largest tx_range, every node in range of a position
+    is in the 3x3 cells around it.
+
+       Attributes:
+           cell_size (double): Edge length of cells.
+           cells (Dict of Tuple(int,int): Set of int): Node ids in each cell.
+           cell_of (Dict of int: Tuple(int,int)): Cell of each node.
+           pos_of (Dict of int: Tuple(double,double)): Indexed position of each node.
+
+    """
+
+    ############################
+    def __init__(self, cell_size, positions=()):
+        """Constructor for SpatialGrid class.
+
+           Args:
+               cell_size (double): Edge length of cells.
+               positions (Iterable of Tuple(int,Tuple(double,double))): Ids and positions of nodes to index.
+
+           Returns:
+               SpatialGrid: Created SpatialGrid object.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.cell_of = {}
+        self.pos_of = {}
+        for id, pos in positions:
+            self.place(id, pos)
+
+    ############################
+    def cell(self, pos):
+        """Gives the cell containing a position.
+
+           Args:
+                pos (Tuple(double,double)): Position.
+           Returns:
+                Tuple(int,int): Cell coordinates.
+        """
+        return int(pos[0] // self.cell_size), int(pos[1] // self.cell_size)
+
+    ############################
+    def place(self, id, pos):
+        """Puts a node into the cell of its position, moving it out of its previous cell.
+
+           Args:
+                id (int): Global unique id of node.
+                pos (Tuple(double,double)): Position of node.
+           Returns:
+                Tuple(int,int): Previous cell of node, None if it was not indexed.
+        """
+        old = self.cell_of.get(id)
+        new = self.cell(pos)
+        self.pos_of[id] = pos
+        if old != new:
+            if old is not None:
+                self.cells[old].discard(id)
+            self.cells.setdefault(new, set()).add(id)
+            self.cell_of[id] = new
+        return old
+
+    ############################
+    def around(self, cell):
+        """Gives the node ids in the 3x3 cells around a cell.
+
+           Args:
+                cell (Tuple(int,int)): Cell coordinates.
+           Returns:
+                Set of int: Node ids.
+        """
+        cx, cy = cell
+        ids = set()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                ids.update(self.cells.get((cx + dx, cy + dy), ()))
+        return ids
+
+
+###########################################################
+class Adjacency:
+    """Class to keep in-range neighbors of every node, sorted by distance.
+
+       Row i holds every node j with distance(i, j) <= tx_range of i, i.e. every node that hears
+       a transmission of i. Rows live in flat CSR arrays; rows changed after the last compact()
+       are kept aside as separate arrays until the next compact().
+
+       Attributes:
+           indptr (array of int): Row i occupies positions indptr[i] to indptr[i + 1] of the flat arrays.
+           indices (array of int): Neighbor ids.
+           dists (array of double): Distances to neighbors.
+           delays (array of double): Propagation delays to neighbors.
+           size (int): Number of rows.
+
+    """
+
+    ############################
+    def __init__(self):
+        """Constructor for Adjacency class.
+
+           Args:
+
+           Returns:
+               Adjacency: Created empty Adjacency object.
+        """
+        self.indptr = array('q', [0])
+        self.indices = array('i')
+        self.dists = array('d')
+        self.delays = array('d')
+        self.size = 0
+        self._rows = {}
+        self._grid = None
+
+    ############################
+    def row(self, id):
+        """Gives the neighbor row of a node. Neighbors are found at positions lo to hi of the returned arrays.
+
+           Args:
+                id (int): Global unique id of node.
+           Returns:
+                Tuple(int,int,array,array,array): lo, hi, neighbor ids, distances and propagation delays.
+        """
+        row = self._rows.get(id)
+        if row is not None:
+            return 0, len(row[0]), row[0], row[1], row[2]
+        if id + 1 < len(self.indptr):
+            return self.indptr[id], self.indptr[id + 1], self.indices, self.dists, self.delays
+        return 0, 0, self.indices, self.dists, self.delays
+
+    ############################
+    def degree(self, id):
+        """Gives the number of in-range neighbors of a node.
+
+           Args:
+                id (int): Global unique id of node.
+           Returns:
+                int: Number of neighbors.
+        """
+        lo, hi, _, _, _ = self.row(id)
+        return hi - lo
+
+    ############################
+    def _own_row(self, id):
+        """Gives a mutable copy of the row of a node, detaching it from the CSR arrays if needed.
+
+           Args:
+                id (int): Global unique id of node.
+           Returns:
+                Tuple(array,array,array): neighbor ids, distances and propagation delays.
+        """
+        row = self._rows.get(id)
+        if row is None:
+            lo, hi, indices, dists, delays = self.row(id)
+            row = array('i', indices[lo:hi]), array('d', dists[lo:hi]), array('d', delays[lo:hi])
+            self._rows[id] = row
+        return row
+
+    ############################
+    def _unlink(self, id, other):
+        """Removes other from the row of node id, if it is there.
+
+           Args:
+                id (int): Node whose row is changed.
+                other (int): Neighbor to remove.
+           Returns:
+                bool: True if other was a neighbor of id.
+        """
+        lo, hi, indices, _, _ = self.row(id)
+        k = find_neighbor(indices, lo, hi, other)
+        if k is None:
+            return False
+        k -= lo
+        indices, dists, delays = self._own_row(id)
+        del indices[k], dists[k], delays[k]
+        return True
+
+    ############################
+    def _link(self, id, other, dist):
+        """Inserts other into the row of node id, keeping the row sorted by distance.
+
+           Args:
+                id (int): Node whose row is changed.
+                other (int): Neighbor to insert.
+                dist (double): Distance between id and other.
+           Returns:
+
+        """
+        indices, dists, delays = self._own_row(id)
+        k = bisect.bisect_right(dists, dist)
+        indices.insert(k, other)
+        dists.insert(k, dist)
+        delays.insert(k, dist / config.SIM_PROPAGATION_SPEED)
+
+    ############################
+    def update(self, nodes, id):
+        """Maintains rows after addition or relocation of the node with ID id. Only nodes in the 3x3 grid
+        cells around the old and the new position of the node are visited.
+
+           Args:
+                nodes (List of Node): All nodes of the network, indexed by id.
+                id (int): Global unique id of the added or moved node.
+           Returns:
+                Tuple(List,List): link-up and link-down deltas. Each is a list of (src, dst) pairs where dst
+                 entered or left the row of src.
+        """
+        me = nodes[id]
+        if self._grid is None:
+            self._grid = SpatialGrid(max((n.tx_range for n in nodes), default=0),
+                                     ((n.id, n.pos) for n in nodes[:self.size]))
+        elif me.tx_range > self._grid.cell_size:
+            # re-index at the indexed positions, which still hold the old position of the node
+            self._grid = SpatialGrid(max(me.tx_range, max((n.tx_range for n in nodes), default=0)),
+                                     self._grid.pos_of.items())
+        grid = self._grid
+        self.size = max(self.size, len(nodes))
+        old_cell = grid.place(id, me.pos)
+        candidates = grid.around(grid.cell_of[id])
+        if old_cell is not None:
+            candidates |= grid.around(old_cell)
+        candidates.discard(id)
+
+        up, down = [], []
+        lo, hi, indices, _, _ = self.row(id)
+        before = set(indices[lo:hi])
+        mine = []
+        for other in candidates:
+            n = nodes[other]
+            dist = distance(n.pos, me.pos)
+            if dist <= me.tx_range:
+                mine.append((dist, other))
+            was = old_cell is not None and self._unlink(other, id)
+            if dist <= n.tx_range:
+                self._link(other, id, dist)
+                if not was:
+                    up.append((other, id))
+            elif was:
+                down.append((other, id))
+        mine.sort()
+        row = _empty_row()
+        for dist, other in mine:
+            row[0].append(other)
+            row[1].append(dist)
+            row[2].append(dist / config.SIM_PROPAGATION_SPEED)
+        self._rows[id] = row
+        after = set(row[0])
+        up.extend((id, other) for other in sorted(after - before))
+        down.extend((id, other) for other in sorted(before - after))
+        return up, down
+
+    ############################
+    def build(self, nodes, positions=None, tx_ranges=None):
+        """Rebuilds all rows at once from positions and ranges of nodes. It uses NumPy if it is available.
+
+           Args:
+                nodes (List of Node): All nodes of the network, indexed by id.
+                positions (ndarray): Positions of nodes, if they are already at hand, e.g. in a NodeStore.
+                tx_ranges (ndarray): Transmission ranges of nodes, likewise.
+           Returns:
+
+        """
+        if positions is None:
+            positions = [n.pos for n in nodes]
+        if tx_ranges is None:
+            tx_ranges = [n.tx_range for n in nodes]
+        indptr = array('q', [0])
+        if np is not None:
+            offsets, dst, dist = in_range_csr(positions, tx_ranges)
+            indptr.frombytes(offsets[1:].tobytes())
+            indices, dists, delays = _empty_row()
+            indices.frombytes(dst.astype(np.int32).tobytes())
+            dists.frombytes(dist.tobytes())
+            delays.frombytes((dist / config.SIM_PROPAGATION_SPEED).tobytes())
+        else:
+            src, dst, dist = _in_range_pairs_python(positions, tx_ranges)
+            counts = [0] * len(nodes)
+            for id in src:
+                counts[id] += 1
+            for count in counts:
+                indptr.append(indptr[-1] + count)
+            indices, dists, delays = array('i', dst), array('d', dist), _empty_row()[2]
+            delays.extend(d / config.SIM_PROPAGATION_SPEED for d in dist)
+        self.indptr, self.indices, self.dists, self.delays = indptr, indices, dists, delays
+        self.size = len(nodes)
+        self._rows = {}
+        self._index(positions, tx_ranges)
+
+    ############################
+    def attach(self, indptr, indices, dists, delays, positions, tx_ranges):
+        """Uses given CSR arrays as all rows without copying them, e.g. memoryviews of a SharedTopology.
+        Rows changed afterwards are copied out, and compact() then builds new arrays.
+
+           Args:
+                indptr (Sequence of int): Row offsets, one more than the number of rows.
+                indices (Sequence of int): Neighbor ids.
+                dists (Sequence of double): Distances to neighbors.
+                delays (Sequence of double): Propagation delays to neighbors.
+                positions (Sequence of Tuple(double,double)): Positions of nodes the rows were built from.
+                tx_ranges (Sequence of double): Transmission ranges of nodes, likewise.
+           Returns:
+
+        """
+        self.indptr, self.indices, self.dists, self.delays = indptr, indices, dists, delays
+        self.size = len(indptr) - 1
+        self._rows = {}
+        self._index(positions, tx_ranges)
+
+    ############################
+    def _index(self, positions, tx_ranges):
+        """Indexes nodes in the grid used by update() at the positions the rows were built from, so the
+        first move of a node afterwards finds the neighbors around its old position.
+
+           Args:
+                positions (Sequence of Tuple(double,double)): Positions of nodes, indexed by id.
+                tx_ranges (Sequence of double): Transmission ranges of nodes.
+           Returns:
+
+        """
+        if hasattr(positions, 'tolist'):
+            positions = positions.tolist()
+        if hasattr(tx_ranges, 'tolist'):
+            tx_ranges = tx_ranges.tolist()
+        self._grid = SpatialGrid(max(tx_ranges, default=0), enumerate(map(tuple, positions)))
+
+    ############################
+    def compact(self):
+        """Folds rows changed since the last call back into the flat CSR arrays.
+
+           Args:
+
+           Returns:
+
+        """
+        if not self._rows and len(self.indptr) == self.size + 1:
+            return
+        indptr = array('q', [0])
+        indices, dists, delays = _empty_row()
+        for id in range(self.size):
+            lo, hi, r_indices, r_dists, r_delays = self.row(id)
+            indices.extend(r_indices[lo:hi])
+            dists.extend(r_dists[lo:hi])
+            delays.extend(r_delays[lo:hi])
+            indptr.append(len(indices))
+        self.indptr, self.indices, self.dists, self.delays = indptr, indices, dists, delays
+        self._rows = {}
@@ -5,5 +5,9 @@ BROADCAST_ADDR = -1
 # simulation properties
 SIM_MESSAGGING_DELAY_TYPE = 'random'  # could be 'prop', 'random', or 'constant'
 SIM_MESSAGGING_CONSTANT_DELAY = 1  # if the delay type is constant, it will be used as delay
+SIM_PROPAGATION_SPEED = 3000000  # if the delay type is prop, delay is distance / speed
+SIM_PACKET_SIZE = 32  # bytes on air of packages without a size attribute
 SIM_MOVE_STEP_TIME = 0.1 # step time of moving
+SIM_TIME_MODE = 'realtime'  # could be 'realtime', 'virtual', or 'bounded'
+SIM_KERNEL = 'simpy'  # could be 'simpy' or 'heap'
 
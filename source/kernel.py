@@ -0,0 +1,223 @@
+"""Heap-based event kernel for DawnSim.
+A lighter alternative to simpy environments: delayed callbacks are plain
+(time, seq, callback, args) heap entries instead of simpy processes.
+"""
+
+from heapq import heapify, heappush, heappop
+from threading import Event
+from time import monotonic
+from types import GeneratorType
+import functools
+import simpy
+
+
+###########################################################
+class Timeout(object):
+    """
+    Delay yielded by processes running on a HeapEnvironment.
+    """
+    __slots__ = ('delay',)
+
+    def __init__(self, delay):
+        if delay < 0:
+            raise ValueError(f"Negative delay {delay}")
+        self.delay = delay
+
+
+###########################################################
+class Process(object):
+    """
+    Generator based process running on a HeapEnvironment. It mirrors the parts of
+    simpy.Process used by DawnSim: generators yield env.timeout() and can be interrupted.
+    """
+
+    def __init__(self, env, generator):
+        self.env = env
+        self.generator = generator
+        self.is_alive = True
+        self._token = 0
+        env.schedule(0, self._resume, 0, None)
+
+    def _resume(self, token, exception):
+        """
+        Steps the generator unless the wake-up was superseded by an interrupt.
+        """
+        if token != self._token:
+            return
+        try:
+            if exception is None:
+                target = next(self.generator)
+            else:
+                target = self.generator.throw(exception)
+        except StopIteration:
+            self.is_alive = False
+            return
+        if not isinstance(target, Timeout):
+            self.is_alive = False
+            raise RuntimeError(f"Invalid yield value {target!r}")
+        self._token += 1
+        self.env.schedule(target.delay, self._resume, self._token, None)
+
+    def interrupt(self, cause=None):
+        """
+        Throws a simpy.Interrupt into the process at the current time.
+        """
+        if not self.is_alive:
+            raise RuntimeError(f"{self!r} has terminated and cannot be interrupted.")
+        self._token += 1
+        self.env.schedule(0, self._resume, self._token, simpy.Interrupt(cause))
+
+
+###########################################################
+class Fanout(object):
+    """
+    Single heap entry delivering one broadcast to all of its receivers. Deliveries are
+    (offset, callback) pairs sorted by offset; the entry is re-queued at the next offset
+    only when another entry is due earlier.
+    """
+    __slots__ = ('env', 'start', 'deliveries', 'args', 'next')
+
+    def __init__(self, env, deliveries, args):
+        self.env = env
+        self.start = env.now
+        self.deliveries = deliveries
+        self.args = args
+        self.next = 0
+
+    def __call__(self):
+        env = self.env
+        queue = env._queue
+        deliveries = self.deliveries
+        args = self.args
+        i = self.next
+        while True:
+            deliveries[i][1](*args)
+            i += 1
+            if i == len(deliveries) or env.stopped:
+                return
+            at = self.start + deliveries[i][0]
+            # entries already queued for the same time were scheduled earlier and run first
+            if env.factor is not None or at >= env._until or (queue and queue[0][0] <= at):
+                break
+            env.now = at
+        self.next = i
+        env._seq += 1
+        heappush(queue, (at, env._seq, self, ()))
+
+
+###########################################################
+class HeapEnvironment(object):
+    """
+    Discrete-event kernel keeping (time, seq, callback, args) entries in a binary heap.
+    It is API-compatible with the subset of simpy.Environment used by DawnSim
+    (now, timeout, process and run). If factor is given, it is throttled to wall-clock
+    time like a non-strict simpy.rt.RealtimeEnvironment.
+
+    Owners of entries that turn out to do nothing, e.g. of killed timers, count them in
+    dead, so run() can tell that the simulation went quiet while they are still queued.
+    """
+
+    def __init__(self, initial_time=0, factor=None):
+        self.now = initial_time
+        self.factor = factor
+        self._queue = []
+        self._seq = 0
+        self._until = float('inf')
+        self.dead = 0
+        self.stopped = False
+        self.interrupted = False
+        self._wakeup = Event()
+
+    def schedule(self, delay, callback, *args, **kwargs):
+        """
+        Calls callback(*args, **kwargs) after delay. If the callback returns a generator,
+        it is run as a process.
+        """
+        if kwargs:
+            callback = functools.partial(callback, **kwargs)
+        self._seq += 1
+        heappush(self._queue, (self.now + delay, self._seq, callback, args))
+
+    def schedule_fanout(self, deliveries, *args):
+        """
+        Calls each callback of deliveries, a list of (delay, callback) pairs sorted by delay,
+        with args after its delay, keeping a single entry in the heap.
+        """
+        if deliveries:
+            self._seq += 1
+            heappush(self._queue, (self.now + deliveries[0][0], self._seq, Fanout(self, deliveries, args), ()))
+
+    def purge(self, is_stale):
+        """
+        Drops every entry for which is_stale(callback, args) is True and restores the heap.
+        Returns the number of dropped entries.
+        """
+        size = len(self._queue)
+        self._queue[:] = [entry for entry in self._queue if not is_stale(entry[2], entry[3])]
+        heapify(self._queue)
+        return size - len(self._queue)
+
+    def stop(self):
+        """
+        Drops every pending entry, so run() returns after the current entry with now unchanged.
+        """
+        self._queue.clear()
+        self.dead = 0
+        self.stopped = True
+
+    def interrupt(self):
+        """
+        Makes run() return before its next entry, leaving the queue as it is. Unlike the
+        other methods, it may be called from another thread; a throttled run is woken up.
+        """
+        self.interrupted = True
+        self._wakeup.set()
+
+    def timeout(self, delay=0):
+        """
+        Creates a delay to be yielded by a process.
+        """
+        return Timeout(delay)
+
+    def process(self, generator):
+        """
+        Starts a process from the given generator.
+        """
+        return Process(self, generator)
+
+    def peek(self):
+        """
+        Returns the time of the next entry, or infinity if there is none.
+        """
+        return self._queue[0][0] if self._queue else float('inf')
+
+    def run(self, until=None):
+        """
+        Executes entries in time order until the queue is empty or until is reached.
+        If until is reached first, now is set to until. If the queue drains first, now
+        stays at the time of the last entry, so it tells when the simulation went quiet.
+        Dead entries left when nothing else is are dropped without advancing now.
+        If interrupt() is called, it returns with now at the time of the last entry as well.
+        """
+        queue = self._queue
+        factor = self.factor
+        self.stopped = False
+        if factor is not None:
+            real_start = monotonic()
+            env_start = self.now
+        self._until = float('inf') if until is None else until
+        while len(queue) > self.dead and queue[0][0] < self._until and not self.interrupted:
+            if factor is not None:
+                lag = real_start + (queue[0][0] - env_start) * factor - monotonic()
+                if lag > 0 and self._wakeup.wait(lag):
+                    continue
+            now, _, callback, args = heappop(queue)
+            self.now = now
+            result = callback(*args)
+            if result is not None and isinstance(result, GeneratorType):
+                Process(self, result)
+        if len(queue) == self.dead:
+            queue.clear()
+            self.dead = 0
+        if until is not None and queue and not self.interrupted:
+            self.now = until
@@ -0,0 +1,180 @@
+"""Measurements of a single DawnSim simulation run.
+"""
+
+import time
+from collections import Counter
+from source import config
+
+
+###########################################################
+def type_name(type):
+    """Gives a printable name of a message type.
+
+       Args:
+           type (object): Message type, usually an Enum member.
+
+       Returns:
+           string: Name of the type.
+    """
+    return getattr(type, 'name', str(type))
+
+
+###########################################################
+class Metrics:
+    """Class to collect measurements of one simulation run. Every Simulator owns one, so several
+    simulators can run in one process without sharing counters.
+
+       Attributes:
+           received (Counter): Delivered messages per message type.
+           sent (Counter): Transmissions per message type. A broadcast counts once.
+           received_by_node (Counter): Delivered messages per receiving node id.
+           sent_by_node (Counter): Transmissions per sending node id.
+           bytes_on_air (int): Estimated bytes transmitted.
+           completion_time (double): Simulation time the algorithm completed, None if it did not.
+           quiescence_time (double): Simulation time the last event ran and the event queue drained,
+            None if events were still pending at the end of the run. Events of killed timers do not count.
+           last_delivery_time (double): Simulation time the last message was delivered, None if none was.
+           stop_time (double): Simulation time Simulator.stop() ended the run, None if it was not stopped.
+           stop_reason (string): Reason given to Simulator.stop().
+           end_time (double): Simulation time the run ended.
+           wall_time (double): Seconds in real time the run took.
+
+    """
+
+    ############################
+    def __init__(self):
+        """Constructor for Metrics class.
+
+           Args:
+
+           Returns:
+               Metrics: Created empty Metrics object.
+        """
+        self.received = Counter()
+        self.sent = Counter()
+        self.received_by_node = Counter()
+        self.sent_by_node = Counter()
+        self.bytes_on_air = 0
+        self.completion_time = None
+        self.quiescence_time = None
+        self.last_delivery_time = None
+        self.stop_time = None
+        self.stop_reason = None
+        self.end_time = None
+        self.wall_time = None
+        self._wall_start = None
+
+    ############################
+    @property
+    def msg_count(self):
+        """Property for total number of delivered messages.
+
+           Args:
+
+           Returns:
+               int: Delivered messages of all types.
+        """
+        return sum(self.received.values())
+
+    ############################
+    def on_send(self, node, pck):
+        """Counts a transmission of a node.
+
+           Args:
+                node (Node): Sender.
+                pck (object): Package sent. Its size attribute is used for bytes on air if it has one.
+           Returns:
+
+        """
+        self.sent[getattr(pck, 'type', None)] += 1
+        self.sent_by_node[node.id] += 1
+        self.bytes_on_air += getattr(pck, 'size', config.SIM_PACKET_SIZE)
+
+    ############################
+    def on_receive(self, node, pck, now):
+        """Counts a delivery to a node.
+
+           Args:
+                node (Node): Receiver.
+                pck (object): Package received.
+                now (double): Simulation time of the delivery.
+           Returns:
+
+        """
+        self.received[getattr(pck, 'type', None)] += 1
+        self.received_by_node[node.id] += 1
+        self.last_delivery_time = now
+
+    ############################
+    def mark_completion(self, now):
+        """Records the simulation time an algorithm completed. Later calls overwrite earlier ones.
+
+           Args:
+                now (double): Simulation time.
+           Returns:
+
+        """
+        self.completion_time = now
+
+    ############################
+    def mark_stop(self, now, reason):
+        """Records the simulation time and the reason of an early stop.
+
+           Args:
+                now (double): Simulation time.
+                reason (string): Why the run was stopped.
+           Returns:
+
+        """
+        self.stop_time = now
+        self.stop_reason = reason
+
+    ############################
+    def start(self):
+        """Starts measuring wall time of the run.
+
+           Args:
+
+           Returns:
+
+        """
+        self._wall_start = time.perf_counter()
+
+    ############################
+    def finish(self, now, quiescent=False):
+        """Records the end of the run.
+
+           Args:
+                now (double): Simulation time the run ended.
+                quiescent (bool): True if the run ended because no event was left.
+           Returns:
+
+        """
+        self.end_time = now
+        if quiescent:
+            self.quiescence_time = now
+        if self._wall_start is not None:
+            self.wall_time = time.perf_counter() - self._wall_start
+
+    ############################
+    def as_dict(self):
+        """Gives the measurements as plain data, e.g. to serialise them.
+
+           Args:
+
+           Returns:
+               Dict: Measurements, message types keyed by name.
+        """
+        return {
+            'completion_time': self.completion_time,
+            'quiescence_time': self.quiescence_time,
+            'last_delivery_time': self.last_delivery_time,
+            'stop_time': self.stop_time,
+            'stop_reason': self.stop_reason,
+            'end_time': self.end_time,
+            'wall_time': self.wall_time,
+            'msg_count': self.msg_count,
+            'received': {type_name(k): v for k, v in self.received.items()},
+            'sent': {type_name(k): v for k, v in self.sent.items()},
+            'bytes_on_air': self.bytes_on_air,
+        }
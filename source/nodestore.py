@@ -0,0 +1,221 @@
+"""Structure-of-arrays storage of node attributes for DawnSim networks.
+Attributes of all nodes live in one NumPy array per attribute instead of one
+__dict__ per node, so networks of millions of nodes fit in memory.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # the store is optional, plain BaseNode networks do not need it
+    np = None
+
+
+###########################################################
+class StoreField:
+    """Descriptor keeping an attribute of StoredNode subclasses in a NodeStore column.
+
+       Attributes:
+           name (string): Column name, the attribute name unless given.
+           dtype (numpy.dtype): Type of column.
+           default (object): Value of nodes that did not set the attribute.
+           sentinel (object): Stored in place of None. Reading it gives None.
+
+    """
+
+    ############################
+    def __init__(self, dtype, default=None, sentinel=-1, name=None):
+        """Constructor for StoreField class.
+
+           Args:
+               dtype (numpy.dtype): Type of column.
+               default (object): Initial value of the attribute. None is stored as sentinel.
+               sentinel (object): Value representing None in the column.
+               name (string): Column name. Defaults to the attribute name.
+
+           Returns:
+               StoreField: Created descriptor.
+        """
+        self.dtype = dtype
+        self.default = default
+        self.sentinel = sentinel
+        self.name = name
+
+    ############################
+    def __set_name__(self, owner, name):
+        if self.name is None:
+            self.name = name
+
+    ############################
+    @property
+    def fill(self):
+        """Property for the stored initial value.
+
+           Args:
+
+           Returns:
+               object: default, or sentinel if default is None.
+        """
+        return self.sentinel if self.default is None else self.default
+
+    ############################
+    def __get__(self, node, owner=None):
+        if node is None:
+            return self
+        value = node.sim.node_store.columns[self.name][node.id].item()
+        if self.default is None and value == self.sentinel:
+            return None
+        return value
+
+    ############################
+    def __set__(self, node, value):
+        node.sim.node_store.columns[self.name][node.id] = self.sentinel if value is None else value
+
+
+###########################################################
+class NodeStore:
+    """Class to keep attributes of nodes in NumPy arrays, one row per node id.
+
+       Columns 'pos', 'tx_range' and 'sleeping' always exist. Node classes add their own columns
+       with StoreField attributes, see register().
+
+       Attributes:
+           size (int): Number of nodes.
+           columns (Dict): Column name to array. Arrays may be longer than size, see view().
+           timers (Dict): Node id to its set of pending timers, only for nodes having timers.
+           logging (bool): Logging flag of all stored nodes.
+
+    """
+
+    ############################
+    def __init__(self, capacity=1024):
+        """Constructor for NodeStore class.
+
+           Args:
+               capacity (int): Number of rows to allocate up front.
+
+           Returns:
+               NodeStore: Created empty NodeStore object.
+        """
+        if np is None:
+            raise ImportError("NodeStore needs NumPy")
+        self.size = 0
+        self.columns = {}
+        self.timers = {}
+        self.logging = False
+        self._capacity = max(1, capacity)
+        self._fills = {}
+        self.add_column('pos', np.float64, np.nan, (2,))
+        self.add_column('tx_range', np.float64, 0.0)
+        self.add_column('sleeping', np.bool_, False)
+
+    ############################
+    def add_column(self, name, dtype, fill=0, shape=()):
+        """Adds a column. Adding an existing column again keeps its values.
+
+           Args:
+               name (string): Column name.
+               dtype (numpy.dtype): Type of column.
+               fill (object): Value of rows not written yet.
+               shape (Tuple of int): Shape of one row of the column.
+
+           Returns:
+               ndarray: View of the column, see view().
+        """
+        column = self.columns.get(name)
+        if column is None:
+            self.columns[name] = np.full((self._capacity,) + tuple(shape), fill, dtype)
+            self._fills[name] = fill
+        elif column.dtype != np.dtype(dtype):
+            raise TypeError(f"Column {name} exists with type {column.dtype}")
+        return self.view(name)
+
+    ############################
+    def register(self, node_class):
+        """Adds the columns of every StoreField of a node class.
+
+           Args:
+               node_class (Class): Node class inherited from StoredNode.
+
+           Returns:
+
+        """
+        for klass in reversed(node_class.__mro__):
+            for attr in vars(klass).values():
+                if isinstance(attr, StoreField):
+                    self.add_column(attr.name, attr.dtype, attr.fill)
+
+    ############################
+    def _reserve(self, size):
+        """Grows every column to hold at least size rows, doubling capacity.
+
+           Args:
+               size (int): Number of rows needed.
+
+           Returns:
+
+        """
+        if size <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.full((capacity,) + column.shape[1:], self._fills[name], column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+        self._capacity = capacity
+
+    ############################
+    def extend(self, positions, tx_ranges):
+        """Appends rows for new nodes.
+
+           Args:
+               positions (array-like of shape (n, 2)): Positions of new nodes.
+               tx_ranges (double or array-like): Transmission range of all new nodes, or one per node.
+
+           Returns:
+               range: Ids of the new nodes.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        first = self.size
+        self._reserve(first + len(positions))
+        self.size = first + len(positions)
+        self.columns['pos'][first:self.size] = positions
+        self.columns['tx_range'][first:self.size] = tx_ranges
+        return range(first, self.size)
+
+    ############################
+    def view(self, name):
+        """Gives a vectorized view of a column. Writes to the view change the node attributes.
+        Views taken before the store grows keep pointing to the old arrays.
+
+           Args:
+               name (string): Column name.
+
+           Returns:
+               ndarray: Rows of all nodes, indexed by node id.
+        """
+        return self.columns[name][:self.size]
+
+    ############################
+    def __getitem__(self, name):
+        return self.view(name)
+
+    ############################
+    def __contains__(self, name):
+        return name in self.columns
+
+    ############################
+    def __len__(self):
+        return self.size
+
+    ############################
+    @property
+    def nbytes(self):
+        """Property for memory used by columns.
+
+           Args:
+
+           Returns:
+               int: Bytes allocated for all columns.
+        """
+        return sum(column.nbytes for column in self.columns.values())
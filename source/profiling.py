@@ -0,0 +1,199 @@
+"""Opt-in per-handler profiling of DawnSim simulations.
+Wraps node callbacks and simulator internals while attached and restores them when
+detached, so a simulation that is not profiled runs the original functions untouched.
+"""
+
+import functools
+import inspect
+import marshal
+import time
+
+NODE_METHODS = ('init', 'run', 'finish', 'send', 'on_receive_check', 'delayed_exec', 'set_timer',
+                'move_step')
+"""Tuple of string: Node methods profiled in addition to the handlers registered with handles().
+"""
+
+SIMULATOR_METHODS = ('delayed_exec', 'broadcast_exec', 'update_neighbor_list')
+"""Tuple of string: Simulator methods profiled.
+"""
+
+
+###########################################################
+class HandlerProfiler:
+    """Class to record call counts and wall time of node callbacks, keyed by node class and method name,
+    e.g. 'SyncBFSNode.on_ack_receive', and of simulator internals, e.g. 'Simulator.delayed_exec'.
+
+       Attributes:
+           stats (Dict): Key to [calls, own time, cumulative time, callers], where callers maps the key of
+            each caller to [calls, own time, cumulative time] of the calls made by it.
+
+    """
+
+    ############################
+    def __init__(self):
+        """Constructor for HandlerProfiler class.
+
+           Args:
+
+           Returns:
+               HandlerProfiler: Created profiler, not attached to any simulator.
+        """
+        self.stats = {}
+        self._stack = []
+        self._active = {}
+        self._codes = {}
+        self._patched = []
+
+    ############################
+    def _wrap(self, key, func):
+        """Creates a wrapper of func recording its calls under key.
+
+           Args:
+               key (string): Name of the profiled function.
+               func (Function): Function to wrap.
+
+           Returns:
+               Function: The wrapper.
+        """
+        stats = self.stats
+        stack = self._stack
+        active = self._active
+        clock = time.perf_counter
+        code = getattr(inspect.unwrap(func), '__code__', None)
+        self._codes[key] = (code.co_filename, code.co_firstlineno) if code else ('~', 0)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            caller = stack[-1][0] if stack else None
+            frame = [key, clock(), 0.0]
+            stack.append(frame)
+            active[key] = active.get(key, 0) + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack.pop()
+                active[key] -= 1
+                elapsed = clock() - frame[1]
+                own = elapsed - frame[2]
+                # a recursive call is already inside the cumulative time of the outer one
+                total = elapsed if not active[key] else 0.0
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = [0, 0.0, 0.0, {}]
+                entry[0] += 1
+                entry[1] += own
+                entry[2] += total
+                by_caller = entry[3].get(caller)
+                if by_caller is None:
+                    by_caller = entry[3][caller] = [0, 0.0, 0.0]
+                by_caller[0] += 1
+                by_caller[1] += own
+                by_caller[2] += total
+                if stack:
+                    stack[-1][2] += elapsed
+
+        return wrapper
+
+    ############################
+    def _patch(self, owner, name, key):
+        """Replaces attribute name of owner by a profiling wrapper, remembering how to restore it.
+        Generator functions are left alone, as timing them would only time their creation.
+        """
+        func = getattr(owner, name, None)
+        if func is None or inspect.isgeneratorfunction(func):
+            return
+        had_own = name in vars(owner)
+        self._patched.append((owner, name, vars(owner)[name] if had_own else None, had_own))
+        setattr(owner, name, self._wrap(key, func))
+
+    ############################
+    def attach(self, sim):
+        """Starts profiling the node classes of sim and its internals.
+
+           Args:
+               sim (Simulator): Simulator to profile. Its nodes should be added already.
+
+           Returns:
+               HandlerProfiler: self, so it can be used in a with statement.
+        """
+        sim_name = type(sim).__name__
+        for name in SIMULATOR_METHODS:
+            self._patch(sim, name, f"{sim_name}.{name}")
+        for node_class in {type(n) for n in sim.nodes}:
+            if any(owner is node_class for owner, *_ in self._patched):
+                continue
+            names = {name for klass in node_class.__mro__ for name, attr in vars(klass).items()
+                     if hasattr(attr, '_handles') or name.startswith('on_')}
+            names.update(NODE_METHODS)
+            for name in sorted(names):
+                if callable(getattr(node_class, name, None)):
+                    self._patch(node_class, name, f"{node_class.__name__}.{name}")
+            node_class.rebuild_dispatch()
+        return self
+
+    ############################
+    def detach(self):
+        """Stops profiling and restores every wrapped function. Recorded stats are kept.
+
+           Args:
+
+           Returns:
+
+        """
+        classes = set()
+        for owner, name, original, had_own in reversed(self._patched):
+            if had_own:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+            if isinstance(owner, type):
+                classes.add(owner)
+        self._patched = []
+        for node_class in classes:
+            node_class.rebuild_dispatch()
+
+    ############################
+    def __enter__(self):
+        return self
+
+    ############################
+    def __exit__(self, *exc):
+        self.detach()
+
+    ############################
+    def report(self, limit=None):
+        """Formats the stats as a table sorted by cumulative time.
+
+           Args:
+               limit (int): Number of rows to show, all if None.
+
+           Returns:
+               string: The report.
+        """
+        rows = sorted(self.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        lines = [f"{'calls':>10} {'own(s)':>10} {'cum(s)':>10} {'per call(us)':>13}  function"]
+        for key, (calls, own, total, _) in rows:
+            lines.append(f"{calls:>10} {own:>10.4f} {total:>10.4f} {total / calls * 1e6:>13.2f}  {key}")
+        return '\n'.join(lines)
+
+    ############################
+    def dump(self, path):
+        """Writes the stats in the format of cProfile, so they can be loaded with pstats.Stats(path).
+
+           Args:
+               path (string): File to write.
+
+           Returns:
+
+        """
+        def label(key):
+            filename, line = self._codes[key]
+            return filename, line, key
+
+        stats = {}
+        for key, (calls, own, total, callers) in self.stats.items():
+            stats[label(key)] = (calls, calls, own, total,
+                                 {label(caller): (c, c, o, t) for caller, (c, o, t) in callers.items()
+                                  if caller is not None})
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
@@ -0,0 +1,180 @@
+"""Immutable network topology in shared memory for DawnSim networks.
+Positions, transmission ranges and the CSR neighbor table of a network are built once
+into one multiprocessing.shared_memory block. Simulators in other processes attach to
+the block and read their neighbor rows from it directly, without copying or rebuilding.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from source import config
+from source.adjacency import Adjacency, in_range_csr
+
+# (name, type code, values per node or link, counted per 'node', 'row' boundary or 'link'),
+# 8-byte fields first so every field is aligned
+FIELDS = (
+    ('positions', 'd', 2, 'node'),
+    ('tx_ranges', 'd', 1, 'node'),
+    ('indptr', 'q', 1, 'row'),
+    ('dists', 'd', 1, 'link'),
+    ('delays', 'd', 1, 'link'),
+    ('indices', 'i', 1, 'link'),
+)
+
+
+###########################################################
+class _Block(shared_memory.SharedMemory):
+    """SharedMemory that may be closed or collected while views of it are still held, e.g. by an
+    Adjacency. The mapping is then released with the last view instead of raising BufferError.
+    """
+
+    ############################
+    def close(self):
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+    ############################
+    def __del__(self):
+        self.close()
+
+
+###########################################################
+class SharedTopology:
+    """Class to keep the positions, transmission ranges and neighbor table of a network in shared memory.
+    The process that creates it owns the block and removes it on close(); other processes attach with
+    the spec of the topology.
+
+       Attributes:
+           spec (Tuple(string,int,int)): Name of the shared memory block, number of nodes and number of links.
+           size (int): Number of nodes.
+           positions (ndarray): Positions of nodes, of shape (size, 2).
+           tx_ranges (ndarray): Transmission ranges of nodes.
+           indptr, indices, dists, delays (memoryview): Neighbor table in the CSR form of Adjacency.
+
+    """
+
+    ############################
+    def __init__(self, shm, size, links, owner=False):
+        """Constructor for SharedTopology class. Use create() or attach() instead.
+
+           Args:
+               shm (SharedMemory): Block holding the fields.
+               size (int): Number of nodes.
+               links (int): Number of links.
+               owner (bool): True if this process created the block and removes it on close().
+
+           Returns:
+               SharedTopology: Topology with views of the fields.
+        """
+        self._shm = shm
+        self._owner = owner
+        self.spec = (shm.name, size, links)
+        self.size = size
+        counts = {'node': size, 'row': size + 1, 'link': links}
+        offset = 0
+        for name, code, width, per in FIELDS:
+            nbytes = counts[per] * width * (4 if code == 'i' else 8)
+            setattr(self, name, shm.buf[offset:offset + nbytes].cast(code))
+            offset += nbytes
+        # NumPy views for vectorized consumers, e.g. NodeStore and the oracle
+        self.positions = np.frombuffer(self.positions, np.float64).reshape(size, 2)
+        self.tx_ranges = np.frombuffer(self.tx_ranges, np.float64)
+
+    ############################
+    @staticmethod
+    def nbytes(size, links):
+        """Gives the size of the block of a topology.
+
+           Args:
+               size (int): Number of nodes.
+               links (int): Number of links.
+
+           Returns:
+               int: Bytes of the block.
+        """
+        counts = {'node': size, 'row': size + 1, 'link': links}
+        return sum(counts[per] * width * (4 if code == 'i' else 8) for _, code, width, per in FIELDS)
+
+    ############################
+    @classmethod
+    def create(cls, positions, tx_ranges):
+        """Builds the neighbor table of nodes and places it with the nodes in a new shared memory block.
+
+           Args:
+               positions (array-like of shape (n, 2)): Positions of nodes.
+               tx_ranges (double or array-like): Transmission range of all nodes, or one per node.
+
+           Returns:
+               SharedTopology: Topology owned by the calling process.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        tx_ranges = np.broadcast_to(np.asarray(tx_ranges, dtype=np.float64), (len(positions),))
+        indptr, indices, dists = in_range_csr(positions, tx_ranges)
+        size, links = len(positions), len(indices)
+        shm = _Block(create=True, size=max(cls.nbytes(size, links), 1))
+        topology = cls(shm, size, links, owner=True)
+        topology.positions[:] = positions
+        topology.tx_ranges[:] = tx_ranges
+        np.frombuffer(topology.indptr, np.int64)[:] = indptr
+        np.frombuffer(topology.indices, np.int32)[:] = indices
+        np.frombuffer(topology.dists, np.float64)[:] = dists
+        np.frombuffer(topology.delays, np.float64)[:] = dists / config.SIM_PROPAGATION_SPEED
+        return topology
+
+    ############################
+    @classmethod
+    def attach(cls, spec):
+        """Attaches to a topology created by another process.
+
+           Args:
+               spec (Tuple(string,int,int)): spec attribute of the topology.
+
+           Returns:
+               SharedTopology: Topology reading the block of its owner.
+        """
+        name, size, links = spec
+        return cls(_Block(name=name), size, links)
+
+    ############################
+    def adjacency(self):
+        """Gives an Adjacency reading its rows from the shared block. Rows changed later, e.g. by
+        moving nodes, are copied into the Adjacency and never written back to the block.
+
+           Args:
+
+           Returns:
+               Adjacency: Neighbor table of the topology.
+        """
+        adjacency = Adjacency()
+        adjacency.attach(self.indptr, self.indices, self.dists, self.delays, self.positions, self.tx_ranges)
+        return adjacency
+
+    ############################
+    def close(self):
+        """Detaches from the block, and removes it if this process created it. Adjacency objects of the
+        topology must not be used afterwards.
+
+           Args:
+
+           Returns:
+
+        """
+        if self._shm is None:
+            return
+        self.positions = self.tx_ranges = None
+        self.indptr = self.indices = self.dists = self.delays = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    ############################
+    def __enter__(self):
+        return self
+
+    ############################
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,135 @@
+"""Parameter sweep runner. Runs headless BFS simulations for every combination of
+cell count, tx range, algorithm and iteration on a process pool.
+
+Usage: python3 sweep.py --cells 8 16 --ranges 75 100 --algorithms sync async echo --iterations 10
+
+Results are appended to an SQLite results store (see results.py) in batches.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import helper
+import main
+import oracle
+import results
+from bfs_nodes import SyncBFSNode, AsyncBFSNode, EchoAsyncBFSNode
+
+ALGORITHMS = {
+    'sync': ('Synchronous', SyncBFSNode),
+    'async': ('Asynchronous', AsyncBFSNode),
+    'echo': ('Echo Asynchronous', EchoAsyncBFSNode),
+}
+
+
+def run_one(cell_count: int, tx_range: int, algorithm: str, iteration_id: str, seed: int,
+            kernel: str = 'heap', verify: bool = False, snapshots: str = None) -> dict:
+    """
+    Runs one headless simulation in the calling process and returns its result.
+
+    Args:
+        cell_count (int): Number of grid cells on each side.
+        tx_range (int): Transmission range of every node.
+        algorithm (str): Key of ALGORITHMS.
+        iteration_id (str): Id shared by the runs of one iteration, they get the same topology.
+        seed (int): Seed of the topology and the message delays.
+        kernel (str): Event kernel of the simulator.
+        verify (bool): Check the BFS tree of the run against the oracle (see oracle.py).
+        snapshots (str): Directory to save an SVG image of the BFS tree of the run to.
+
+    Returns:
+        dict: Result record, see results.make_record.
+    """
+    name, node_class = ALGORITHMS[algorithm]
+    random.seed(seed)
+    title = f'{cell_count}x{tx_range} {iteration_id} {name} BFS Simulator'
+    sim = main.create_simulator(title, cell_count, False, kernel)
+    main.create_networks([sim], [node_class], cell_count, tx_range)
+
+    metrics = sim.run()
+    check = oracle.verify(sim) if verify else None
+    if snapshots:
+        helper.save_bfs_tree(sim, os.path.join(
+            snapshots, f'{cell_count}x{tx_range}_{iteration_id}_{algorithm}.svg'))
+    return results.make_record(metrics, iteration_id, algorithm, cell_count, tx_range, seed, check)
+
+
+def plan(cells, ranges, algorithms, iterations, base_seed):
+    """
+    Builds the argument tuples of every run of a sweep. Each iteration gets its own
+    seed, shared by all algorithms of that iteration.
+    """
+    seeds = random.Random(base_seed)
+    runs = []
+    for cell_count in cells:
+        for tx_range in ranges:
+            for _ in range(iterations):
+                iteration_id = str(uuid.UUID(int=seeds.getrandbits(128))).split('-')[0]
+                seed = seeds.getrandbits(32)
+                for algorithm in algorithms:
+                    runs.append((cell_count, tx_range, algorithm, iteration_id, seed))
+    return runs
+
+
+def sweep(runs, workers=None, kernel='heap', verify=False, snapshots=None):
+    """
+    Fans runs out across a process pool and yields each result as soon as it completes.
+    A run that raises is reported on stderr and skipped, so the other runs still complete.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_one, *run, kernel, verify, snapshots): run for run in runs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as error:
+                cell_count, tx_range, algorithm, iteration_id, seed = futures[future]
+                print(f"{cell_count}x{tx_range} {iteration_id} {algorithm} (seed {seed}) failed: {error!r}",
+                      file=sys.stderr, flush=True)
+                continue
+            yield result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a BFS parameter sweep on a process pool.')
+    parser.add_argument('--cells', type=int, nargs='+', default=[16], help='cell counts per side')
+    parser.add_argument('--ranges', type=int, nargs='+', default=[75], help='transmission ranges')
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(ALGORITHMS), default=['sync', 'async'])
+    parser.add_argument('--iterations', type=int, default=10, help='iterations per configuration')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='base seed, random if omitted')
+    parser.add_argument('--kernel', choices=['simpy', 'heap'], default='heap')
+    parser.add_argument('--db', default=results.DEFAULT_PATH, help='results database')
+    parser.add_argument('--batch', type=int, default=64, help='results per database transaction')
+    parser.add_argument('--verify', action='store_true', help='check every BFS tree against the oracle')
+    parser.add_argument('--snapshots', help='directory to save an SVG image of every BFS tree to')
+    args = parser.parse_args()
+
+    if args.snapshots:
+        os.makedirs(args.snapshots, exist_ok=True)
+    runs = plan(args.cells, args.ranges, args.algorithms, args.iterations, args.seed)
+    store = results.ResultStore(args.db)
+    batch = []
+    done = 0
+    start = time.perf_counter()
+    try:
+        for result in sweep(runs, args.workers, args.kernel, args.verify, args.snapshots):
+            done += 1
+            print(f"[{done}/{len(runs)}] {result['cell_count']}x{result['tx_range']} {result['iteration']} "
+                  f"{result['algorithm']:>5}: time={result['sim_time']} msgs={result['msg_count']} "
+                  f"wall={result['wall_time']:.2f}s"
+                  + (f" verified={bool(result['verified'])}" if 'verified' in result else ''), flush=True)
+            batch.append(result)
+            if len(batch) >= args.batch:
+                store.insert_many(batch)
+                batch = []
+    finally:
+        # completed runs are kept even if the sweep is interrupted
+        store.insert_many(batch)
+    print(f"{done} runs in {time.perf_counter() - start:.2f}s, results in {args.db}")
+    if done < len(runs):
+        sys.exit(f"{len(runs) - done} of {len(runs)} runs failed")
@@ -0,0 +1,73 @@
+"""Tests for bulk construction of networks with Simulator.add_nodes."""
+
+import random
+
+import numpy as np
+import pytest
+
+from source import DawnSim
+from source.nodestore import StoreField
+
+
+class PlainNode(DawnSim.BaseNode):
+    pass
+
+
+class CompactNode(DawnSim.StoredNode):
+    __slots__ = ()
+
+    layer = StoreField(np.float64, float('inf'))
+
+
+def neighbor_ids(sim):
+    return [[m.id for _, m in n.neighbor_distance_list] for n in sim.nodes]
+
+
+def random_positions(n=80, seed=4):
+    rng = random.Random(seed)
+    return [(rng.uniform(0, 300), rng.uniform(0, 300)) for _ in range(n)]
+
+
+def test_bulk_build_matches_adding_nodes_one_by_one():
+    positions = random_positions()
+    ranges = [60 if i % 3 else 90 for i in range(len(positions))]
+    one_by_one = DawnSim.Simulator(10, time_mode='virtual')
+    for pos, r in zip(positions, ranges):
+        one_by_one.add_node(PlainNode, pos, r)
+    bulk = DawnSim.Simulator(10, time_mode='virtual')
+    nodes = bulk.add_nodes(PlainNode, positions, ranges)
+    assert [n.id for n in nodes] == list(range(len(positions)))
+    assert neighbor_ids(bulk) == neighbor_ids(one_by_one)
+
+
+def test_stored_nodes_from_an_array_match_plain_nodes():
+    positions = random_positions()
+    plain = DawnSim.Simulator(10, time_mode='virtual')
+    plain.add_nodes(PlainNode, positions, 70)
+    stored = DawnSim.Simulator(10, time_mode='virtual')
+    stored.add_nodes(CompactNode, np.array(positions), 70)
+    assert neighbor_ids(stored) == neighbor_ids(plain)
+    assert stored.node_store['pos'].shape == (len(positions), 2)
+    assert stored.nodes[5].layer == float('inf')
+
+
+def test_later_batches_extend_the_network():
+    positions = random_positions()
+    sim = DawnSim.Simulator(10, time_mode='virtual')
+    sim.add_nodes(PlainNode, positions[:40], 70)
+    added = sim.add_nodes(PlainNode, positions[40:], 70)
+    assert [n.id for n in added] == list(range(40, 80))
+    whole = DawnSim.Simulator(10, time_mode='virtual')
+    whole.add_nodes(PlainNode, positions, 70)
+    assert neighbor_ids(sim) == neighbor_ids(whole)
+
+
+def test_plain_and_stored_nodes_can_not_be_mixed():
+    sim = DawnSim.Simulator(10, time_mode='virtual')
+    sim.add_nodes(PlainNode, random_positions(5), 70)
+    with pytest.raises(ValueError):
+        sim.add_nodes(CompactNode, random_positions(5), 70)
+    sim = DawnSim.Simulator(10, time_mode='virtual')
+    sim.add_nodes(CompactNode, random_positions(5), 70)
+    with pytest.raises(ValueError):
+        sim.add_nodes(PlainNode, random_positions(5), 70)
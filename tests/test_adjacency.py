@@ -0,0 +1,108 @@
+"""Tests for the CSR neighbor table of Adjacency and its incremental updates."""
+
+import random
+from array import array
+from types import SimpleNamespace
+
+import pytest
+
+from source import adjacency as adjacency_module
+from source.adjacency import Adjacency, distance
+from source.topology import SharedTopology
+
+
+def random_nodes(n=120, seed=5):
+    rng = random.Random(seed)
+    return [SimpleNamespace(id=i, pos=(rng.uniform(0, 400), rng.uniform(0, 400)), tx_range=rng.choice([50, 80]))
+            for i in range(n)]
+
+
+def expected_rows(nodes):
+    return [sorted((distance(n.pos, m.pos), m.id) for m in nodes
+                   if m is not n and distance(n.pos, m.pos) <= n.tx_range) for n in nodes]
+
+
+def rows_of(adjacency, size):
+    rows = []
+    for id in range(size):
+        lo, hi, indices, dists, delays = adjacency.row(id)
+        rows.append([(dists[k], indices[k]) for k in range(lo, hi)])
+    return rows
+
+
+def assert_rows(adjacency, nodes):
+    for got, expected in zip(rows_of(adjacency, len(nodes)), expected_rows(nodes)):
+        assert [id for _, id in got] == [id for _, id in expected]
+        assert [d for d, _ in got] == pytest.approx([d for d, _ in expected])
+
+
+def make_nodes():
+    return [SimpleNamespace(id=0, pos=(149, 10), tx_range=75),
+            SimpleNamespace(id=1, pos=(74.5, 10), tx_range=75)]
+
+
+def neighbors(adjacency, id):
+    lo, hi, indices, _, _ = adjacency.row(id)
+    return list(indices[lo:hi])
+
+
+def check_first_move(adjacency, nodes):
+    assert neighbors(adjacency, 1) == [0]
+    nodes[0].pos = (151, 10)
+    up, down = adjacency.update(nodes, 0)
+    assert up == []
+    assert sorted(down) == [(0, 1), (1, 0)]
+    assert neighbors(adjacency, 0) == []
+    assert neighbors(adjacency, 1) == []
+
+
+def test_first_move_after_build():
+    nodes = make_nodes()
+    adjacency = Adjacency()
+    adjacency.build(nodes)
+    check_first_move(adjacency, nodes)
+
+
+def test_first_move_after_attach():
+    nodes = make_nodes()
+    with SharedTopology.create([n.pos for n in nodes], 75) as topology:
+        adjacency = topology.adjacency()
+        check_first_move(adjacency, nodes)
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_build_gives_rows_in_range_of_each_node_sorted_by_distance(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(adjacency_module, 'np', None)
+    nodes = random_nodes()
+    adjacency = Adjacency()
+    adjacency.build(nodes)
+    assert_rows(adjacency, nodes)
+    lo, hi, _, dists, delays = adjacency.row(0)
+    assert list(delays[lo:hi]) == pytest.approx([d / adjacency_module.config.SIM_PROPAGATION_SPEED
+                                                 for d in dists[lo:hi]])
+
+
+def test_incremental_updates_match_a_rebuild():
+    nodes = random_nodes()
+    adjacency = Adjacency()
+    adjacency.build(nodes)
+    rng = random.Random(9)
+    for _ in range(200):
+        node = rng.choice(nodes)
+        node.pos = (rng.uniform(0, 400), rng.uniform(0, 400))
+        adjacency.update(nodes, node.id)
+    assert_rows(adjacency, nodes)
+    adjacency.compact()
+    assert isinstance(adjacency.indices, array)
+    assert_rows(adjacency, nodes)
+    assert sum(adjacency.degree(n.id) for n in nodes) == len(adjacency.indices)
+
+
+def test_nodes_added_one_by_one_match_a_build():
+    nodes = random_nodes(60)
+    adjacency = Adjacency()
+    for node in nodes:
+        adjacency.update(nodes[:node.id + 1], node.id)
+    assert_rows(adjacency, nodes)
+
@@ -0,0 +1,63 @@
+"""Tests for the incremental grouped statistics of analyser.py."""
+
+import numpy as np
+import pytest
+
+import analyser
+import results
+
+
+def record(algorithm, sim_time, msg_count, cell_count=8):
+    return {'run_id': f'{algorithm}-{sim_time}-{msg_count}', 'iteration': 'it', 'algorithm': algorithm,
+            'cell_count': cell_count, 'tx_range': 75, 'sim_time': sim_time, 'msg_count': msg_count,
+            'wall_time': 0.5}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = results.ResultStore(str(tmp_path / 'results.db'))
+    yield store
+    store.close()
+
+
+def test_groups_and_summary(store):
+    times = [10.0, 12.0, 14.0, 16.0]
+    store.insert_many([record('sync', t, 100 + i) for i, t in enumerate(times)]
+                      + [record('async', 5.0, 50), record('async', None, 60)])
+    stats = analyser.Analyser(store)
+    assert stats.update() == 6
+    report = {group['algorithm']: group for group in stats.report()}
+    sync = report['sync']['sim_time']
+    assert sync['n'] == 4
+    assert sync['mean'] == pytest.approx(np.mean(times))
+    assert sync['std'] == pytest.approx(np.std(times, ddof=1))
+    assert (sync['min'], sync['max']) == (10.0, 16.0)
+    assert sync['p50'] == pytest.approx(13.0)
+    assert sync['ci95'][0] < sync['mean'] < sync['ci95'][1]
+    # runs without a completion time are left out of that metric only
+    assert report['async']['sim_time']['n'] == 1
+    assert report['async']['msg_count']['n'] == 2
+
+
+def test_incremental_updates_match_a_full_pass(store):
+    rng = np.random.default_rng(1)
+    first = [record('sync', float(t), int(m)) for t, m in zip(rng.uniform(0, 100, 50), rng.integers(0, 1000, 50))]
+    second = [record('sync', float(t), int(m), 16) for t, m in zip(rng.uniform(0, 100, 30), rng.integers(0, 1000, 30))]
+    store.insert_many(first)
+    stats = analyser.Analyser(store)
+    stats.update()
+    store.insert_many(second)
+
+    # a new analyser picks up the stored state and only reads the new runs
+    resumed = analyser.Analyser(store)
+    assert resumed.update() == len(second)
+    assert resumed.update() == 0
+
+    full = analyser.Analyser(store)
+    full.reset()
+    assert full.update() == len(first) + len(second)
+    for a, b in zip(resumed.report(), full.report()):
+        for metric in analyser.METRICS:
+            assert a[metric]['n'] == b[metric]['n']
+            assert a[metric]['mean'] == pytest.approx(b[metric]['mean'])
+            assert a[metric]['std'] == pytest.approx(b[metric]['std'])
@@ -0,0 +1,57 @@
+"""Tests for the benchmark suite of benchmarks/suite.py."""
+
+import pytest
+
+from benchmarks import kernels, suite
+
+
+def result(**values):
+    return dict({'cell_count': 8, 'tx_range': 75, 'algorithm': 'sync', 'kernel': 'heap', 'build_time': 1.0,
+                 'wall_time': 1.0, 'events_per_s': 1000.0, 'peak_rss_mb': 100.0, 'msg_count': 10}, **values)
+
+
+def baseline(*results):
+    return {'environment': {'commit': 'abc', 'created_at': 'now'}, 'results': list(results)}
+
+
+def test_run_case_measures_a_run():
+    case = suite.run_case(4, 75, 'async', 'heap', 0, 450)
+    assert case['nodes'] == 16 and case['links'] > 0
+    assert case['events'] > 0 and case['events_per_s'] > 0
+    assert case['msg_count'] > 0 and case['peak_rss_mb'] > 0
+    # counts are deterministic for a seed, in another process too
+    again = suite.run_isolated((4, 75, 'async', 'heap', 0, 450))
+    assert (again['events'], again['msg_count']) == (case['events'], case['msg_count'])
+
+
+def test_kernels_count_the_same_events():
+    assert kernels.run_once('simpy', kernels.AsyncBFSNode, 4)[0] == kernels.run_once('heap', kernels.AsyncBFSNode, 4)[0]
+
+
+def test_best_of_keeps_the_best_measurements():
+    best = suite.best_of([result(wall_time=2.0, peak_rss_mb=90.0, events_per_s=500.0),
+                          result(wall_time=1.5, build_time=3.0, events_per_s=800.0)])
+    assert (best['build_time'], best['wall_time'], best['peak_rss_mb']) == (1.0, 1.5, 90.0)
+    assert best['events_per_s'] == 800.0
+    assert best['repeats'] == 2
+
+
+def test_compare_counts_regressions_beyond_the_threshold(capsys):
+    old = baseline(result(), result(algorithm='async'))
+    new = baseline(result(wall_time=1.05, events_per_s=700.0), result(algorithm='async', peak_rss_mb=150.0),
+                   result(cell_count=16))
+    # slower events per second and higher RSS are regressions, 5% slower wall time is not
+    assert suite.compare(old, new, 0.1) == 2
+    assert suite.compare(old, new, 0.6) == 0
+    assert '-30.0%!' in capsys.readouterr().out
+
+
+def test_compare_skips_timings_below_the_noise_floor():
+    old = baseline(result(wall_time=suite.NOISE_FLOOR / 2, build_time=suite.NOISE_FLOOR / 2))
+    new = baseline(result(wall_time=1.0, build_time=1.0, events_per_s=10.0))
+    assert suite.compare(old, new, 0.1) == 0
+
+
+@pytest.mark.parametrize('metric', ['build_time', 'peak_rss_mb'])
+def test_compare_skips_missing_measurements(metric):
+    assert suite.compare(baseline(result(**{metric: 0})), baseline(result(**{metric: 5.0})), 0.1) == 0
@@ -0,0 +1,64 @@
+"""Tests for quiescence detection and echo termination of asynchronous BFS runs."""
+
+import random
+
+import pytest
+
+import main
+import oracle
+from bfs_nodes import AsyncBFSNode, EchoAsyncBFSNode
+from source import DawnSimVis
+
+
+def network(node_class, cell_count=6, seed=2, kernel='heap', duration=450, **kwargs):
+    random.seed(seed)
+    sim = DawnSimVis.Simulator(duration, 1, 0, visual=False, time_mode='virtual', kernel=kernel, **kwargs)
+    main.create_networks([sim], [node_class], cell_count, 75)
+    for node in sim.nodes:
+        node.logging = False
+    return sim
+
+
+@pytest.mark.parametrize('kernel', ['simpy', 'heap'])
+def test_async_run_ends_on_quiescence(kernel):
+    sim = network(AsyncBFSNode, kernel=kernel)
+    metrics = sim.run()
+    assert metrics.quiescence_time is not None
+    assert metrics.end_time == metrics.quiescence_time < sim.duration
+    # headless runs schedule no shape removals, so the last event is the last delivery
+    assert metrics.completion_time == metrics.last_delivery_time == metrics.quiescence_time
+    assert oracle.verify(sim)['ok']
+
+
+def test_async_run_cut_by_the_duration_has_no_completion():
+    sim = network(AsyncBFSNode, duration=1)
+    metrics = sim.run()
+    assert metrics.quiescence_time is None and metrics.completion_time is None
+    assert metrics.end_time == 1
+
+
+def test_recorded_shape_removals_do_not_shift_completion(tmp_path):
+    sim = network(AsyncBFSNode, trace=str(tmp_path / 'run.trace'))
+    metrics = sim.run()
+    sim.recorder.close()
+    assert metrics.quiescence_time >= metrics.last_delivery_time
+    assert metrics.completion_time == metrics.last_delivery_time
+
+
+@pytest.mark.parametrize('kernel', ['simpy', 'heap'])
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_echo_completes_at_the_root_once_the_tree_is_final(kernel, seed):
+    sim = network(EchoAsyncBFSNode, cell_count=8, seed=seed, kernel=kernel)
+    snapshots = []
+    mark_completion = sim.metrics.mark_completion
+
+    def snapshot(now):
+        snapshots.append([(node.layer, node.parent) for node in sim.nodes])
+        mark_completion(now)
+
+    sim.metrics.mark_completion = snapshot
+    metrics = sim.run()
+    assert len(snapshots) == 1
+    assert snapshots[0] == [(node.layer, node.parent) for node in sim.nodes]
+    assert metrics.completion_time <= metrics.last_delivery_time <= metrics.quiescence_time
+    assert oracle.verify(sim)['ok']
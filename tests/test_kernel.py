@@ -0,0 +1,100 @@
+"""Tests for the heap kernel and its parity with simpy."""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+import simpy
+
+import main
+from bfs_nodes import SyncBFSNode, AsyncBFSNode, EchoAsyncBFSNode
+from source import DawnSimVis
+from source.DawnSim import broadcast_process
+from source.kernel import HeapEnvironment
+
+
+def deliveries(env, log):
+    return [(delay, lambda name=name: log.append((name, env.now))) for delay, name in
+            ((1, 'a'), (2, 'b'), (2, 'c'), (3, 'd'))]
+
+
+def test_schedule_runs_in_time_then_fifo_order():
+    env = HeapEnvironment()
+    log = []
+    for delay, name in ((2, 'late'), (1, 'first'), (1, 'second'), (0, 'now')):
+        env.schedule(delay, log.append, name)
+    env.run()
+    assert log == ['now', 'first', 'second', 'late']
+    assert env.now == 2
+
+
+def test_run_until_leaves_later_entries_queued():
+    env = HeapEnvironment()
+    log = []
+    env.schedule(1, log.append, 1)
+    env.schedule(5, log.append, 5)
+    env.run(until=3)
+    assert log == [1]
+    assert env.now == 3
+    assert env.peek() == 5
+
+
+def test_process_timeouts_and_interrupt():
+    env = HeapEnvironment()
+    log = []
+
+    def worker():
+        try:
+            yield env.timeout(10)
+            log.append('timeout')
+        except simpy.Interrupt as interrupt:
+            log.append((interrupt.cause, env.now))
+
+    process = env.process(worker())
+    env.schedule(4, process.interrupt, 'stop')
+    env.run()
+    assert log == [('stop', 4)]
+    assert not process.is_alive
+
+
+def test_fanout_keeps_fifo_order_with_entries_of_the_same_time():
+    # an event scheduled before the broadcast runs before the delivery due at the same time
+    heap = HeapEnvironment()
+    heap_log = []
+    heap.schedule(2, lambda: heap_log.append(('event', heap.now)))
+    heap.schedule_fanout(deliveries(heap, heap_log))
+    heap.run()
+
+    env = simpy.Environment()
+    simpy_log = []
+    env.timeout(2).callbacks.append(lambda _: simpy_log.append(('event', env.now)))
+    env.process(broadcast_process(SimpleNamespace(env=env, stopped=False), deliveries(env, simpy_log)))
+    env.run()
+
+    assert heap_log == [('a', 1), ('event', 2), ('b', 2), ('c', 2), ('d', 3)]
+    assert heap_log == simpy_log
+
+
+def test_fanout_stops_with_the_environment():
+    env = HeapEnvironment()
+    log = []
+    env.schedule_fanout([(1, lambda: (log.append(1), env.stop())), (1, lambda: log.append(2))])
+    env.run()
+    assert log == [1]
+
+
+@pytest.mark.parametrize('node_class', [SyncBFSNode, AsyncBFSNode, EchoAsyncBFSNode])
+def test_heap_kernel_gives_the_results_of_simpy(node_class):
+    results = []
+    for kernel in ('simpy', 'heap'):
+        random.seed(2)
+        sim = DawnSimVis.Simulator(450, 1, 0, visual=False, time_mode='virtual', kernel=kernel)
+        main.create_networks([sim], [node_class], 6, 75)
+        for node in sim.nodes:
+            node.logging = False
+        metrics = sim.run()
+        results.append((metrics.msg_count, dict(metrics.received), metrics.completion_time,
+                        [node.layer for node in sim.nodes]))
+    (count, received, completion, layers), expected = results[1], results[0]
+    assert (count, received, layers) == (expected[0], expected[1], expected[3])
+    assert completion == pytest.approx(expected[2])
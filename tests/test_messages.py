@@ -0,0 +1,75 @@
+"""Tests for compact messages and the table-driven dispatch of node classes."""
+
+from models.message import Message, signal
+from models.message_types import MessageTypes as MT
+from source import DawnSim
+
+
+class Recorder(DawnSim.Node):
+    def __init__(self):
+        self.calls = []
+        self.logged = []
+
+    def log(self, msg):
+        self.logged.append(msg)
+
+    @DawnSim.handles(MT.LAYER, 'val', 'src')
+    def on_layer(self, val, src):
+        self.calls.append(('layer', val, src))
+
+    @DawnSim.handles(MT.ACK, 'src')
+    @DawnSim.handles(MT.REJECT, 'src')
+    def on_answer(self, src):
+        self.calls.append(('answer', src))
+
+    @DawnSim.handles(MT.HEARTBEAT)
+    def on_heartbeat(self, pck):
+        self.calls.append(('heartbeat', pck))
+
+
+class Override(Recorder):
+    def on_layer(self, val, src):
+        self.calls.append(('override', val, src))
+
+
+def test_signals_are_shared_and_small():
+    assert signal(MT.ACK, 4) is signal(MT.ACK, 4)
+    assert signal(MT.ACK, 4) is not signal(MT.ACK, 5)
+    assert signal(MT.ACK, 4).val is None and signal(MT.ACK, 4).size == 5
+    assert Message(MT.LAYER, True, 1).size == 6
+    assert Message(MT.LAYER, 3, 1).size == 9
+    assert not hasattr(Message(MT.LAYER, 3, 1), '__dict__')
+
+
+def test_dispatch_passes_the_registered_fields():
+    node = Recorder()
+    heartbeat = signal(MT.HEARTBEAT, 2)
+    for pck in (Message(MT.LAYER, 3, 1), signal(MT.ACK, 7), signal(MT.REJECT, 8), heartbeat):
+        node.on_receive(pck)
+    assert node.calls == [('layer', 3, 1), ('answer', 7), ('answer', 8), ('heartbeat', heartbeat)]
+    assert set(Recorder.dispatch) == {MT.LAYER, MT.ACK, MT.REJECT, MT.HEARTBEAT}
+
+
+def test_unknown_types_are_logged():
+    node = Recorder()
+    node.on_receive(signal(MT.ECHO, 1))
+    node.on_receive('no type')
+    assert node.calls == [] and len(node.logged) == 2
+
+
+def test_overridden_handlers_stay_registered():
+    node = Override()
+    node.on_receive(Message(MT.LAYER, 3, 1))
+    assert node.calls == [('override', 3, 1)]
+    assert Recorder.dispatch is not Override.dispatch
+
+
+def test_rebuild_dispatch_picks_up_replaced_handlers():
+    class Patched(Recorder):
+        pass
+
+    Patched.on_answer = lambda self, src: self.calls.append(('patched', src))
+    Patched.rebuild_dispatch()
+    node = Patched()
+    node.on_receive(signal(MT.ACK, 7))
+    assert node.calls == [('patched', 7)]
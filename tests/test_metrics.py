@@ -0,0 +1,57 @@
+"""Tests for the per-simulator Metrics of a run."""
+
+import random
+
+import pytest
+
+import main
+from bfs_nodes import AsyncBFSNode, SyncBFSNode
+from models.message import Message, signal
+from models.message_types import MessageTypes as MT
+from source import DawnSimVis, config
+from source.metrics import Metrics
+
+
+def test_counts_by_type_and_node():
+    metrics = Metrics()
+    node = type('N', (), {'id': 3})()
+    metrics.on_send(node, signal(MT.ACK, 3))
+    metrics.on_send(node, Message(MT.LAYER, 1, 3))
+    metrics.on_send(node, 'no type')
+    metrics.on_receive(node, signal(MT.ACK, 1), 2.5)
+    assert metrics.sent[MT.ACK] == 1 and metrics.sent[None] == 1
+    assert metrics.sent_by_node[3] == 3
+    assert metrics.bytes_on_air == 5 + 9 + config.SIM_PACKET_SIZE
+    assert metrics.msg_count == 1
+    assert metrics.last_delivery_time == 2.5
+    data = metrics.as_dict()
+    assert data['received'] == {'ACK': 1}
+    assert data['sent'] == {'ACK': 1, 'LAYER': 1, 'None': 1}
+
+
+def test_finish_records_quiescence_only_for_quiescent_runs():
+    metrics = Metrics()
+    metrics.start()
+    metrics.finish(7.0)
+    assert (metrics.end_time, metrics.quiescence_time) == (7.0, None)
+    assert metrics.wall_time >= 0
+    metrics.finish(4.0, quiescent=True)
+    assert metrics.quiescence_time == 4.0
+
+
+def test_simulators_keep_their_own_metrics():
+    sims = []
+    for node_class in (SyncBFSNode, AsyncBFSNode):
+        random.seed(1)
+        sim = DawnSimVis.Simulator(450, 1, 0, visual=False, time_mode='virtual', kernel='heap')
+        main.create_networks([sim], [node_class], 5, 75)
+        for node in sim.nodes:
+            node.logging = False
+        sim.run()
+        sims.append(sim)
+    sync, async_ = (sim.metrics for sim in sims)
+    assert sync is not async_
+    for metrics in (sync, async_):
+        assert metrics.msg_count == sum(metrics.received_by_node.values())
+        assert sum(metrics.sent.values()) == sum(metrics.sent_by_node.values())
+    assert sync.msg_count != async_.msg_count
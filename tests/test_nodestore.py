@@ -0,0 +1,51 @@
+"""Tests for StoredNode attributes kept in the NodeStore of a simulator."""
+
+import numpy as np
+
+from source import DawnSim
+from source.nodestore import StoreField
+
+
+class CounterNode(DawnSim.StoredNode):
+    __slots__ = ()
+
+    count = StoreField(np.int32, 0)
+    parent = StoreField(np.int32, None)
+
+
+def make_sim(n=4):
+    sim = DawnSim.Simulator(10, kernel='heap', time_mode='virtual')
+    sim.add_nodes(CounterNode, [(i * 10.0, 0) for i in range(n)], 15)
+    return sim
+
+
+def test_fields_are_columns_of_the_store():
+    sim = make_sim()
+    node = sim.nodes[2]
+    assert node.count == 0 and node.parent is None
+    node.count = 5
+    node.parent = 1
+    assert sim.node_store['count'].tolist() == [0, 0, 5, 0]
+    assert sim.node_store['parent'].tolist() == [-1, -1, 1, -1]
+    assert node.pos == (20.0, 0.0)
+    assert [n.id for _, n in node.neighbor_distance_list] == [1, 3]
+
+
+def test_reading_timers_creates_no_sets():
+    sim = make_sim()
+    assert all(not n.timers for n in sim.nodes)
+    assert sim.node_store.timers == {}
+
+
+def test_timer_sets_exist_only_while_timers_are_pending():
+    sim = make_sim()
+    node = sim.nodes[1]
+    timer = node.set_timer(1, lambda: None)
+    assert node.timers == {timer}
+    assert list(sim.node_store.timers) == [1]
+    timer.kill()
+    assert sim.node_store.timers == {}
+    node.set_timer(1, lambda: None)
+    sim.run()
+    assert sim.node_store.timers == {}
+    assert not node.timers
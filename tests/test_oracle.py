@@ -0,0 +1,71 @@
+"""Tests for the reference BFS and the verification of BFS trees in oracle.py."""
+
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import main
+import oracle
+from bfs_nodes import SyncBFSNode, AsyncBFSNode
+from source import DawnSimVis
+from source.adjacency import in_range_csr
+
+
+def line_network(layers, parents):
+    # four nodes on a line 10 apart with range 15, and an isolated node far away
+    positions = [(0, 0), (10, 0), (20, 0), (30, 0), (500, 500)]
+    nodes = [SimpleNamespace(pos=pos, tx_range=15, layer=layer, parent=parent)
+             for pos, layer, parent in zip(positions, layers, parents)]
+    return SimpleNamespace(nodes=nodes, node_store=None)
+
+
+def test_bfs_layers():
+    indptr, indices, _ = in_range_csr(np.array([(0, 0), (10, 0), (20, 0), (500, 500)], float),
+                                      np.full(4, 15.0))
+    assert oracle.bfs_layers(indptr, indices, 0).tolist() == [0, 1, 2, -1]
+    assert oracle.bfs_layers(indptr, indices, 3).tolist() == [-1, -1, -1, 0]
+
+
+def test_verify_accepts_a_correct_tree():
+    check = oracle.verify(line_network([0, 1, 2, 3, None], [None, 0, 1, 2, None]))
+    assert check['ok']
+    assert (check['nodes'], check['reachable'], check['rounds'], check['diameter_lb']) == (5, 4, 3, 3)
+
+
+@pytest.mark.parametrize('layers, parents, errors', [
+    ([0, 1, 1, 3, None], [None, 0, 1, 2, None], {'layer_errors': 1}),
+    ([0, 1, 2, 3, None], [None, 0, 0, 2, None], {'parent_errors': 1}),
+    ([0, 1, 2, 3, None], [None, 0, 1, None, None], {'parent_errors': 1}),
+    ([0, 1, 2, None, 1], [None, 0, 1, None, None], {'reach_errors': 2, 'layer_errors': 1, 'parent_errors': 1}),
+])
+def test_verify_counts_errors(layers, parents, errors):
+    check = oracle.verify(line_network(layers, parents))
+    assert not check['ok']
+    for key in ('layer_errors', 'parent_errors', 'reach_errors'):
+        assert check[key] == errors.get(key, 0), key
+
+
+def test_diameter_lower_bound_and_rounds():
+    rng = np.random.default_rng(4)
+    positions = rng.uniform(0, 200, (60, 2))
+    indptr, indices, _ = in_range_csr(positions, np.full(60, 40.0))
+    eccentricities = [oracle.bfs_layers(indptr, indices, i).max() for i in range(60)]
+    nodes = [SimpleNamespace(pos=tuple(p), tx_range=40.0, layer=None, parent=None) for p in positions]
+    check = oracle.verify(SimpleNamespace(nodes=nodes, node_store=None))
+    assert check['rounds'] == eccentricities[0]
+    assert check['rounds'] <= check['diameter_lb'] <= max(eccentricities)
+
+
+@pytest.mark.parametrize('node_class', [SyncBFSNode, AsyncBFSNode])
+def test_simulated_trees_verify(node_class):
+    random.seed(0)
+    sim = DawnSimVis.Simulator(450, 1, 0, visual=False, time_mode='virtual', kernel='heap')
+    main.create_networks([sim], [node_class], 6, 75)
+    for node in sim.nodes:
+        node.logging = False
+    sim.run()
+    check = oracle.verify(sim)
+    assert check['ok'], check
+    assert max(node.layer for node in sim.nodes) == check['rounds']
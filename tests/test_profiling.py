@@ -0,0 +1,77 @@
+"""Tests for the opt-in handler profiler of source/profiling.py."""
+
+import pstats
+import random
+
+import main
+from bfs_nodes import AsyncBFSNode
+from models.message_types import MessageTypes as MT
+from source import DawnSim, DawnSimVis
+from source.profiling import HandlerProfiler
+
+
+def network():
+    random.seed(0)
+    sim = DawnSimVis.Simulator(450, 1, 0, visual=False, time_mode='virtual', kernel='heap')
+    main.create_networks([sim], [AsyncBFSNode], 4, 75)
+    for node in sim.nodes:
+        node.logging = False
+    return sim
+
+
+def test_profiled_run_records_handlers_and_gives_the_same_results():
+    expected = network().run()
+    sim = network()
+    with HandlerProfiler().attach(sim) as profiler:
+        metrics = sim.run()
+    assert (metrics.msg_count, metrics.completion_time) == (expected.msg_count, expected.completion_time)
+    stats = profiler.stats
+    assert stats['AsyncBFSNode.on_receive_check'][0] == metrics.msg_count
+    assert stats['AsyncBFSNode.on_layer_receive'][0] == metrics.received[MT.LAYER]
+    assert stats['Simulator.broadcast_exec'][0] > 0
+    for calls, own, total, callers in stats.values():
+        assert calls == sum(c for c, _, _ in callers.values())
+        assert 0 <= own <= total + 1e-9
+    assert 'AsyncBFSNode.on_receive_check' in profiler.report(5)
+    assert len(profiler.report(5).splitlines()) == 6
+
+
+def test_detach_restores_the_original_functions():
+    originals = dict(vars(AsyncBFSNode))
+    dispatch = AsyncBFSNode.dispatch
+    sim = network()
+    profiler = HandlerProfiler().attach(sim)
+    assert AsyncBFSNode.on_layer_receive is not originals['on_layer_receive']
+    assert 'delayed_exec' in vars(sim)
+    profiler.detach()
+    assert {name: attr for name, attr in vars(AsyncBFSNode).items() if name != 'dispatch'} == \
+        {name: attr for name, attr in originals.items() if name != 'dispatch'}
+    assert 'delayed_exec' not in vars(sim)
+    assert AsyncBFSNode.dispatch.keys() == dispatch.keys()
+    sim.run()
+    assert profiler.stats == {}
+
+
+def test_recursive_calls_count_once_in_cumulative_time():
+    class Counter(DawnSim.Node):
+        def down(self, n):
+            return n and self.down(n - 1)
+
+    profiler = HandlerProfiler()
+    profiler._patch(Counter, 'down', 'Counter.down')
+    Counter().down(3)
+    profiler.detach()
+    calls, own, total, callers = profiler.stats['Counter.down']
+    assert calls == 4
+    assert set(callers) == {None, 'Counter.down'}
+    assert own <= total + 1e-9
+
+
+def test_dump_loads_with_pstats(tmp_path):
+    sim = network()
+    with HandlerProfiler().attach(sim) as profiler:
+        sim.run()
+    path = tmp_path / 'run.prof'
+    profiler.dump(str(path))
+    names = {func[2] for func in pstats.Stats(str(path)).stats}
+    assert names == set(profiler.stats)
@@ -0,0 +1,85 @@
+"""Tests for the SQLite result store of results.py."""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import results
+from models.message import signal
+from models.message_types import MessageTypes as MT
+from source.metrics import Metrics
+
+
+def record(iteration='it', msg_count=10, **extra):
+    return dict({'run_id': f'{iteration}-{msg_count}', 'iteration': iteration, 'algorithm': 'sync',
+                 'cell_count': 8, 'tx_range': 75.0, 'msg_count': msg_count}, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = results.ResultStore(str(tmp_path / 'results.db'))
+    yield store
+    store.close()
+
+
+def test_make_record_from_metrics_and_check():
+    metrics = Metrics()
+    node = type('N', (), {'id': 0})()
+    metrics.on_send(node, signal(MT.ACK, 0))
+    metrics.on_receive(node, signal(MT.ACK, 0), 3.0)
+    metrics.mark_completion(3.0)
+    metrics.finish(4.0)
+    check = {'ok': True, 'layer_errors': 1, 'parent_errors': 2, 'reach_errors': 0,
+             'rounds': 5, 'diameter_lb': 4}
+    rec = results.make_record(metrics, 'it', 'async', 8, 75.0, seed=3, check=check)
+    assert (rec['sim_time'], rec['end_time'], rec['msg_count']) == (3.0, 4.0, 1)
+    assert rec['received'] == {'ACK': 1} and rec['sent'] == {'ACK': 1}
+    assert (rec['verified'], rec['bfs_errors'], rec['rounds'], rec['diameter_lb']) == (1, 3, 5, 4)
+    assert 'verified' not in results.make_record(metrics, 'it', 'async', 8, 75.0)
+
+
+def test_insert_many_stores_runs_and_message_counts(store):
+    rows = [record(msg_count=n, received={'ACK': n}, sent={'ACK': 1, 'LAYER': 2}) for n in (1, 2)]
+    assert store.insert_many(rows) == 2
+    assert store.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    runs = store.conn.execute('SELECT id, msg_count, created_at FROM runs ORDER BY id').fetchall()
+    assert [r[1] for r in runs] == [1, 2]
+    assert all(r[2] is not None for r in runs)
+    assert store.message_counts(runs[1][0]) == {'ACK': (2, 1), 'LAYER': (0, 2)}
+
+
+def test_failed_batch_is_rolled_back(store):
+    with pytest.raises(sqlite3.IntegrityError):
+        store.insert_many([record(msg_count=1), record(msg_count=1)])  # duplicate run_id
+    assert store.conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0] == 0
+    assert store.insert_many([record(msg_count=1)]) == 1
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / 'results.db')
+    results.ResultStore(path).close()
+
+    def write(worker):
+        store = results.ResultStore(path)
+        try:
+            return sum(store.insert_many([record(f'w{worker}', n)]) for n in range(20))
+        finally:
+            store.close()
+
+    with ThreadPoolExecutor(4) as pool:
+        assert sum(pool.map(write, range(4))) == 80
+    store = results.ResultStore(path)
+    assert store.conn.execute('SELECT COUNT(DISTINCT run_id) FROM runs').fetchone()[0] == 80
+    store.close()
+
+
+def test_import_text(store, tmp_path):
+    legacy = tmp_path / 'output.txt'
+    legacy.write_text('16x75 1a2b3c4d Synchronous BFS Simulator, 118.0, 1582\n'
+                      '16x75 1a2b3c4d Asynchronous BFS Simulator, None, 1157\n')
+    assert store.import_text(str(legacy)) == 2
+    rows = store.conn.execute('SELECT iteration, algorithm, cell_count, tx_range, sim_time, msg_count '
+                              'FROM runs ORDER BY id').fetchall()
+    assert rows == [('1a2b3c4d', 'sync', 16, 75.0, 118.0, 1582),
+                    ('1a2b3c4d', 'async', 16, 75.0, None, 1157)]
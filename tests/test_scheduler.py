@@ -0,0 +1,71 @@
+"""Tests for the single scheduler thread running delayed commands of realtime scenes."""
+
+import threading
+
+from topovis.TopoVis import GenericPlotter, Scene, Scheduler
+
+
+def collect(scheduler, entries, timeout=5):
+    log = []
+    done = threading.Event()
+    for delay, name in entries:
+        scheduler.schedule(delay, log.append, name)
+    scheduler.schedule(max(delay for delay, _ in entries) + 0.05, done.set)
+    assert done.wait(timeout)
+    return log
+
+
+def test_commands_run_by_due_time_then_in_order():
+    scheduler = Scheduler()
+    log = collect(scheduler, [(0.2, 'late'), (0.05, 'first'), (0.05, 'second'), (0, 'now')])
+    assert log == ['now', 'first', 'second', 'late']
+    assert len(scheduler) == 0
+
+
+def test_one_thread_runs_all_commands():
+    before = threading.active_count()
+    scheduler = Scheduler()
+    log = collect(scheduler, [(0.01 * (i % 5), i) for i in range(200)])
+    assert sorted(log) == list(range(200))
+    assert threading.active_count() <= before + 1
+    assert scheduler.thread.daemon
+
+
+def test_an_earlier_command_wakes_the_thread():
+    scheduler = Scheduler()
+    log = []
+    done = threading.Event()
+    scheduler.schedule(30, log.append, 'much later')
+    scheduler.schedule(0.01, done.set)
+    assert done.wait(5)
+    assert log == []
+
+
+def test_a_failing_command_does_not_stop_the_thread(capsys):
+    scheduler = Scheduler()
+    scheduler.schedule(0, lambda: 1 / 0)
+    assert collect(scheduler, [(0.01, 'after')]) == ['after']
+    assert 'ZeroDivisionError' in capsys.readouterr().err
+
+
+def test_realtime_scene_removes_shapes_after_their_delay():
+    class Recorder(GenericPlotter):
+        def __init__(self):
+            super().__init__()
+            self.deleted = threading.Event()
+            self.shapes = []
+
+        def circle(self, x, y, r, id, linestyle, fillstyle):
+            self.shapes.append(id)
+
+        def delshape(self, id):
+            self.shapes.remove(id)
+            self.deleted.set()
+
+    scene = Scene(realtime=True)
+    plotter = Recorder()
+    scene.addPlotter(plotter)
+    scene.circle(1, 2, 3, delay=0.05)
+    assert len(plotter.shapes) == 1
+    assert plotter.deleted.wait(5)
+    assert plotter.shapes == []
@@ -0,0 +1,59 @@
+"""Tests for broadcasts and unicasts sent by nodes."""
+
+import pytest
+
+from source import DawnSim, config
+
+
+class RecordingNode(DawnSim.BaseNode):
+    """Node logging every delivery with its time."""
+
+    def init(self):
+        super().init()
+        self.log = []
+
+    def on_receive(self, pck):
+        self.log.append((pck, self.now))
+
+
+def make_sim(kernel, positions=((0, 0), (30, 0), (10, 0), (200, 0))):
+    sim = DawnSim.Simulator(10, kernel=kernel, time_mode='virtual')
+    sim.add_nodes(RecordingNode, list(positions), 50)
+    for node in sim.nodes:
+        node.init()
+    return sim
+
+
+@pytest.mark.parametrize('kernel', DawnSim.KERNELS)
+def test_broadcast_reaches_every_node_in_range_once_in_distance_order(monkeypatch, kernel):
+    monkeypatch.setattr(config, 'SIM_MESSAGGING_DELAY_TYPE', 'prop')
+    sim = make_sim(kernel)
+    sim.nodes[0].send(DawnSim.BROADCAST_ADDR, 'hello')
+    sim._run_events()
+    received = sorted((n.log[0][1], n.id) for n in sim.nodes if n.log)
+    assert [id for _, id in received] == [2, 1]
+    assert all(len(n.log) <= 1 for n in sim.nodes)
+    assert sim.now == pytest.approx(30 / config.SIM_PROPAGATION_SPEED)
+    assert sim.metrics.msg_count == 2
+    assert sum(sim.metrics.sent.values()) == 1
+
+
+@pytest.mark.parametrize('kernel', DawnSim.KERNELS)
+def test_unicast_reaches_only_a_node_in_range(monkeypatch, kernel):
+    monkeypatch.setattr(config, 'SIM_MESSAGGING_DELAY_TYPE', 'constant')
+    sim = make_sim(kernel)
+    sim.nodes[0].send(1, 'near')
+    sim.nodes[0].send(3, 'far')
+    sim._run_events()
+    assert sim.nodes[1].log == [('near', config.SIM_MESSAGGING_CONSTANT_DELAY)]
+    assert sim.nodes[3].log == []
+    assert sim.nodes[2].log == []
+
+
+@pytest.mark.parametrize('kernel', DawnSim.KERNELS)
+def test_sleeping_nodes_miss_broadcasts(kernel):
+    sim = make_sim(kernel)
+    sim.nodes[1].sleep()
+    sim.nodes[0].send(DawnSim.BROADCAST_ADDR, 'hello')
+    sim._run_events()
+    assert [n.id for n in sim.nodes if n.log] == [2]
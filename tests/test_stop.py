@@ -0,0 +1,53 @@
+"""Tests for stopping a run, from the simulation thread and from another thread."""
+
+import threading
+import time
+
+import pytest
+
+from source import DawnSim
+
+
+class TickingNode(DawnSim.BaseNode):
+    """Node restarting a timer forever, so only a stop ends the run early."""
+
+    def run(self):
+        self.set_timer(1, self.tick)
+
+    def tick(self):
+        self.set_timer(1, self.tick)
+
+
+class StoppingNode(DawnSim.BaseNode):
+    """Node stopping the run on its first delivery."""
+
+    def run(self):
+        if self.id == 0:
+            self.send(DawnSim.BROADCAST_ADDR, 'hello')
+
+    def on_receive(self, pck):
+        self.sim.stop('first delivery')
+
+
+@pytest.mark.parametrize('kernel', ['simpy', 'heap'])
+def test_stop_drops_remaining_broadcast_deliveries(kernel):
+    sim = DawnSim.Simulator(100, kernel=kernel, time_mode='virtual')
+    sim.add_nodes(StoppingNode, [(i * 10.0, 0) for i in range(5)], 100)
+    metrics = sim.run()
+    assert metrics.msg_count == 1
+    assert metrics.stop_reason == 'first delivery'
+    assert metrics.quiescence_time is None
+
+
+@pytest.mark.parametrize('kernel', ['simpy', 'heap'])
+def test_request_stop_from_another_thread(kernel):
+    # a throttled run of 1000 simulated seconds would take 10 seconds
+    sim = DawnSim.Simulator(1000, timescale=0.01, kernel=kernel, time_mode='realtime')
+    sim.add_nodes(TickingNode, [(0, 0), (10, 0)], 50)
+    threading.Timer(0.2, sim.request_stop, ('window closed',)).start()
+    start = time.perf_counter()
+    metrics = sim.run()
+    assert time.perf_counter() - start < 2
+    assert metrics.stop_reason == 'window closed'
+    assert metrics.stop_time == metrics.end_time < 1000
+    assert all(not n.timers for n in sim.nodes)
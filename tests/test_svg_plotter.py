@@ -0,0 +1,85 @@
+"""Tests for the headless SVG and PNG plotter of topovis/SvgPlotter.py."""
+
+import struct
+import zlib
+from xml.etree import ElementTree
+
+import pytest
+
+from topovis.TopoVis import Scene
+from topovis.SvgPlotter import Plotter
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+@pytest.fixture
+def scene():
+    scene = Scene()
+    plotter = Plotter()
+    scene.addPlotter(plotter)
+    scene.init(100, 80)
+    scene.linestyle('edge', color=(1, 0, 0), width=1)
+    scene.linestyle('arrow', color=(0, 0, 1), width=2, arrow='head', dash=(5, 5))
+    scene.node(0, 20, 20)
+    scene.node(1, 60, 20)
+    scene.node(2, 60, 60)
+    scene.addlink(0, 1, 'edge')
+    scene.addlink(1, 2, 'arrow')
+    return scene, plotter
+
+
+def pixels(data):
+    # decode an 8 bit RGB PNG without filters, as written by Raster.png
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks, pos = {}, 8
+    while pos < len(data):
+        (length,) = struct.unpack('>I', data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        chunks[kind] = chunks.get(kind, b'') + data[pos + 8:pos + 8 + length]
+        pos += length + 12
+    width, height, depth, color = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    assert (depth, color) == (8, 2)
+    raw = zlib.decompress(chunks[b'IDAT'])
+    stride = width * 3 + 1
+    assert len(raw) == stride * height
+    return width, height, lambda x, y: tuple(raw[y * stride + 1 + x * 3:y * stride + 4 + x * 3])
+
+
+def test_svg_has_nodes_links_and_shapes(scene):
+    scene, plotter = scene
+    shape = scene.circle(20, 20, 10, line='edge')
+    root = ElementTree.fromstring(plotter.svg())
+    assert (root.get('width'), root.get('height')) == ('100', '80')
+    circles = root.findall(SVG + 'circle')
+    lines = root.findall(SVG + 'line')
+    assert len(circles) == 4 and len(lines) == 2
+    assert [t.text for t in root.findall(SVG + 'text')] == ['0', '1', '2']
+    assert {line.get('stroke') for line in lines} == {'#ff0000', '#0000ff'}
+    assert any(line.get('marker-end') for line in lines)
+    assert root.find(SVG + 'defs') is not None
+
+    scene.delshape(shape)
+    assert len(ElementTree.fromstring(plotter.svg()).findall(SVG + 'circle')) == 3
+
+
+def test_png_draws_nodes_and_links(scene):
+    scene, plotter = scene
+    width, height, pixel = pixels(plotter.png())
+    assert (width, height) == (100, 80)
+    assert pixel(5, 75) == (255, 255, 255)
+    assert pixel(40, 20) == (255, 0, 0)
+    assert pixel(60, 40) == (0, 0, 255)
+    color, fill, _, r = plotter.nodeStyle(scene.nodes[0])
+    # outline of the node left of its center, away from its link
+    assert pixel(int(20 - r), 20) == tuple(int(c * 255) for c in color)
+    if fill is None:
+        assert pixel(20, 20) == (255, 255, 255)
+
+
+def test_save_numbers_frames(scene, tmp_path):
+    _, plotter = scene
+    first = plotter.save(str(tmp_path / 'frame%d.svg'))
+    second = plotter.save(str(tmp_path / 'frame%d.png'))
+    assert first.endswith('frame0.svg') and second.endswith('frame1.png')
+    assert open(first).read().startswith('<svg')
+    assert open(second, 'rb').read(8) == b'\x89PNG\r\n\x1a\n'
@@ -0,0 +1,31 @@
+"""Tests for the parameter sweep runner."""
+
+import sweep
+
+
+def test_plan_covers_every_combination_with_one_seed_per_iteration():
+    runs = sweep.plan([8, 16], [75, 100], ['sync', 'async'], 3, 42)
+    assert len(runs) == 2 * 2 * 3 * 2
+    assert runs == sweep.plan([8, 16], [75, 100], ['sync', 'async'], 3, 42)
+    iterations = {}
+    for cell_count, tx_range, algorithm, iteration_id, seed in runs:
+        iterations.setdefault(iteration_id, set()).add((cell_count, tx_range, seed))
+    assert len(iterations) == 12
+    # all algorithms of an iteration share its configuration and seed
+    assert all(len(configs) == 1 for configs in iterations.values())
+
+
+def test_run_one_is_reproducible_from_its_seed():
+    first = sweep.run_one(6, 75, 'async', 'abc', 7, verify=True)
+    second = sweep.run_one(6, 75, 'async', 'abc', 7, verify=True)
+    for key in ('msg_count', 'sim_time', 'received', 'verified', 'rounds'):
+        assert first[key] == second[key]
+    assert first['verified'] == 1
+    assert first['seed'] == 7
+
+
+def test_sweep_reports_failed_runs_and_completes_the_others(capsys):
+    runs = [(6, 75, 'sync', 'a', 1), (6, 75, 'missing', 'b', 2), (6, 75, 'echo', 'a', 1)]
+    results = list(sweep.sweep(runs, workers=2))
+    assert sorted(r['algorithm'] for r in results) == ['echo', 'sync']
+    assert "6x75 b missing (seed 2) failed" in capsys.readouterr().err
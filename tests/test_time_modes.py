@@ -0,0 +1,67 @@
+"""Tests for the time modes of the simulator."""
+
+import random
+import time
+
+import pytest
+
+import main
+from bfs_nodes import AsyncBFSNode
+from source import DawnSim, DawnSimVis
+
+
+class TickingNode(DawnSim.BaseNode):
+    """Node with a timer firing every simulated second until the duration."""
+
+    def run(self):
+        self.ticks = 0
+        self.set_timer(1, self.tick)
+
+    def tick(self):
+        self.ticks += 1
+        self.set_timer(1, self.tick)
+
+
+def timed_run(kernel, time_mode, duration=20, timescale=0.01):
+    sim = DawnSim.Simulator(duration, timescale=timescale, kernel=kernel, time_mode=time_mode)
+    sim.add_nodes(TickingNode, [(0, 0)], 10)
+    start = time.perf_counter()
+    metrics = sim.run()
+    return sim, metrics, time.perf_counter() - start
+
+
+@pytest.mark.parametrize('kernel', DawnSim.KERNELS)
+def test_realtime_is_throttled_and_virtual_is_not(kernel):
+    sim, metrics, wall = timed_run(kernel, 'realtime')
+    assert wall >= 0.15
+    assert sim.nodes[0].ticks == 19
+    sim, metrics, wall = timed_run(kernel, 'virtual', timescale=10)
+    assert wall < 1
+    assert sim.nodes[0].ticks == 19
+    assert metrics.end_time == 20
+
+
+def test_bounded_throttles_only_a_visual_simulator():
+    assert DawnSim.Simulator(10, time_mode='bounded').time_mode == 'virtual'
+    assert DawnSimVis.Simulator(10, visual=False, time_mode='bounded').time_mode == 'virtual'
+
+
+def test_unknown_time_mode_and_kernel_are_rejected():
+    with pytest.raises(ValueError):
+        DawnSim.Simulator(10, time_mode='fast')
+    with pytest.raises(ValueError):
+        DawnSim.Simulator(10, kernel='wheel')
+
+
+@pytest.mark.parametrize('kernel', DawnSim.KERNELS)
+def test_time_mode_does_not_change_results(kernel):
+    counts = []
+    for time_mode, timescale in (('virtual', 1), ('realtime', 0.001)):
+        random.seed(3)
+        sim = DawnSimVis.Simulator(100, timescale, 0, visual=False, time_mode=time_mode, kernel=kernel)
+        main.create_networks([sim], [AsyncBFSNode], 4, 75)
+        for node in sim.nodes:
+            node.logging = False
+        metrics = sim.run()
+        counts.append((metrics.msg_count, metrics.completion_time))
+    assert counts[0] == counts[1]
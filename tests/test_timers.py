@@ -0,0 +1,71 @@
+"""Tests for the TimerService of a simulator."""
+
+import pytest
+
+from source import DawnSim
+
+
+class PingNode(DawnSim.BaseNode):
+    """Node 0 pings node 1 with a long timeout, and kills the timeout when the pong arrives."""
+
+    def init(self):
+        super().init()
+        self.timed_out = False
+
+    def run(self):
+        if self.id == 0:
+            self.timeout_timer = self.set_timer(50, self.on_timeout)
+            self.send(1, 'ping')
+
+    def on_receive(self, pck):
+        if pck == 'ping':
+            self.send(0, 'pong')
+        else:
+            self.timeout_timer.kill()
+
+    def on_timeout(self):
+        self.timed_out = True
+
+
+class ChurningNode(DawnSim.BaseNode):
+    """Node resetting one timer many times, leaving an event of a killed timer each time."""
+
+    def run(self):
+        self.timer = self.set_timer(100, self.on_timeout)
+        for _ in range(3000):
+            self.timer.reset()
+
+    def on_timeout(self):
+        pass
+
+
+@pytest.mark.parametrize('kernel', ['simpy', 'heap'])
+def test_killed_timer_does_not_delay_quiescence(kernel):
+    sim = DawnSim.Simulator(100, kernel=kernel, time_mode='virtual')
+    sim.add_nodes(PingNode, [(0, 0), (10, 0)], 50)
+    metrics = sim.run()
+    assert not sim.nodes[0].timed_out
+    assert metrics.msg_count == 2
+    assert metrics.quiescence_time == metrics.last_delivery_time < 50
+    assert sim.timer_service.pending == 0
+    assert sim.timer_service.stale == 0
+
+
+def test_dead_timer_events_are_purged():
+    sim = DawnSim.Simulator(200, kernel='heap', time_mode='virtual')
+    sim.add_nodes(ChurningNode, [(0, 0)], 50)
+    sim.nodes[0].run()
+    assert len(sim.env._queue) <= DawnSim.TimerService.PURGE_THRESHOLD + 2
+    assert sim.timer_service.stale == len(sim.env._queue) - sim.timer_service.pending
+
+
+@pytest.mark.parametrize('kernel', ['simpy', 'heap'])
+def test_stop_resets_timer_counts(kernel):
+    sim = DawnSim.Simulator(100, kernel=kernel, time_mode='virtual')
+    sim.add_nodes(PingNode, [(0, 0), (10, 0)], 50)
+    sim.nodes[0].run()
+    sim.nodes[0].timeout_timer.reset()
+    sim.stop('test')
+    assert sim.timer_service.pending == 0
+    assert sim.timer_service.stale == 0
+    assert not sim.nodes[0].timers
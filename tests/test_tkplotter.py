@@ -0,0 +1,231 @@
+"""Tests for the buffered drawing of the Tk plotter, on a canvas double that needs no display."""
+
+import threading
+from collections import Counter
+
+from topovis.TopoVis import Scene
+from topovis.TkPlotter import Plotter
+
+
+class FakeCanvas:
+    """Keeps the items and tags a Tk canvas would have and counts the calls made to it."""
+
+    def __init__(self):
+        self.items = {}
+        self.options = {}
+        self.calls = Counter()
+        self.next = 0
+
+    def _create(self, kind, *coords, tags=(), **options):
+        self.calls['create_' + kind] += 1
+        self.next += 1
+        self.items[self.next] = (kind, {tags} if isinstance(tags, str) else set(tags))
+        return self.next
+
+    def create_oval(self, *args, **kwargs):
+        return self._create('oval', *args, **kwargs)
+
+    def create_line(self, *args, **kwargs):
+        return self._create('line', *args, **kwargs)
+
+    def create_rectangle(self, *args, **kwargs):
+        return self._create('rectangle', *args, **kwargs)
+
+    def create_text(self, *args, **kwargs):
+        return self._create('text', *args, **kwargs)
+
+    def delete(self, *items):
+        self.calls['delete'] += 1
+        for item in items:
+            for id in [id for id, (_, tags) in self.items.items() if id == item or item in tags]:
+                del self.items[id]
+
+    def coords(self, item, *coords):
+        self.calls['coords'] += 1
+
+    def itemconfigure(self, item, **options):
+        self.calls['itemconfigure'] += 1
+        self.options.setdefault(item, {}).update(options)
+
+    def count(self, kind):
+        return sum(1 for k, _ in self.items.values() if k == kind)
+
+
+class FakeTk:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append((ms, func))
+
+
+class HeadlessPlotter(Plotter):
+    def prepareCanvas(self, terrain_size=None):
+        self.tk = FakeTk()
+        self.canvas = FakeCanvas()
+        self.viewSize = terrain_size or (700, 700)
+        self.timeText = self.canvas.create_text(0, 0)
+
+
+def make_scene(**kwargs):
+    scene = Scene()
+    plotter = HeadlessPlotter(terrain_size=(200, 200), **kwargs)
+    scene.addPlotter(plotter)
+    scene.init(200, 200)
+    scene.linestyle('edge', color=(.7, .7, .7), width=1)
+    scene.linestyle('tx', color=(0, 0, 1), dash=(5, 5))
+    return scene, plotter
+
+
+def frame(plotter):
+    plotter.drain()
+    plotter.flush()
+    return plotter.canvas
+
+
+def test_commands_on_one_node_are_drawn_once_per_frame():
+    scene, plotter = make_scene()
+    scene.node(0, 20, 20)
+    for x in range(21, 60):
+        scene.nodemove(0, x, 20)
+    scene.nodecolor(0, 1, 0, 0)
+    canvas = frame(plotter)
+    # one oval and one label, each placed once
+    assert canvas.count('oval') == 1
+    assert canvas.calls['coords'] == 2
+    scene.nodemove(0, 80, 20)
+    scene.nodemove(0, 90, 20)
+    canvas.calls.clear()
+    frame(plotter)
+    assert canvas.calls['coords'] == 2 and canvas.count('oval') == 1
+
+
+def test_shapes_and_links_undone_in_the_same_frame_are_never_drawn():
+    scene, plotter = make_scene()
+    scene.node(0, 20, 20)
+    scene.node(1, 60, 20)
+    canvas = frame(plotter)
+    canvas.calls.clear()
+    shape = scene.circle(20, 20, 30, line='tx')
+    scene.delshape(shape)
+    scene.addlink(0, 1, 'edge')
+    scene.dellink(1, 0, 'edge')
+    frame(plotter)
+    assert canvas.calls['create_oval'] == 0 and canvas.calls['create_line'] == 0
+    assert plotter.links == {} and plotter.shapes == {}
+
+
+def test_links_follow_their_nodes_and_shapes_are_replaced():
+    scene, plotter = make_scene()
+    scene.node(0, 20, 20)
+    scene.node(1, 60, 20)
+    scene.addlink(1, 0, 'edge')
+    shape = scene.circle(20, 20, 30, line='tx')
+    canvas = frame(plotter)
+    assert list(plotter.links) == [(0, 1, 'edge')]
+    assert canvas.count('line') == 1 and canvas.count('oval') == 3
+    scene.circle(30, 20, 30, id=shape, line='tx')
+    scene.nodemove(1, 70, 20)
+    canvas.calls.clear()
+    frame(plotter)
+    assert canvas.count('oval') == 3
+    # the moved node and its link
+    assert canvas.calls['coords'] == 3
+
+
+def test_commands_of_other_threads_wait_for_the_tk_loop():
+    scene, plotter = make_scene()
+    canvas = plotter.canvas
+    items = dict(canvas.items)
+
+    def simulate():
+        for id in range(50):
+            scene.node(id, 4 * id, 20)
+        scene.addlinks([(id, id + 1, 'edge') for id in range(49)])
+
+    thread = threading.Thread(target=simulate)
+    thread.start()
+    thread.join()
+    # nothing but the queue was touched off the Tk thread
+    assert canvas.items == items and not canvas.calls['coords']
+    assert len(plotter.commands) == 51
+    ms, tick = plotter.tk.scheduled[-1]
+    assert ms == 1000 // plotter.fps
+    tick()
+    assert not plotter.commands
+    assert canvas.count('oval') == 50 and canvas.count('line') == 49
+    # every frame schedules the next one
+    assert plotter.tk.scheduled[-1][1] == plotter.frame
+
+
+def test_drain_takes_only_the_commands_queued_before_it():
+    scene, plotter = make_scene()
+    scene.node(0, 20, 20)
+    plotter.commands.append((lambda self: scene.node(1, 60, 20), ()))
+    plotter.drain()
+    assert list(plotter.pending.newNodes) == [0]
+    assert len(plotter.commands) == 1
+    frame(plotter)
+    assert plotter.canvas.count('oval') == 2
+
+
+class Event:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def test_only_nodes_and_links_in_view_have_items():
+    scene, plotter = make_scene()
+    scene.node(0, 20, 20)
+    scene.node(1, 60, 20)
+    scene.node(2, 1000, 1000)
+    scene.node(3, 1050, 1000)
+    scene.addlinks([(0, 1, 'edge'), (1, 2, 'edge'), (2, 3, 'edge')])
+    canvas = frame(plotter)
+    assert set(plotter.nodes) == {0, 1}
+    assert canvas.count('oval') == 2
+    # a link crossing the view is drawn, one beside it is not
+    assert plotter.links[(1, 2, 'edge')] is not None and plotter.links[(2, 3, 'edge')] is None
+    assert canvas.count('line') == 2
+    # drag the far nodes into view
+    plotter.onDragStart(Event(0, 0))
+    plotter.onDrag(Event(-900, -900))
+    frame(plotter)
+    assert set(plotter.nodes) == {2, 3}
+    assert canvas.count('oval') == 2
+    assert plotter.links[(2, 3, 'edge')] is not None and plotter.links[(0, 1, 'edge')] is None
+
+
+def test_edges_are_hidden_while_too_many_are_in_view():
+    scene, plotter = make_scene(maxEdges=2)
+    scene.linestyle('tree', color=(0, 1, 0), width=2)
+    for id in range(4):
+        scene.node(id, 20 + 40 * id, 20)
+    scene.addlinks([(id, id + 1, 'edge') for id in range(3)])
+    scene.addlink(0, 1, 'tree')
+    canvas = frame(plotter)
+    assert plotter.edgesHidden and plotter.edgesInView == 3
+    assert [l for l, item in plotter.links.items() if item is not None] == [(0, 1, 'tree')]
+    assert 'edges hidden' in canvas.options[plotter.timeText]['text']
+    # zoom in on the first two nodes, leaving one edge in view
+    plotter.zoomAt(0, 0, 3)
+    frame(plotter)
+    assert not plotter.edgesHidden
+    assert plotter.links[(0, 1, 'edge')] is not None and plotter.links[(2, 3, 'edge')] is None
+
+
+def test_shapes_and_labels_are_left_out_when_zoomed_out():
+    scene, plotter = make_scene(shapeZoom=0.5)
+    scene.node(0, 20, 20)
+    shape = scene.circle(20, 20, 30, line='tx')
+    canvas = frame(plotter)
+    assert plotter.shapes[shape] is not None
+    (oval, label) = plotter.nodes[0]
+    assert canvas.options[label]['text'] == '0'
+    plotter.zoomAt(0, 0, 0.25)
+    frame(plotter)
+    assert plotter.shapes[shape] is None and canvas.count('oval') == 1
+    assert canvas.options[plotter.nodes[0][1]]['text'] == ''
+    plotter.zoomAt(0, 0, 4)
+    frame(plotter)
+    assert plotter.shapes[shape] is not None and canvas.count('oval') == 2
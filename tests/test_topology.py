@@ -0,0 +1,116 @@
+"""Tests for topologies in shared memory, see source/topology.py."""
+
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import main
+from bfs_nodes import AsyncBFSNode, CompactAsyncBFSNode
+from source import DawnSimVis
+from source.adjacency import find_neighbor
+from source.topology import SharedTopology
+
+
+def simulator():
+    return DawnSimVis.Simulator(450, 1, 0, visual=False, time_mode='virtual', kernel='heap')
+
+
+def rows(adjacency, size):
+    result = []
+    for id in range(size):
+        lo, hi, indices, dists, delays = adjacency.row(id)
+        result.append((list(indices[lo:hi]), list(dists[lo:hi]), list(delays[lo:hi])))
+    return result
+
+
+def run(sim):
+    if sim.node_store is not None:
+        sim.node_store.logging = False
+    else:
+        for node in sim.nodes:
+            node.logging = False
+    # message delays are drawn from the global random state
+    random.seed(0)
+    metrics = sim.run()
+    return metrics.msg_count, metrics.completion_time, [node.layer for node in sim.nodes]
+
+
+def run_attached(spec, node_class):
+    with SharedTopology.attach(spec) as topology:
+        sim = simulator()
+        sim.add_shared_nodes(node_class, topology)
+        return run(sim)
+
+
+@pytest.fixture
+def positions():
+    random.seed(3)
+    return main.create_positions(6)
+
+
+def test_rows_equal_a_build(positions):
+    built = simulator()
+    built.add_nodes(AsyncBFSNode, positions, 75)
+    with SharedTopology.create(positions, 75) as topology:
+        assert topology.size == len(positions)
+        assert topology.positions.tolist() == [list(p) for p in positions]
+        shared = simulator()
+        shared.add_shared_nodes(AsyncBFSNode, topology)
+        assert [node.pos for node in shared.nodes] == [node.pos for node in built.nodes]
+        assert rows(shared.adjacency, len(positions)) == rows(built.adjacency, len(positions))
+
+
+@pytest.mark.parametrize('node_class', [AsyncBFSNode, CompactAsyncBFSNode])
+def test_attached_simulators_give_the_results_of_a_build(positions, node_class):
+    built = simulator()
+    built.add_nodes(node_class, positions, 75)
+    expected = run(built)
+    with SharedTopology.create(positions, 75) as topology, ProcessPoolExecutor(1) as pool:
+        assert pool.submit(run_attached, topology.spec, node_class).result() == expected
+        assert run_attached(topology.spec, node_class) == expected
+
+
+def test_shared_nodes_need_an_empty_network(positions):
+    sim = simulator()
+    sim.add_nodes(AsyncBFSNode, positions[:1], 75)
+    with SharedTopology.create(positions, 75) as topology:
+        with pytest.raises(ValueError):
+            sim.add_shared_nodes(AsyncBFSNode, topology)
+
+
+def test_moved_nodes_do_not_change_the_block(positions):
+    with SharedTopology.create(positions, 75) as topology:
+        before = rows(topology.adjacency(), topology.size)
+        sim = simulator()
+        sim.add_shared_nodes(AsyncBFSNode, topology)
+        sim.nodes[0].pos = (1000.0, 1000.0)
+        sim.adjacency.update(sim.nodes, 0)
+        assert sim.adjacency.degree(0) == 0
+        assert rows(topology.adjacency(), topology.size) == before
+
+
+def test_close_removes_the_block_of_the_owner(positions):
+    topology = SharedTopology.create(positions, 75)
+    spec = topology.spec
+    attached = SharedTopology.attach(spec)
+    attached.close()
+    # closing an attached topology leaves the block of its owner alone
+    SharedTopology.attach(spec).close()
+    topology.close()
+    topology.close()
+    with pytest.raises(FileNotFoundError):
+        SharedTopology.attach(spec)
+
+
+def test_find_neighbor_in_array_and_shared_rows(positions):
+    with SharedTopology.create(positions, 75) as topology:
+        lo, hi = topology.indptr[7], topology.indptr[8]
+        row = list(topology.indices[lo:hi])
+        copy = array('i', topology.indices)
+        for indices in (topology.indices, copy):
+            for k, id in enumerate(row):
+                assert find_neighbor(indices, lo, hi, id) == lo + k
+            assert find_neighbor(indices, lo, hi, 7) is None
+            assert find_neighbor(indices, lo, lo, row[0]) is None
@@ -0,0 +1,71 @@
+"""Round-trip tests for binary scene traces."""
+
+import numpy as np
+import pytest
+
+from topovis import Scene, LineStyle
+from topovis.trace import TraceRecorder, TraceReader
+
+
+def record(path, commands):
+    scene = Scene()
+    recorder = TraceRecorder(str(path))
+    scene.addPlotter(recorder)
+    for time, cmd, args in commands:
+        recorder.setTime(time)
+        getattr(recorder, cmd)(*args)
+    recorder.close()
+    return TraceReader(str(path))
+
+
+def test_round_trip_keeps_commands_times_and_values(tmp_path):
+    style = LineStyle(color=(1, 0, 0), width=2)
+    commands = [
+        (0.0, 'init', (100, 200)),
+        (0.0, 'node', (0, 10.5, 20.25)),
+        (1.5, 'nodelabel', (0, 'root')),
+        (1.5, 'nodehollow', (0, True)),
+        (2.0, 'addlinks', ([(0, 1, 'edge'), (1, 2, 'edge')],)),
+        (2.5, 'line', (0, 0, 5, 5, '_12', style)),
+        (3.0, 'delshape', ('_12',)),
+        (3.0, 'node', (2 ** 40, -1.0, 0.0)),
+    ]
+    reader = record(tmp_path / 'scene.trace', commands)
+    assert len(reader) == len(commands)
+    assert reader.duration == 3.0
+    for (time, cmd, args), (r_time, r_cmd, r_args, r_kwargs) in zip(commands, reader.records):
+        assert (r_time, r_cmd) == (time, cmd)
+        if cmd == 'line':
+            assert r_args[:5] == args[:5]
+            assert vars(r_args[5]) == vars(style)
+        else:
+            assert list(r_args) == [list(a) if isinstance(a, list) else a for a in args]
+        assert r_kwargs == {}
+    assert reader.index(1.5) == 4
+
+
+def test_round_trip_of_numpy_scalars(tmp_path):
+    pos = np.array([[12.5, 7.25]])
+    commands = [
+        (0.0, 'node', (np.int64(3), pos[0, 0], pos[0, 1])),
+        (1.0, 'nodehollow', (np.int32(3), np.bool_(True))),
+        (2.0, 'nodescale', (3, np.float32(1.5))),
+    ]
+    reader = record(tmp_path / 'numpy.trace', commands)
+    assert [(c, a) for _, c, a, _ in reader.records] == [
+        ('node', (3, 12.5, 7.25)), ('nodehollow', (3, True)), ('nodescale', (3, 1.5))]
+    assert type(reader.records[1][2][1]) is bool
+
+
+def test_unsupported_value_is_rejected(tmp_path):
+    recorder = TraceRecorder(str(tmp_path / 'bad.trace'))
+    with pytest.raises(Exception):
+        recorder.nodelabel(0, object())
+    recorder.close()
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.trace'
+    path.write_bytes(b'not a trace')
+    with pytest.raises(Exception):
+        TraceReader(str(path))
@@ -0,0 +1,256 @@
+"""
+Headless plotter rendering the scene to SVG or PNG files.  Nothing but the
+standard library is needed, so it works without Tk or a display, e.g. in
+the worker processes of a parameter sweep.
+"""
+import struct
+import zlib
+from math import cos, sin, pi
+from xml.sax.saxutils import escape
+
+from .common import *
+from . import GenericPlotter
+
+def svgColor(color):
+    if color is None:
+        return 'none'
+    return '#%02x%02x%02x' % tuple(int(x*255) for x in color)
+
+###############################################
+class Raster:
+    """
+    Minimal RGB raster with just what PNG frames need: lines, discs and PNG
+    encoding
+    """
+    def __init__(self, width, height, bg=(1,1,1)):
+        self.width = width
+        self.height = height
+        pixel = bytes(int(x*255) for x in bg)
+        self.pixels = bytearray(pixel * (width*height))
+
+    ###################
+    def dot(self, x, y, rgb, size=1):
+        half = size // 2
+        for py in range(max(y-half, 0), min(y-half+size, self.height)):
+            start = (py*self.width + max(x-half, 0)) * 3
+            end = (py*self.width + min(x-half+size, self.width)) * 3
+            if end > start:
+                self.pixels[start:end] = rgb * ((end-start)//3)
+
+    ###################
+    def line(self, x1, y1, x2, y2, color, width=1):
+        rgb = bytes(int(x*255) for x in color)
+        (x1,y1,x2,y2) = (int(round(x1)), int(round(y1)), int(round(x2)), int(round(y2)))
+        steps = max(abs(x2-x1), abs(y2-y1), 1)
+        for i in range(steps+1):
+            self.dot(x1 + (x2-x1)*i//steps, y1 + (y2-y1)*i//steps, rgb, width)
+
+    ###################
+    def disc(self, x, y, r, color):
+        rgb = bytes(int(c*255) for c in color)
+        for dy in range(-int(r), int(r)+1):
+            half = int((r*r - dy*dy) ** 0.5)
+            py = int(round(y)) + dy
+            if 0 <= py < self.height:
+                x1 = max(int(round(x)) - half, 0)
+                x2 = min(int(round(x)) + half + 1, self.width)
+                if x2 > x1:
+                    start = (py*self.width + x1) * 3
+                    self.pixels[start:start+(x2-x1)*3] = rgb * (x2-x1)
+
+    ###################
+    def circle(self, x, y, r, color, width=1):
+        # outline drawn as short chords, enough for transient shapes
+        points = max(int(r), 8)
+        prev = (x + r, y)
+        for i in range(1, points+1):
+            a = 2*pi*i/points
+            cur = (x + r*cos(a), y + r*sin(a))
+            self.line(prev[0], prev[1], cur[0], cur[1], color, width)
+            prev = cur
+
+    ###################
+    def png(self):
+        def chunk(kind, data):
+            return (struct.pack('>I', len(data)) + kind + data
+                    + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+        stride = self.width*3
+        raw = b''.join(b'\0' + bytes(self.pixels[y*stride:(y+1)*stride])
+                for y in range(self.height))
+        return (b'\x89PNG\r\n\x1a\n'
+                + chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0))
+                + chunk(b'IDAT', zlib.compress(raw, 6))
+                + chunk(b'IEND', b''))
+
+###############################################
+class Plotter(GenericPlotter):
+    """
+    Plotter saving the current scene as an SVG or PNG image, see save().
+    Nodes and links are read from the scene when an image is saved, so
+    commands cost nothing until then; only shapes are tracked as they come.
+    PNG images leave out node labels and line dashes.
+    """
+    def __init__(self, params=None, labels=True):
+        GenericPlotter.__init__(self, params)
+        self.labels = labels
+        self.shapes = {}    # shape id -> (kind, coords, linestyle, fillstyle)
+        self.frames = 0
+
+    ###################
+    def circle(self,x,y,r,id,linestyle,fillstyle):
+        self.shapes[id] = ('circle', (x,y,r), linestyle, fillstyle)
+
+    ###################
+    def line(self,x1,y1,x2,y2,id,linestyle):
+        self.shapes[id] = ('line', (x1,y1,x2,y2), linestyle, None)
+
+    ###################
+    def rect(self,x1,y1,x2,y2,id,linestyle,fillstyle):
+        self.shapes[id] = ('rect', (x1,y1,x2,y2), linestyle, fillstyle)
+
+    ###################
+    def delshape(self,id):
+        self.shapes.pop(id, None)
+
+    ###################
+    def size(self):
+        """
+        Return the image size: the terrain given to init(), or the extent of
+        the nodes if the scene was not initialized
+        """
+        p = self.params
+        (tx,ty) = self.scene.dim
+        if not tx or not ty:
+            tx = max([n.pos[0] for n in self.scene.nodes.values()] + [0]) + p.nodesize*2
+            ty = max([n.pos[1] for n in self.scene.nodes.values()] + [0]) + p.nodesize*2
+        return int(tx*p.scale), int(ty*p.scale)
+
+    ###################
+    def nodeStyle(self, node):
+        """
+        Return outline color, fill color (None if hollow), outline width and
+        radius of a node, resolving DEFAULT attributes from the parameters
+        """
+        p = self.params
+        color = tuple(p.nodecolor) if node.color == DEFAULT else node.color
+        hollow = p.hollow if node.hollow == DEFAULT else node.hollow
+        width = p.nodewidth if node.width == DEFAULT else node.width
+        return color, (None if hollow else color), width, node.scale*p.nodesize*p.scale
+
+    ###################
+    def linkLines(self):
+        """
+        Yield end points and line style of every link, scaled to the image
+        """
+        s = self.params.scale
+        for (src,dst,style) in sorted(self.scene.links, key=str):
+            (x1,y1,x2,y2) = computeLinkEndPoints(self.scene.nodes[src],
+                    self.scene.nodes[dst], self.params.nodesize)
+            yield (x1*s, y1*s, x2*s, y2*s), self.scene.lineStyles[style]
+
+    ###################
+    def svg(self):
+        """
+        Return the current scene as an SVG document
+        """
+        p = self.params
+        s = p.scale
+        (w,h) = self.size()
+        markers = {}
+        body = []
+
+        def stroke(style):
+            attrs = 'stroke="%s" stroke-width="%g"' % (svgColor(style.color), style.width)
+            if style.dash:
+                attrs += ' stroke-dasharray="%s"' % ','.join(str(d) for d in style.dash)
+            if style.arrow != 'none':
+                # markers cannot take the color of their line in SVG 1.1
+                marker = markers.setdefault(svgColor(style.color), 'arrow%d' % len(markers))
+                if style.arrow in ('head', 'both'):
+                    attrs += ' marker-end="url(#%s)"' % marker
+                if style.arrow in ('tail', 'both'):
+                    attrs += ' marker-start="url(#%s)"' % marker
+            return attrs
+
+        for ((x1,y1,x2,y2),style) in self.linkLines():
+            body.append('<line x1="%.1f" y1="%.1f" x2="%.1f" y2="%.1f" %s/>'
+                    % (x1, y1, x2, y2, stroke(style)))
+        for node in self.scene.nodes.values():
+            (color,fill,width,r) = self.nodeStyle(node)
+            body.append('<circle cx="%.1f" cy="%.1f" r="%.1f" stroke="%s" stroke-width="%g" fill="%s"/>'
+                    % (node.pos[0]*s, node.pos[1]*s, r, svgColor(color), width,
+                       svgColor(fill) if fill else 'none'))
+            if self.labels:
+                body.append('<text x="%.1f" y="%.1f" fill="%s">%s</text>'
+                        % (node.pos[0]*s, node.pos[1]*s,
+                           svgColor(color) if fill is None else svgColor(p.bgcolor), escape(node.label)))
+        for (kind,coords,line,fill) in self.shapes.values():
+            c = [x*s for x in coords]
+            if kind == 'circle':
+                shape = '<circle cx="%.1f" cy="%.1f" r="%.1f"' % tuple(c)
+            elif kind == 'line':
+                shape = '<line x1="%.1f" y1="%.1f" x2="%.1f" y2="%.1f"' % tuple(c)
+            else:
+                shape = '<rect x="%.1f" y="%.1f" width="%.1f" height="%.1f"' % (
+                        min(c[0],c[2]), min(c[1],c[3]), abs(c[2]-c[0]), abs(c[3]-c[1]))
+            body.append('%s %s fill="%s"/>' % (shape, stroke(line),
+                    svgColor(fill.color if fill else None)))
+
+        head = ['<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" viewBox="0 0 %d %d"'
+                ' font-family="sans-serif" font-size="%g" text-anchor="middle" dominant-baseline="central">'
+                % (w, h, w, h, p.textsize*s),
+                '<rect width="100%%" height="100%%" fill="%s"/>' % svgColor(p.bgcolor)]
+        if markers:
+            head.append('<defs>')
+            for (color,marker) in markers.items():
+                head.append('<marker id="%s" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6"'
+                        ' markerHeight="6" orient="auto-start-reverse"><path d="M0,0L10,5L0,10z" fill="%s"/>'
+                        '</marker>' % (marker, color))
+            head.append('</defs>')
+        return '\n'.join(head + body + ['</svg>\n'])
+
+    ###################
+    def png(self):
+        """
+        Return the current scene as PNG data
+        """
+        p = self.params
+        s = p.scale
+        (w,h) = self.size()
+        raster = Raster(w, h, tuple(p.bgcolor))
+        for ((x1,y1,x2,y2),style) in self.linkLines():
+            raster.line(x1, y1, x2, y2, style.color, max(int(style.width*s), 1))
+        for node in self.scene.nodes.values():
+            (color,fill,width,r) = self.nodeStyle(node)
+            (x,y) = (node.pos[0]*s, node.pos[1]*s)
+            raster.disc(x, y, r, color)
+            raster.disc(x, y, max(r - width*s, 0), fill if fill else tuple(p.bgcolor))
+        for (kind,coords,line,fill) in self.shapes.values():
+            c = [x*s for x in coords]
+            width = max(int(line.width*s), 1)
+            if kind == 'circle':
+                raster.circle(c[0], c[1], c[2], line.color, width)
+            elif kind == 'line':
+                raster.line(c[0], c[1], c[2], c[3], line.color, width)
+            else:
+                for (a,b,cc,d) in ((0,1,2,1), (2,1,2,3), (2,3,0,3), (0,3,0,1)):
+                    raster.line(c[a], c[b], c[cc], c[d], line.color, width)
+        return raster.png()
+
+    ###################
+    def save(self, path):
+        """
+        Save the current scene to path, as PNG if it ends with .png and as
+        SVG otherwise.  A '%d' in path is replaced with the frame number, so
+        that one plotter can save a series of frames.
+        """
+        if '%d' in path:
+            path = path % self.frames
+        self.frames += 1
+        if path.lower().endswith('.png'):
+            with open(path, 'wb') as f:
+                f.write(self.png())
+        else:
+            with open(path, 'w') as f:
+                f.write(self.svg())
+        return path
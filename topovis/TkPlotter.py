@@ -3,7 +3,10 @@ try:
     from Tkinter import *
 except ImportError:  # could be Python3
     from tkinter import *
-from . import GenericPlotter
+from time import time as systime
+from collections import deque
+from . import GenericPlotter, Scene
+from .trace import TraceReader
 
 arrowMap = { 'head' : LAST, 'tail' : FIRST, 'both' : BOTH, 'none' : NONE }
 
@@ -13,18 +16,74 @@ def colorStr(color):
     else:
         return '#%02x%02x%02x' % tuple(int(x*255) for x in color)
 
+def queued(method):
+    """
+    Make a Plotter command only append its call to the command queue of the
+    plotter.  The call is applied later from the Tk loop, see Plotter.drain().
+    """
+    def enqueue(self, *args):
+        self.commands.append((method, args))
+    enqueue.__name__ = method.__name__
+    enqueue.__doc__ = method.__doc__
+    return enqueue
+
+###############################################
+class FrameBuffer:
+    """
+    Scene commands received by a Plotter since its last frame.  Commands on
+    the same object are merged, so that only their net effect is drawn.
+    """
+    def __init__(self):
+        self.newNodes = []      # ids of created nodes, in order
+        self.movedNodes = set() # ids of nodes moved or rescaled
+        self.styledNodes = set() # ids of recolored, resized or relabeled nodes
+        self.clearLinks = False
+        self.links = {}         # link -> True to show, False to delete
+        self.shapes = {}        # shape id -> (draw method, args), None to delete
+
 ###############################################
 class Plotter(GenericPlotter):
-    def __init__(self, windowTitle='TopoVis', terrain_size=None, params=None):
+    """
+    Plotter drawing the scene on a Tk canvas.  Scene commands are buffered
+    and drawn fps times per second from the Tk loop, so drawing cost follows
+    the frame rate rather than the number of commands.  Commands may come
+    from any thread: they are appended to a queue that only the Tk thread
+    reads, so the caller never touches Tk nor waits for it.
+
+    Only what is in view has items on the canvas.  The mouse wheel zooms and
+    dragging pans the view, after which the visible items are re-created.
+    The level of detail drops as the view gets crowded: 'edge' links are
+    hidden while more than maxEdges of them are in view, shapes such as
+    transmission circles are not drawn below shapeZoom, and node labels are
+    left out when nodes get too small to read them.
+    """
+    def __init__(self, windowTitle='TopoVis', terrain_size=None, params=None, fps=25,
+            maxEdges=5000, shapeZoom=0.5):
         GenericPlotter.__init__(self, params)
-        self.nodes = {}
-        self.links = {}
-        self.nodeLinks = {}
+        self.nodes = {}         # node id -> (oval, label) of nodes in view
+        self.links = {}         # link -> line, None while not drawn
+        self.nodeLinks = {}     # node id -> links of the node
         self.lineStyles = {}
-        self.shapes = {}
+        self.shapes = {}        # shape id -> item, None while not drawn
+        self.shapeSpecs = {}    # shape id -> (draw method, args)
         self.windowTitle = windowTitle
+        self.zoom = 1.0
+        self.panX = 0.0         # world position of the top left corner
+        self.panY = 0.0
+        self.maxEdges = maxEdges
+        self.shapeZoom = shapeZoom
+        self.edgesInView = 0
+        self.edgesHidden = False
+        self.viewChanged = False
         self.prepareCanvas(terrain_size)
+        self.view = self.viewRect()
         self.lastShownTime = 0
+        self.time = 0
+        self.fps = fps
+        self.pending = FrameBuffer()
+        self.commands = deque()  # (command, args) not yet in pending
+        self.trace = None
+        self.tk.after(int(1000/fps), self.frame)
 
     ###################
     def prepareCanvas(self,terrain_size=None):
@@ -39,52 +98,130 @@ class Plotter(GenericPlotter):
         frame = Frame(self.tk, width=tx, height=ty)
         frame.pack(expand=True, fill=BOTH)
 
-        ver_scrollbar = Scrollbar(frame, orient=VERTICAL)
-        ver_scrollbar.pack(side=RIGHT, fill=Y)
-
-        hor_scrollbar = Scrollbar(frame, orient=HORIZONTAL)
-        hor_scrollbar.pack(side=BOTTOM, fill=X)
-        
-        scr_width = self.tk.winfo_screenwidth() * 2
-        scr_height = self.tk.winfo_screenheight() * 2
-
-        self.canvas = Canvas(frame, width=tx, height=ty, scrollregion=(0,0, scr_width, scr_height), yscrollincrement=10, xscrollincrement=10)  
+        self.canvas = Canvas(frame, width=tx, height=ty)
         self.canvas.pack(expand=True, fill=BOTH, side=LEFT)
+        self.viewSize = (tx,ty)
 
-        ver_scrollbar.config(command=self.canvas.yview)
-        hor_scrollbar.config(command=self.canvas.xview)
-
-        self.canvas.config(yscrollcommand=ver_scrollbar.set, xscrollcommand=hor_scrollbar.set)
+        c = self.canvas
+        c.bind('<Configure>', self.onResize)
+        c.bind('<ButtonPress-1>', self.onDragStart)
+        c.bind('<B1-Motion>', self.onDrag)
+        c.bind('<MouseWheel>', self.onWheel)
+        c.bind('<Button-4>', lambda e: self.zoomAt(e.x, e.y, 1.25))  # X11 wheel
+        c.bind('<Button-5>', lambda e: self.zoomAt(e.x, e.y, 0.8))
 
         self.timeText = self.canvas.create_text(0,0,text="Time=0.0",anchor=NW)
 
     ###################
     def setTime(self, time):
-        if (time - self.lastShownTime > 0.05):
-            self.canvas.itemconfigure(self.timeText, text='Time: %.2fS' % time)
-            self.lastShownTime = time
+        self.time = time
+
+    #######################################################
+    # View
+    #######################################################
+    def toScreen(self,x,y):
+        return (x-self.panX)*self.zoom, (y-self.panY)*self.zoom
+
+    ###################
+    def viewRect(self):
+        (w,h) = self.viewSize
+        return (self.panX, self.panY, self.panX + w/self.zoom, self.panY + h/self.zoom)
 
     ###################
-    def updateNodePosAndSize(self,id):
+    def inView(self,x1,y1,x2,y2):
+        (vx1,vy1,vx2,vy2) = self.view
+        return x1 <= vx2 and x2 >= vx1 and y1 <= vy2 and y2 >= vy1
+
+    ###################
+    def zoomAt(self,sx,sy,factor):
+        """
+        Zoom by factor, keeping the point under screen position (sx,sy) in place
+        """
+        x = self.panX + sx/self.zoom
+        y = self.panY + sy/self.zoom
+        self.zoom *= factor
+        self.panX = x - sx/self.zoom
+        self.panY = y - sy/self.zoom
+        self.viewChanged = True
+
+    ###################
+    def onWheel(self,event):
+        self.zoomAt(event.x, event.y, 1.25 if event.delta > 0 else 0.8)
+
+    ###################
+    def onDragStart(self,event):
+        self.dragFrom = (event.x,event.y)
+
+    ###################
+    def onDrag(self,event):
+        (x,y) = self.dragFrom
+        self.panX -= (event.x-x)/self.zoom
+        self.panY -= (event.y-y)/self.zoom
+        self.dragFrom = (event.x,event.y)
+        self.viewChanged = True
+
+    ###################
+    def onResize(self,event):
+        self.viewSize = (event.width,event.height)
+        self.viewChanged = True
+
+    ###################
+    def relayout(self):
+        """
+        Re-create the canvas items of everything in view, after the view
+        changed or the number of edges in view crossed maxEdges
+        """
+        self.viewChanged = False
+        self.view = self.viewRect()
+        self.canvas.delete('scene')
+        self.nodes.clear()
+        for id in self.nodeLinks.keys():
+            self.drawNode(id)
+        inView = [l for l in self.links.keys() if self.linkInView(l)]
+        self.edgesInView = sum(1 for l in inView if l[2] == 'edge')
+        self.edgesHidden = self.edgesInView > self.maxEdges
+        for l in self.links.keys():
+            self.links[l] = None
+        for l in inView:
+            if not (self.edgesHidden and l[2] == 'edge'):
+                self.links[l] = self.createLink(*l)
+        for id in self.shapes.keys():
+            self.shapes[id] = self.drawShape(id)
+        self.lastShownTime = None
+
+    #######################################################
+    # Canvas items
+    #######################################################
+    def drawNode(self,id):
+        """
+        Create, update or remove the canvas items of a node from its state
+        in the scene
+        """
         p = self.params
         c = self.canvas
-        if id not in self.nodes.keys():
-            node_tag = c.create_oval(0,0,0,0)
-            label_tag = c.create_text(0,0,text=str(id))
+        node = self.scene.nodes[id]
+        r = node.scale*p.nodesize
+        (x,y) = node.pos
+        if not self.inView(x-r, y-r, x+r, y+r):
+            if id in self.nodes:
+                c.delete(*self.nodes.pop(id))
+            return
+        if id not in self.nodes:
+            node_tag = c.create_oval(0,0,0,0,tags='scene')
+            label_tag = c.create_text(0,0,tags='scene')
             self.nodes[id] = (node_tag,label_tag)
         else:
             (node_tag,label_tag) = self.nodes[id]
 
-        node = self.scene.nodes[id]
-        nodesize = node.scale*p.nodesize
-        x1 = node.pos[0] - nodesize
-        y1 = node.pos[1] - nodesize
-        (x2,y2) = (x1 + nodesize*2, y1 + nodesize*2)
-        c.coords(node_tag, x1, y1, x2, y2)
-        c.coords(label_tag, node.pos)
-
-        for l in self.nodeLinks[id]:
-            self.updateLink(*l)
+        (x,y) = self.toScreen(x, y)
+        r *= self.zoom
+        color = 'black' if node.color == DEFAULT else colorStr(node.color)
+        c.coords(node_tag, x-r, y-r, x+r, y+r)
+        c.itemconfigure(node_tag, outline=color,
+                width=1 if node.width == DEFAULT else node.width)
+        c.coords(label_tag, x, y)
+        # labels of small nodes could not be read anyway
+        c.itemconfigure(label_tag, text=node.label if r >= 4 else '', fill=color)
 
     ###################
     def configLine(self,tagOrId,style):
@@ -105,124 +242,351 @@ class Plotter(GenericPlotter):
         self.canvas.itemconfigure(tagOrId,**config)
 
     ###################
-    def createLink(self,src,dst,style):
-        if src is dst:
-            raise('Source and destination are the same node')
-        p = self.params
-        c = self.canvas
+    def linkInView(self,link):
+        (x1,y1) = self.scene.nodes[link[0]].pos
+        (x2,y2) = self.scene.nodes[link[1]].pos
+        return self.inView(min(x1,x2), min(y1,y2), max(x1,x2), max(y1,y2))
+
+    ###################
+    def linkEndPoints(self,src,dst):
         (x1,y1,x2,y2) = computeLinkEndPoints(
                 self.scene.nodes[src],
                 self.scene.nodes[dst], 
-                p.nodesize)
-        link_obj = c.create_line(x1, y1, x2, y2, tags='link')
+                self.params.nodesize)
+        return self.toScreen(x1, y1) + self.toScreen(x2, y2)
+
+    ###################
+    def createLink(self,src,dst,style):
+        if src is dst:
+            raise('Source and destination are the same node')
+        link_obj = self.canvas.create_line(*self.linkEndPoints(src, dst), tags=('scene','link'))
         self.configLine(link_obj, self.scene.lineStyles[style])
         return link_obj
 
     ###################
     def updateLink(self,src,dst,style):
-        p = self.params
-        c = self.canvas
-        link_obj = self.links[(src,dst,style)]
-        (x1,y1,x2,y2) = computeLinkEndPoints(
-                self.scene.nodes[src],
-                self.scene.nodes[dst], 
-                p.nodesize)
-        c.coords(link_obj, x1, y1, x2, y2)
-
+        """
+        Move, draw or remove a link after one of its nodes moved
+        """
+        link = (src,dst,style)
+        link_obj = self.links[link]
+        if self.linkInView(link) and not (self.edgesHidden and style == 'edge'):
+            if link_obj is None:
+                self.links[link] = self.createLink(src, dst, style)
+            else:
+                self.canvas.coords(link_obj, *self.linkEndPoints(src, dst))
+        elif link_obj is not None:
+            self.canvas.delete(link_obj)
+            self.links[link] = None
 
     ###################
+    @queued
     def node(self,id,x,y):
-        self.nodeLinks[id] = []
-        self.updateNodePosAndSize(id)
-        self.tk.update()
+        self.pending.newNodes.append(id)
 
     ###################
+    @queued
     def nodemove(self,id,x,y):
-        self.updateNodePosAndSize(id)
-        self.tk.update()
+        self.pending.movedNodes.add(id)
 
     ###################
+    @queued
     def nodecolor(self,id,r,g,b):
-        (node_tag,label_tag) = self.nodes[id]
-        self.canvas.itemconfig(node_tag, outline=colorStr((r,g,b)))
-        self.canvas.itemconfigure(label_tag, fill=colorStr((r,g,b)))
-        self.tk.update()
+        self.pending.styledNodes.add(id)
 
     ###################
+    @queued
     def nodewidth(self,id,width):
-        (node_tag,label_tag) = self.nodes[id]
-        self.canvas.itemconfig(node_tag, width=width)
-        self.tk.update()
+        self.pending.styledNodes.add(id)
 
     ###################
+    @queued
     def nodescale(self,id,scale):
         # scale attribute has been set by TopoVis
         # just update the node
-        self.updateNodePosAndSize(id)
-        self.tk.update()
+        self.pending.movedNodes.add(id)
 
     ###################
+    @queued
     def nodelabel(self,id,label):
-        (node_tag,label_tag) = self.nodes[id]
-        self.canvas.itemconfigure(label_tag, text=self.scene.nodes[id].label)
-        self.tk.update()
+        self.pending.styledNodes.add(id)
 
     ###################
+    @queued
     def addlink(self,src,dst,style):
         if style == 'edge' and src > dst:
             src, dst = dst, src
-        self.nodeLinks[src].append((src,dst,style))
-        self.nodeLinks[dst].append((src,dst,style))
-        self.links[(src,dst,style)] = self.createLink(src, dst, style)
-        self.tk.update()
+        self.pending.links[(src,dst,style)] = True
+
+    ###################
+    @queued
+    def addlinks(self,links):
+        pendingLinks = self.pending.links
+        for (src,dst,style) in links:
+            if style == 'edge' and src > dst:
+                src, dst = dst, src
+            pendingLinks[(src,dst,style)] = True
 
     ###################
+    @queued
     def dellink(self,src,dst,style):
         if style == 'edge' and src > dst:
             src, dst = dst, src
-        self.nodeLinks[src].remove((src,dst,style))
-        self.nodeLinks[dst].remove((src,dst,style))
-        self.canvas.delete(self.links[(src,dst,style)])
-        del self.links[(src,dst,style)]
-        self.tk.update()
+        self.pending.links[(src,dst,style)] = False
 
     ###################
+    @queued
     def clearlinks(self):
-        self.canvas.delete('link')
-        self.links.clear()
-        for n in self.nodes.keys():
-            self.nodeLinks[n] = []
-        self.tk.update()
+        self.pending.clearLinks = True
+        self.pending.links.clear()
 
     ###################
+    @queued
     def circle(self,x,y,r,id,linestyle,fillstyle):
-        if id in self.shapes.keys():
-            self.canvas.delete(self.shapes[id])
-            del self.shapes[id]
-        self.shapes[id] = self.canvas.create_oval(x-r,y-r,x+r,y+r)
-        self.configPolygon(self.shapes[id], linestyle, fillstyle)
-        self.tk.update()
+        self.pending.shapes[id] = (self.drawCircle, (x,y,r,linestyle,fillstyle))
 
     ###################
+    @queued
     def line(self,x1,y1,x2,y2,id,linestyle):
-        if id in self.shapes.keys():
-            self.canvas.delete(self.shapes[id])
-            del self.shapes[id]
-        self.shapes[id] = self.canvas.create_line(x1,y1,x2,y2)
-        self.configLine(self.shapes[id], linestyle)
-        self.tk.update()
+        self.pending.shapes[id] = (self.drawLine, (x1,y1,x2,y2,linestyle))
 
     ###################
+    @queued
     def rect(self,x1,y1,x2,y2,id,linestyle,fillstyle):
-        if id in self.shapes.keys():
-            self.canvas.delete(self.shapes[id])
-            del self.shapes[id]
-        self.shapes[id] = self.canvas.create_rectangle(x1,y1,x2,y2)
-        self.configPolygon(self.shapes[id], linestyle, fillstyle)
-        self.tk.update()
+        self.pending.shapes[id] = (self.drawRect, (x1,y1,x2,y2,linestyle,fillstyle))
 
     ###################
+    @queued
     def delshape(self,id):
-        if id in self.shapes.keys():
-            self.canvas.delete(self.shapes[id])
-            self.tk.update()
+        # a shape created in the same frame is never drawn
+        self.pending.shapes[id] = None
+
+    #######################################################
+    # Drawing of buffered commands, once per frame
+    #######################################################
+    def frame(self):
+        try:
+            self.drain()
+            self.flush()
+        finally:
+            self.tk.after(int(1000/self.fps), self.frame)
+
+    ###################
+    def drain(self):
+        """
+        Move the queued commands into the frame buffer.  Only the commands
+        queued so far are taken, so a fast producer cannot starve the Tk loop.
+        """
+        commands = self.commands
+        popleft = commands.popleft
+        for i in range(len(commands)):
+            (method,args) = popleft()
+            method(self, *args)
+
+    ###################
+    def flush(self):
+        """
+        Apply the commands buffered since the last frame to the canvas
+        """
+        frame, self.pending = self.pending, FrameBuffer()
+        c = self.canvas
+        for id in frame.newNodes:
+            self.nodeLinks.setdefault(id, [])
+            frame.movedNodes.add(id)
+        for id in frame.movedNodes:
+            self.drawNode(id)
+            for l in self.nodeLinks[id]:
+                self.updateLink(*l)
+        for id in frame.styledNodes - frame.movedNodes:
+            self.drawNode(id)
+
+        if frame.clearLinks:
+            c.delete('link')
+            self.links.clear()
+            self.edgesInView = 0
+            for n in self.nodeLinks.keys():
+                self.nodeLinks[n] = []
+        for (link,shown) in frame.links.items():
+            (src,dst,style) = link
+            if shown and link not in self.links:
+                self.nodeLinks[src].append(link)
+                self.nodeLinks[dst].append(link)
+                self.links[link] = None
+                if self.linkInView(link):
+                    self.edgesInView += style == 'edge'
+                    if not (self.edgesHidden and style == 'edge'):
+                        self.links[link] = self.createLink(src, dst, style)
+            elif not shown and link in self.links:
+                self.nodeLinks[src].remove(link)
+                self.nodeLinks[dst].remove(link)
+                link_obj = self.links.pop(link)
+                if self.linkInView(link):
+                    self.edgesInView -= style == 'edge'
+                if link_obj is not None:
+                    c.delete(link_obj)
+        if self.edgesHidden != (self.edgesInView > self.maxEdges):
+            self.viewChanged = True
+
+        for (id,shape) in frame.shapes.items():
+            shape_obj = self.shapes.pop(id, None)
+            if shape_obj is not None:
+                c.delete(shape_obj)
+            self.shapeSpecs.pop(id, None)
+            if shape is not None:
+                self.shapeSpecs[id] = shape
+                self.shapes[id] = self.drawShape(id)
+
+        if self.viewChanged:
+            self.relayout()
+        if self.time != self.lastShownTime:
+            text = 'Time: %.2fS' % self.time
+            if self.edgesHidden:
+                text += '  (%d edges hidden, zoom in to show)' % self.edgesInView
+            c.itemconfigure(self.timeText, text=text)
+            self.lastShownTime = self.time
+
+    ###################
+    def drawShape(self,id):
+        """
+        Draw a shape if it is in view and the zoom is at least shapeZoom.
+        Return its canvas item, or None if it was not drawn.
+        """
+        if self.zoom < self.shapeZoom:
+            return None
+        (draw,args) = self.shapeSpecs[id]
+        return draw(*args)
+
+    ###################
+    def drawCircle(self,x,y,r,linestyle,fillstyle):
+        if not self.inView(x-r, y-r, x+r, y+r):
+            return None
+        (x,y) = self.toScreen(x, y)
+        r *= self.zoom
+        shape = self.canvas.create_oval(x-r,y-r,x+r,y+r,tags='scene')
+        self.configPolygon(shape, linestyle, fillstyle)
+        return shape
+
+    ###################
+    def drawLine(self,x1,y1,x2,y2,linestyle):
+        if not self.inView(min(x1,x2), min(y1,y2), max(x1,x2), max(y1,y2)):
+            return None
+        shape = self.canvas.create_line(*(self.toScreen(x1, y1) + self.toScreen(x2, y2)),
+                tags='scene')
+        self.configLine(shape, linestyle)
+        return shape
+
+    ###################
+    def drawRect(self,x1,y1,x2,y2,linestyle,fillstyle):
+        if not self.inView(min(x1,x2), min(y1,y2), max(x1,x2), max(y1,y2)):
+            return None
+        shape = self.canvas.create_rectangle(*(self.toScreen(x1, y1) + self.toScreen(x2, y2)),
+                tags='scene')
+        self.configPolygon(shape, linestyle, fillstyle)
+        return shape
+
+    #######################################################
+    # Replay of traces recorded by topovis.trace.TraceRecorder
+    #######################################################
+    def replay(self, trace, speed=1.0, start=0.0):
+        """
+        Replay a recorded trace (file name or TraceReader) in this window,
+        speed times faster than the recorded time.  The replay is driven from
+        the Tk loop, so it runs once mainloop() is entered.  Keys: space
+        pauses, Left/Right seek 5% of the trace, Up/Down double/halve speed,
+        Home restarts.
+        """
+        if not isinstance(trace, TraceReader):
+            trace = TraceReader(trace)
+        self.trace = trace
+        self.replaySpeed = speed
+        self.paused = False
+        self.tk.bind('<space>', lambda e: self.pause(not self.paused))
+        step = trace.duration / 20
+        self.tk.bind('<Left>', lambda e: self.seek(self.replayTime - step))
+        self.tk.bind('<Right>', lambda e: self.seek(self.replayTime + step))
+        self.tk.bind('<Up>', lambda e: self.setSpeed(self.replaySpeed * 2))
+        self.tk.bind('<Down>', lambda e: self.setSpeed(self.replaySpeed / 2))
+        self.tk.bind('<Home>', lambda e: self.seek(0.0))
+        self.resetReplay()
+        self.seek(start)
+        self.replayStep()
+
+    ###################
+    def resetReplay(self):
+        """
+        Clear the canvas and start over with an empty scene
+        """
+        if self.scene is not None and self in self.scene.plotters:
+            self.scene.removePlotter(self)
+        self.canvas.delete(ALL)
+        self.nodes.clear()
+        self.links.clear()
+        self.nodeLinks.clear()
+        self.shapes.clear()
+        self.shapeSpecs.clear()
+        self.edgesInView = 0
+        self.commands.clear()
+        self.pending = FrameBuffer()
+        self.timeText = self.canvas.create_text(0,0,text="Time=0.0",anchor=NW)
+        self.lastShownTime = None
+        Scene().addPlotter(self)
+        self.replayIndex = 0
+        self.replayTime = 0.0
+
+    ###################
+    def seek(self, time):
+        """
+        Jump to the given time of the trace.  Seeking backward replays the
+        trace from its start without delay.
+        """
+        time = min(max(time, 0.0), self.trace.duration)
+        if time < self.replayTime:
+            self.resetReplay()
+        self.replayTime = time
+        self.replayClock = systime()
+        self.applyRecords(time)
+
+    ###################
+    def setSpeed(self, speed):
+        self.replayTime += (systime() - self.replayClock) * self.replaySpeed * (not self.paused)
+        self.replayClock = systime()
+        self.replaySpeed = speed
+
+    ###################
+    def pause(self, flag=True):
+        if not self.paused:
+            self.replayTime += (systime() - self.replayClock) * self.replaySpeed
+        self.replayClock = systime()
+        self.paused = flag
+
+    ###################
+    def applyRecords(self, time):
+        """
+        Execute the recorded commands up to the given time on the scene
+        """
+        records = self.trace.records
+        end = self.trace.index(time)
+        scene = self.scene
+        for (t,cmd,args,kwargs) in records[self.replayIndex:end]:
+            getattr(scene, cmd)(*args, **kwargs)
+        self.replayIndex = max(self.replayIndex, end)
+        self.setTime(time)
+
+    ###################
+    def replayStep(self):
+        if not self.paused:
+            now = systime()
+            self.replayTime = min(self.replayTime + (now - self.replayClock) * self.replaySpeed,
+                    self.trace.duration)
+            self.replayClock = now
+            self.applyRecords(self.replayTime)
+        self.tk.after(20, self.replayStep)
+
+
+if __name__ == '__main__':
+    # replay a trace: python -m topovis.TkPlotter <trace> [speed]
+    import sys
+    trace = TraceReader(sys.argv[1])
+    plotter = Plotter(windowTitle=sys.argv[1])
+    plotter.replay(trace, float(sys.argv[2]) if len(sys.argv) > 2 else 1.0)
+    plotter.tk.mainloop()
@@ -1,7 +1,8 @@
-from time import sleep, time as systime
-from threading import Timer
+from time import sleep, time as systime, monotonic
+from threading import Thread, Condition
 from heapq import heappush, heappop
 import inspect
+import traceback
 
 from .common import *
 
@@ -40,6 +41,9 @@ class GenericPlotter:
     def nodelabel(self,id,label): pass
     def nodescale(self,id,scale): pass
     def addlink(self,src,dst,style): pass
+    def addlinks(self,links):
+        for link in links:
+            self.addlink(*link)
     def dellink(self,src,dst,style): pass
     def clearlinks(self): pass
     def show(self): pass
@@ -79,6 +83,57 @@ def informPlotters(_func_):
     ret.__doc__ = _func_.__doc__
     return ret
 
+###############################################
+class Scheduler:
+    """
+    Run delayed commands from a single daemon thread, in the order of their
+    due time.  Pending commands are kept in a heap, so a busy realtime scene
+    needs no thread per command.
+    """
+    def __init__(self):
+        self.queue = []
+        self.counter = 0      # breaks ties so equal due times run in order
+        self.cond = Condition()
+        self.thread = None
+
+    ###################
+    def schedule(self, delay, func, *args, **kwargs):
+        """
+        Call func with the given arguments after delay seconds
+        """
+        with self.cond:
+            entry = (monotonic()+delay, self.counter, func, args, kwargs)
+            self.counter += 1
+            heappush(self.queue, entry)
+            if self.thread is None:
+                self.thread = Thread(target=self.run, name='topovis-scheduler')
+                self.thread.daemon = True
+                self.thread.start()
+            elif self.queue[0] is entry:
+                # wake up the thread earlier than it planned to
+                self.cond.notify()
+
+    ###################
+    def __len__(self):
+        return len(self.queue)
+
+    ###################
+    def run(self):
+        queue = self.queue
+        while True:
+            with self.cond:
+                while not queue:
+                    self.cond.wait()
+                wait = queue[0][0] - monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                (due,_,func,args,kwargs) = heappop(queue)
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                traceback.print_exc()
+
 ###############################################
 class Scene:
     """
@@ -102,6 +157,7 @@ class Scene:
         self.realtime = realtime
         self.evq = []        # Event queue
         self.uniqueId = 0    # Counter for generating unique IDs
+        self.scheduler = Scheduler() # Delayed commands in realtime mode
 
         self.dim = (0,0)     # Terrain dimension
         self.nodes = {}      # Nodes' information
@@ -175,9 +231,7 @@ class Scene:
             # no need to scedule any execution at time infinity
             return
         if self.realtime:
-            def execfn():
-                self.execute(0, cmd, *args, **kwargs)
-            Timer(delay, execfn).start()
+            self.scheduler.schedule(delay, self.execute, 0, cmd, *args, **kwargs)
         else:
             heappush(self.evq, (self.time+delay, cmd, args, kwargs))
 
@@ -314,6 +368,18 @@ class Scene:
             src, dst = dst, src
         self.links.add((src,dst,style))
 
+    ###################
+    @informPlotters
+    def addlinks(self,links):
+        """
+        (Scene scripting command)
+        Add many links at once.  links is a list of (src,dst,style) tuples
+        """
+        for (src,dst,style) in links:
+            if style == 'edge' and src > dst:
+                src, dst = dst, src
+            self.links.add((src,dst,style))
+
     ###################
     @informPlotters
     def dellink(self,src,dst,style):
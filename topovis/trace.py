@@ -0,0 +1,295 @@
+"""
+Binary traces of scene scripting commands.  A TraceRecorder is a plotter that
+writes every command it receives, stamped with the scene time, to a file
+instead of drawing it.  A TraceReader loads such a file so that the commands
+can be replayed later, e.g. by TkPlotter.Plotter.replay().
+
+A trace starts with MAGIC followed by records.  Each record is a double
+(time), a byte (opcode), then the arguments and keyword arguments of the
+command as tagged values.  Strings are written once and referred to by index
+afterwards, and so are line and fill styles.
+"""
+from struct import Struct
+from bisect import bisect_right
+
+from .common import *
+from .TopoVis import GenericPlotter
+
+MAGIC = b'TVTRACE1'
+
+# Opcodes of the scripting commands, in the order of their opcode.  Opcode 0
+# defines a string and opcode 1 a style; neither is a command.
+COMMANDS = ('init', 'node', 'nodemove', 'nodehollow', 'nodedouble',
+        'nodecolor', 'nodewidth', 'nodelabel', 'nodescale', 'addlink',
+        'addlinks', 'dellink', 'clearlinks', 'show', 'circle', 'line', 'rect',
+        'delshape', 'linestyle', 'fillstyle', 'textstyle')
+DEFSTRING = 0
+DEFSTYLE = 1
+OPCODES = dict((name, i + 2) for (i, name) in enumerate(COMMANDS))
+
+HEAD = Struct('<dB')
+INT = Struct('<i')
+UINT = Struct('<I')
+DOUBLE = Struct('<d')
+COUNT = Struct('<H')
+
+# Tags of encoded values
+T_NONE, T_FALSE, T_TRUE, T_INT, T_BIGINT, T_FLOAT = b'NFTiIf'
+T_STR, T_UID, T_TUPLE, T_LIST, T_DICT, T_STYLE = b'sutldS'
+
+###############################################
+class TraceRecorder(GenericPlotter):
+    """
+    Plotter writing the scene scripting commands to a binary trace file.
+    Nothing is drawn, so recording costs only the encoding and a buffered
+    write per command.
+    """
+    def __init__(self, path, clock=None, params=None):
+        """
+        Open the trace file at path.  clock, if given, is called for the time
+        of each record, e.g. to stamp commands with the simulation time when
+        the scene time is not kept up to date.  Otherwise the time last given
+        to setTime() is used.
+        """
+        GenericPlotter.__init__(self, params)
+        self.path = path
+        self.clock = clock
+        self.time = 0.0
+        self.strings = {}
+        self.styles = {}
+        self.records = 0
+        self.file = open(path, 'wb', buffering=1 << 20)
+        self.file.write(MAGIC)
+
+    ###################
+    def setScene(self, scene):
+        """
+        Attach to the scene, writing the state it already has (e.g. styles
+        defined before the recorder was added) so that the trace is complete
+        """
+        GenericPlotter.setScene(self, scene)
+        self.time = scene.time
+        if scene.initialized:
+            self.record('init', *scene.dim)
+        for (id,style) in scene.lineStyles.items():
+            self.record('linestyle', id, **vars(style))
+        for (id,style) in scene.fillStyles.items():
+            self.record('fillstyle', id, **vars(style))
+        for node in scene.nodes.values():
+            self.record('node', node.id, *node.pos)
+            if node.color != DEFAULT:
+                self.record('nodecolor', node.id, *node.color)
+            if node.label != str(node.id):
+                self.record('nodelabel', node.id, node.label)
+            if node.scale != 1.0:
+                self.record('nodescale', node.id, node.scale)
+        if scene.links:
+            self.record('addlinks', list(scene.links))
+
+    ###################
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    ###################
+    def record(self, cmd, *args, **kwargs):
+        """
+        Append a command with its arguments to the trace
+        """
+        time = self.clock() if self.clock is not None else self.time
+        body = bytearray(HEAD.pack(time, OPCODES[cmd]))
+        self.encode(body, args)
+        self.encode(body, kwargs or None)
+        self.file.write(body)
+        self.records += 1
+
+    ###################
+    def define(self, opcode, body):
+        """
+        Write a definition record ahead of the record being encoded
+        """
+        self.file.write(HEAD.pack(self.time, opcode) + body)
+
+    ###################
+    def encode(self, out, value):
+        t = type(value)
+        if value is None:
+            out.append(T_NONE)
+        elif t is bool:
+            out.append(T_TRUE if value else T_FALSE)
+        elif t is int:
+            if -0x80000000 <= value <= 0x7fffffff:
+                out.append(T_INT)
+                out += INT.pack(value)
+            else:
+                out.append(T_BIGINT)
+                self.encode(out, str(value))
+        elif t is float:
+            out.append(T_FLOAT)
+            out += DOUBLE.pack(value)
+        elif t is str:
+            if value[:1] == '_' and value[1:].isdigit():
+                # ids made by Scene._getUniqueId() are all different,
+                # interning them would only grow the string table
+                out.append(T_UID)
+                out += UINT.pack(int(value[1:]))
+                return
+            index = self.strings.get(value)
+            if index is None:
+                index = self.strings[value] = len(self.strings)
+                data = value.encode('utf-8')
+                self.define(DEFSTRING, UINT.pack(len(data)) + data)
+            out.append(T_STR)
+            out += UINT.pack(index)
+        elif t is tuple or t is list:
+            out.append(T_TUPLE if t is tuple else T_LIST)
+            out += UINT.pack(len(value))
+            for item in value:
+                self.encode(out, item)
+        elif t is dict:
+            out.append(T_DICT)
+            out += COUNT.pack(len(value))
+            for (k,v) in value.items():
+                self.encode(out, k)
+                self.encode(out, v)
+        elif t is LineStyle or t is FillStyle:
+            key = (t.__name__,) + tuple(sorted(vars(value).items()))
+            index = self.styles.get(key)
+            if index is None:
+                index = self.styles[key] = len(self.styles)
+                body = bytearray()
+                self.encode(body, t.__name__)
+                self.encode(body, vars(value))
+                self.define(DEFSTYLE, bytes(body))
+            out.append(T_STYLE)
+            out += UINT.pack(index)
+        elif getattr(value, 'ndim', None) == 0 and hasattr(value, 'item'):
+            # NumPy scalars, e.g. positions or ids read from arrays
+            self.encode(out, value.item())
+        else:
+            raise Exception('Cannot record value %r' % (value,))
+
+    #######################################################
+    # Scripting commands are written as they are received
+    #######################################################
+    def setTime(self, time): self.time = time
+    def init(self,tx,ty): self.record('init', tx, ty)
+    def node(self,id,x,y): self.record('node', id, x, y)
+    def nodemove(self,id,x,y): self.record('nodemove', id, x, y)
+    def nodehollow(self,id,flag): self.record('nodehollow', id, flag)
+    def nodedouble(self,id,flag): self.record('nodedouble', id, flag)
+    def nodecolor(self,id,r,g,b): self.record('nodecolor', id, r, g, b)
+    def nodewidth(self,id,width): self.record('nodewidth', id, width)
+    def nodelabel(self,id,label): self.record('nodelabel', id, label)
+    def nodescale(self,id,scale): self.record('nodescale', id, scale)
+    def addlink(self,src,dst,style): self.record('addlink', src, dst, style)
+    def addlinks(self,links): self.record('addlinks', list(links))
+    def dellink(self,src,dst,style): self.record('dellink', src, dst, style)
+    def clearlinks(self): self.record('clearlinks')
+    def show(self): self.record('show')
+    def circle(self,x,y,r,id,linestyle,fillstyle):
+        self.record('circle', x, y, r, id, linestyle, fillstyle)
+    def line(self,x1,y1,x2,y2,id,linestyle):
+        self.record('line', x1, y1, x2, y2, id, linestyle)
+    def rect(self,x1,y1,x2,y2,id,linestyle,fillstyle):
+        self.record('rect', x1, y1, x2, y2, id, linestyle, fillstyle)
+    def delshape(self,id): self.record('delshape', id)
+    def linestyle(self,id,**kwargs): self.record('linestyle', id, **kwargs)
+    def fillstyle(self,id,**kwargs): self.record('fillstyle', id, **kwargs)
+    def textstyle(self,id,**kwargs): self.record('textstyle', id, **kwargs)
+
+###############################################
+class TraceReader:
+    """
+    Load a trace written by TraceRecorder.  Commands are kept in time order
+    as (time, cmd, args, kwargs) tuples in the records attribute.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise Exception('%s is not a TopoVis trace' % path)
+        self.path = path
+        self.strings = []
+        self.styles = []
+        self.records = []
+        self.data = data
+        pos = len(MAGIC)
+        while pos < len(data):
+            (time,opcode) = HEAD.unpack_from(data, pos)
+            pos += HEAD.size
+            if opcode == DEFSTRING:
+                (size,) = UINT.unpack_from(data, pos)
+                pos += UINT.size
+                self.strings.append(data[pos:pos+size].decode('utf-8'))
+                pos += size
+            elif opcode == DEFSTYLE:
+                (name,pos) = self.decode(pos)
+                (attrs,pos) = self.decode(pos)
+                style = LineStyle() if name == 'LineStyle' else FillStyle()
+                vars(style).update(attrs)
+                self.styles.append(style)
+            else:
+                (args,pos) = self.decode(pos)
+                (kwargs,pos) = self.decode(pos)
+                self.records.append(
+                        (time, COMMANDS[opcode-2], args, kwargs or {}))
+        del self.data
+        self.times = [r[0] for r in self.records]
+
+    ###################
+    def decode(self, pos):
+        data = self.data
+        tag = data[pos]
+        pos += 1
+        if tag == T_NONE:
+            return None, pos
+        elif tag == T_FALSE or tag == T_TRUE:
+            return tag == T_TRUE, pos
+        elif tag == T_INT:
+            return INT.unpack_from(data, pos)[0], pos + INT.size
+        elif tag == T_BIGINT:
+            (value,pos) = self.decode(pos)
+            return int(value), pos
+        elif tag == T_FLOAT:
+            return DOUBLE.unpack_from(data, pos)[0], pos + DOUBLE.size
+        elif tag == T_STR:
+            return self.strings[UINT.unpack_from(data, pos)[0]], pos + UINT.size
+        elif tag == T_UID:
+            return '_%d' % UINT.unpack_from(data, pos)[0], pos + UINT.size
+        elif tag == T_TUPLE or tag == T_LIST:
+            (count,) = UINT.unpack_from(data, pos)
+            pos += UINT.size
+            items = []
+            for i in range(count):
+                (item,pos) = self.decode(pos)
+                items.append(item)
+            return (tuple(items) if tag == T_TUPLE else items), pos
+        elif tag == T_DICT:
+            (count,) = COUNT.unpack_from(data, pos)
+            pos += COUNT.size
+            value = {}
+            for i in range(count):
+                (k,pos) = self.decode(pos)
+                (v,pos) = self.decode(pos)
+                value[k] = v
+            return value, pos
+        elif tag == T_STYLE:
+            return self.styles[UINT.unpack_from(data, pos)[0]], pos + UINT.size
+        raise Exception('Corrupted trace at byte %d' % (pos-1))
+
+    ###################
+    def __len__(self):
+        return len(self.records)
+
+    ###################
+    @property
+    def duration(self):
+        return self.times[-1] if self.times else 0.0
+
+    ###################
+    def index(self, time):
+        """
+        Return the index of the first record later than time
+        """
+        return bisect_right(self.times, time)